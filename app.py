@@ -11,7 +11,10 @@ from src.main_app_page import display_main_app_view
 # ==============================================================================
 default_session_values = {
     'last_coords': None, 'current_df': pd.DataFrame(), 'dong_name': None,
+    'floor_mask_cache': {}, # 현재 조회 결과에 대한 층 조건별 필터 마스크 (main_app_page.get_floor_filter_mask)
     'is_fetching': False, 'coords_to_fetch': None, 'selected_areas': {},
+    'fetch_job_id': None, 'fetch_job_coords': None, # 진행 중인 백그라운드 조회 작업
+    'fetch_warning': None, # 일부 단지 수집 실패 등 결과와 함께 표시할 경고
     'last_click_time': 0, 'fetch_start_time': None, 'error_message': None,
     'group_add_status': None,
     'user_configs_set': False, 'naver_api_keys_set': False,
@@ -19,7 +22,12 @@ default_session_values = {
     'naver_client_id': None, 'naver_client_secret': None,
     'force_redirect_to_config': False, # 리디렉션 강제 플래그
     'show_api_key_error_popup_on_main_page': False, # main_app_page 팝업 플래그
-    'error_popup_on_main_page': False # 일반적 Error
+    'error_popup_on_main_page': False, # 일반적 Error
+    # 조회 조건 (네이버 API 요청 파라미터로 적용, 가격은 억 / 면적은 ㎡ 단위, 슬라이더 최대값 = 상한 없음)
+    'crawl_trade_types': ['매매', '전세'], 'crawl_min_households': 300, 'crawl_max_listings_per_complex': 0,
+    'crawl_price_range': (0, 50), 'crawl_area_range': (0, 300),
+    'serve_stale_snapshots': True, # 만료된 지역은 이전 스냅샷을 먼저 표시하고 백그라운드에서 갱신
+    'stale_refresh': None # 현재 표시 중인 스냅샷의 백그라운드 갱신 정보
 }
 for key, value in default_session_values.items():
     if key not in st.session_state:
@@ -0,0 +1,218 @@
+# src/article_store.py
+import os
+import sys
+import json
+import hashlib
+import time
+import sqlite3
+import threading
+import pandas as pd
+
+from .region_cache import PROJECT_ROOT
+
+# 수집한 매물을 영구 보관하는 로컬 저장소 (SQLite, 같은 호스트의 모든 세션/앱 프로세스가 공유)
+ARTICLE_STORE_PATH = os.environ.get('ARTICLE_STORE_PATH', os.path.join(PROJECT_ROOT, 'output', 'store', 'articles.sqlite3'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cortar_no TEXT NOT NULL,
+    params_key TEXT NOT NULL,
+    dong_name TEXT,
+    crawled_at REAL NOT NULL,
+    article_count INTEGER NOT NULL,
+    complex_snapshots TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_region ON snapshots (cortar_no, params_key, crawled_at);
+
+CREATE TABLE IF NOT EXISTS articles (
+    article_no TEXT PRIMARY KEY,
+    cortar_no TEXT,
+    marker_id TEXT,
+    trade_type_name TEXT,
+    price TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_cortar_no ON articles (cortar_no);
+CREATE INDEX IF NOT EXISTS idx_articles_marker_id ON articles (marker_id);
+CREATE INDEX IF NOT EXISTS idx_articles_trade_type_name ON articles (trade_type_name);
+
+CREATE TABLE IF NOT EXISTS article_prices (
+    article_no TEXT NOT NULL,
+    snapshot_id INTEGER NOT NULL,
+    price TEXT,
+    payload_hash TEXT,
+    PRIMARY KEY (article_no, snapshot_id)
+);
+CREATE INDEX IF NOT EXISTS idx_article_prices_snapshot_id ON article_prices (snapshot_id);
+
+CREATE TABLE IF NOT EXISTS article_payloads (
+    payload_hash TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+_UPSERT_ARTICLE_SQL = """
+INSERT INTO articles (article_no, cortar_no, marker_id, trade_type_name, price, first_seen, last_seen, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (article_no) DO UPDATE SET
+    cortar_no = excluded.cortar_no, marker_id = excluded.marker_id, trade_type_name = excluded.trade_type_name,
+    price = excluded.price, last_seen = excluded.last_seen, data = excluded.data
+"""
+
+
+def _none_if_missing(value):
+    """DataFrame 변환 때 채워진 NaN/NA를 None으로 바꿉니다."""
+    return None if value is pd.NA or (isinstance(value, float) and value != value) else value
+
+
+class ArticleStore:
+    """
+    수집한 매물을 articleNo 기준으로 upsert하는 SQLite 저장소.
+    - articles: 매물별 최신 내용과 first_seen/last_seen (cortarNo, markerId, tradeTypeName 인덱스)
+    - snapshots: 지역(cortarNo) + 조회 조건별 수집 기록 (동 이름, 증분 재수집용 단지별 스냅샷 포함)
+    - article_prices: 수집 기록마다의 매물 가격 (가격 변동 이력)과 그 시점 매물 내용의 해시
+    - article_payloads: 해시별 매물 내용 (바뀌지 않은 매물은 여러 수집 기록이 같은 행을 공유)
+    지역을 다시 불러올 때는 수집 대신 수집 기록 당시의 매물 내용을 인덱스로 조회합니다.
+    """
+
+    def __init__(self, path=ARTICLE_STORE_PATH):
+        self.path = path
+        self._schema_ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """연결을 열고 (처음 한 번) 스키마를 준비합니다. WAL 모드라 다른 프로세스가 쓰는 중에도 읽을 수 있습니다."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        with self._lock:
+            if not self._schema_ready:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+                price_columns = {row[1] for row in connection.execute("PRAGMA table_info(article_prices)")}
+                if 'payload_hash' not in price_columns: # 매물 내용 해시가 없던 이전 저장소
+                    connection.execute("ALTER TABLE article_prices ADD COLUMN payload_hash TEXT")
+                self._schema_ready = True
+        return connection
+
+    def save_snapshot(self, cortar_no, params_key, df, dong_name, complex_snapshots=None, crawled_at=None):
+        """
+        수집 결과 DataFrame을 수집 기록 하나로 저장합니다. 매물은 articleNo로 upsert되고 가격 이력이 추가됩니다.
+        반환값: snapshot_id (실패 시 None)
+        """
+        crawled_at = crawled_at or time.time()
+        rows = []
+        for record in df.to_dict('records'):
+            article_no = record.get('articleNo')
+            if article_no is None or article_no != article_no: # 번호 없는 매물은 저장하지 않음
+                continue
+            article = {key: _none_if_missing(value) for key, value in record.items()}
+            data = json.dumps(article, ensure_ascii=False, default=str)
+            rows.append((
+                str(article_no), str(cortar_no), _none_if_missing(record.get('markerId')),
+                article.get('tradeTypeName'), article.get('dealOrWarrantPrc'), crawled_at, crawled_at,
+                data, hashlib.sha1(data.encode('utf-8')).hexdigest()
+            ))
+        try:
+            connection = self._connect()
+            try:
+                with connection: # 하나의 트랜잭션
+                    cursor = connection.execute(
+                        "INSERT INTO snapshots (cortar_no, params_key, dong_name, crawled_at, article_count, complex_snapshots) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (str(cortar_no), params_key, dong_name, crawled_at, len(rows),
+                         json.dumps(complex_snapshots, ensure_ascii=False) if complex_snapshots else None)
+                    )
+                    snapshot_id = cursor.lastrowid
+                    connection.executemany(_UPSERT_ARTICLE_SQL, [row[:8] for row in rows])
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO article_payloads (payload_hash, data) VALUES (?, ?)",
+                        [(row[8], row[7]) for row in rows]
+                    )
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO article_prices (article_no, snapshot_id, price, payload_hash) VALUES (?, ?, ?, ?)",
+                        [(row[0], snapshot_id, row[4], row[8]) for row in rows]
+                    )
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"경고: 매물 저장소 저장 실패 ({self.path}): {e}", file=sys.stderr)
+            return None
+        print(f"[ArticleStore] 저장: {cortar_no} snapshot={snapshot_id}, 매물 {len(rows)}건", file=sys.stderr)
+        return snapshot_id
+
+    def latest_snapshot(self, cortar_no, params_key, max_age=None):
+        """
+        지역 + 조회 조건의 마지막 수집 기록을
+        {'snapshot_id', 'dong_name', 'crawled_at', 'age_seconds', 'article_count', 'complex_snapshots'}로 반환합니다.
+        없거나 max_age(초)보다 오래되었으면 None. 매물은 읽지 않으므로 가볍습니다.
+        """
+        try:
+            connection = self._connect()
+            try:
+                row = connection.execute(
+                    "SELECT snapshot_id, dong_name, crawled_at, article_count, complex_snapshots FROM snapshots "
+                    "WHERE cortar_no = ? AND params_key = ? ORDER BY crawled_at DESC LIMIT 1",
+                    (str(cortar_no), params_key)
+                ).fetchone()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"경고: 매물 저장소 조회 실패 ({self.path}): {e}", file=sys.stderr)
+            return None
+        if row is None:
+            return None
+        age_seconds = time.time() - row[2]
+        if max_age is not None and age_seconds > max_age:
+            return None
+        return {
+            'snapshot_id': row[0], 'dong_name': row[1], 'crawled_at': row[2], 'age_seconds': age_seconds,
+            'article_count': row[3], 'complex_snapshots': json.loads(row[4]) if row[4] else None,
+        }
+
+    def load_snapshot(self, snapshot_id):
+        """
+        수집 기록에 포함된 매물을 수집 당시의 내용과 순서로 DataFrame으로 읽습니다. 실패 시 None.
+        매물 내용 해시 없이 저장된 이전 기록은 articles의 최신 내용으로 대신합니다.
+        """
+        try:
+            connection = self._connect()
+            try:
+                rows = connection.execute(
+                    "SELECT COALESCE(v.data, a.data) FROM article_prices p "
+                    "LEFT JOIN article_payloads v ON v.payload_hash = p.payload_hash "
+                    "LEFT JOIN articles a ON a.article_no = p.article_no "
+                    "WHERE p.snapshot_id = ? ORDER BY p.rowid", (snapshot_id,)
+                ).fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"경고: 매물 저장소 조회 실패 ({self.path}): {e}", file=sys.stderr)
+            return None
+        return pd.DataFrame([json.loads(row[0]) for row in rows if row[0] is not None])
+
+    def get_price_history(self, article_no):
+        """매물의 수집 기록별 가격 이력을 DataFrame(crawled_at, price)으로 반환합니다."""
+        try:
+            connection = self._connect()
+            try:
+                rows = connection.execute(
+                    "SELECT s.crawled_at, p.price FROM article_prices p JOIN snapshots s ON s.snapshot_id = p.snapshot_id "
+                    "WHERE p.article_no = ? ORDER BY s.crawled_at", (str(article_no),)
+                ).fetchall()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"경고: 매물 저장소 조회 실패 ({self.path}): {e}", file=sys.stderr)
+            return pd.DataFrame(columns=['crawled_at', 'price'])
+        return pd.DataFrame(rows, columns=['crawled_at', 'price'])
+
+
+_article_store = ArticleStore()
+
+
+def get_article_store():
+    """프로세스 전체에서 공유하는 ArticleStore를 반환합니다."""
+    return _article_store
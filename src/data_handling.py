@@ -1,15 +1,32 @@
 # src/data_handling.py
 import streamlit as st
 import json
-import subprocess
 import os
 import sys # sys 모듈 임포트 추가
+import threading
 # 최종 데이터를 DataFrame으로 반환하기 위해 필요
 import pandas as pd
 
-# 외부 스크립트가 있는 디렉토리 경로 (data_handling.py 기준 상대 경로)
-EXTERNAL_SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "external_scripts")
+# 수집 단계 함수들 (CLI 스크립트와 동일한 로직을 같은 프로세스에서 직접 호출)
+from .external_scripts.fetch_cortars import fetch_cortars
+from .external_scripts.fetch_marker_ids import collect_all_marker_info, API_KEY_ERROR_SIGNAL
+from .external_scripts.collect_complex_details import collect_complex_details
+from .external_scripts.cortar_index import get_cortar_index
+from .external_scripts.crawl_filters import normalize_crawl_filters
+from .external_scripts.article_table import districts_to_table, table_to_frame, frame_to_articles
+from .external_scripts.naver_http import get_connection_stats, log_connection_stats, is_cancelled, emit_progress
+from .workspace import create_workspace, save_stage_output, save_stage_table, cleanup_stale_workspaces
+from .region_cache import get_region_cache, make_region_cache_key, REGION_DISK_CACHE_TTL_SECONDS, REGION_CACHE_MAX_STALE_SECONDS
+from .article_store import get_article_store
+from .fetch_jobs import get_fetch_job_runner, JOB_DONE
+
 OUTPUT_DIR = "output" # 출력 디렉토리 정의 (fetch_data 등에서 일관되게 사용)
+CRAWL_MAX_WORKERS = 4 # 매물 상세 수집 시 동시에 수집할 단지 수
+INCREMENTAL_REFRESH = True # 이전 수집 결과가 있으면 마커 카운트/첫 페이지가 바뀐 단지만 재수집
+
+# 백그라운드 재수집 (stale-while-revalidate): 같은 캐시 키는 한 번만 재수집
+_refresh_lock = threading.Lock()
+_refresh_jobs = {} # {cache_key: 재수집 작업 ID (fetch_jobs)}
 
 
 def save_coordinates(coords, output_dir):
@@ -35,202 +52,331 @@ def create_params(lat, lon):
     """
     return {'zoom': '15', 'centerLat': str(lat), 'centerLon': str(lon)}
 
-def get_dong_name_from_file(output_dir):
+def get_dong_name(cortars_info):
     """
-    지정된 출력 디렉토리의 cortars_info.json 파일에서 동 이름을 읽어옵니다.
-    오류 발생 시 Streamlit UI에 직접 에러를 표시하지 않고, 콘솔에만 로그를 남깁니다.
+    cortars 정보 딕셔너리에서 '구 동' 형태의 동 이름을 만듭니다.
+    정보가 부족하면 콘솔에 로그를 남기고 "Unknown"을 반환합니다.
     """
-    filepath = os.path.join(output_dir, 'cortars_info.json')
-    try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            cortars_info = json.load(file)
-            division = cortars_info.get('divisionName', '')
-            cortar = cortars_info.get('cortarName', '')
-            if division and cortar:
-                return f"{division} {cortar}".strip()
-            else:
-                print(f"경고: {filepath} 파일에서 divisionName 또는 cortarName을 찾을 수 없습니다.", file=sys.stderr)
-                return "Unknown"
-    except FileNotFoundError:
-        print(f"경고: {filepath} 파일을 찾을 수 없습니다.", file=sys.stderr)
-        return "Unknown"
-    except json.JSONDecodeError:
-        print(f"오류: {filepath} 파일 파싱 오류.", file=sys.stderr)
+    if not isinstance(cortars_info, dict):
         return "Unknown"
+    division = cortars_info.get('divisionName', '')
+    cortar = cortars_info.get('cortarName', '')
+    if division and cortar:
+        return f"{division} {cortar}".strip()
+    print("경고: cortars 정보에서 divisionName 또는 cortarName을 찾을 수 없습니다.", file=sys.stderr)
+    return "Unknown"
+
+def get_credentials_from_session():
+    """
+    수집 단계에 필요한 사용자 설정값(Header, Cookie, 네이버 API 키)을 세션에서 읽어 딕셔너리로 반환합니다.
+    """
+    return {
+        'headers': st.session_state.get('user_headers') or {},
+        'cookies': st.session_state.get('user_cookies') or {},
+        'client_id': st.session_state.get('naver_client_id'),
+        'client_secret': st.session_state.get('naver_client_secret'),
+    }
+
+def resolve_region(latitude, longitude, credentials):
+    """
+    클릭 좌표가 속한 cortar(동) 정보를 찾습니다.
+    이미 방문한 동 안의 클릭이면 공간 인덱스에서 바로 찾고, 아니면 fetch_cortars API를 호출한 뒤 인덱스에 추가합니다.
+    실패 시 None을 반환합니다.
+    """
+    cortar_index = get_cortar_index()
+    cortars_info = cortar_index.lookup(latitude, longitude)
+    if cortars_info:
+        print(f"--- cortar 인덱스 적중: {cortars_info.get('cortarNo')} (fetch_cortars 단계 생략) ---", file=sys.stderr)
+        return cortars_info
+
+    print("\n--- fetch_cortars 단계 시작 ---", file=sys.stderr)
+    try:
+        cortars_info = fetch_cortars(create_params(latitude, longitude), credentials['headers'], credentials['cookies'])
     except Exception as e:
-        print(f"오류: 동 이름 가져오기 오류 ({filepath}): {e}", file=sys.stderr)
-        return "Unknown"
+        print(f"오류: fetch_cortars 단계 중 예상치 못한 오류: {e}", file=sys.stderr)
+        return None
+    if not cortars_info:
+        print("오류: fetch_cortars 단계 실패.", file=sys.stderr)
+        return None
+    cortar_index.add(cortars_info) # 다음 클릭부터는 로컬에서 해석
+    return cortars_info
 
-def run_external_script(script_name, *args, 
-                        headers_to_pass=None, cookies_to_pass=None, 
-                        client_id_to_pass=None, client_secret_to_pass=None):
+def _previous_complex_snapshots(previous_crawl):
     """
-    외부 파이썬 스크립트를 실행하고 결과를 확인합니다.
-    API 키 오류 발생 시 특별한 문자열 "API_KEY_ERROR_FROM_SCRIPT_EXIT_CODE_99"을 반환합니다.
-    일반 실패 시 False, 성공 시 True를 반환합니다.
+    이전 수집 결과 (DataFrame, {markerId: {'counts', 'fingerprint'}})를
+    collect_complex_details의 previous_snapshots 형식 {markerId: {'counts', 'fingerprint', 'articles'}}으로 바꿉니다.
     """
-    script_path = os.path.join(EXTERNAL_SCRIPTS_DIR, script_name)
-    python_executable = sys.executable # 현재 Streamlit 앱을 실행하는 Python 인터프리터
-    command = [python_executable, script_path] + list(args)
+    if not previous_crawl:
+        return None
+    previous_df, complex_snapshots = previous_crawl
+    articles_by_complex = {}
+    if 'markerId' in previous_df.columns:
+        for article in frame_to_articles(previous_df): # 결측값/정수 필드를 스키마 타입으로 되돌린 Article
+            articles_by_complex.setdefault(str(article.markerId), []).append(article)
+    return {complex_no: {**snapshot, 'articles': articles_by_complex.get(str(complex_no), [])}
+            for complex_no, snapshot in complex_snapshots.items()}
 
-    print(f"Executing command: {' '.join(command)}", file=sys.stderr)
+def crawl_region(cortars_info, credentials, workspace_dir=None, crawl_params=None, cancel_event=None, progress_callback=None,
+                 previous_crawl=None):
+    """
+    cortar 정보를 기반으로 마커 수집 -> 매물 상세 수집 단계를 같은 프로세스에서 순차 실행합니다.
+    각 단계의 결과는 파일을 거치지 않고 Python 객체로 다음 단계에 전달되며, workspace_dir이 있으면 그곳에 기록됩니다.
+    cancel_event가 설정되면 각 단계가 다음 HTTP 요청 전에 멈추고, 부분 결과 대신 "CANCELLED" 신호를 반환합니다.
+    요청 제한/서버 오류로 일부 단지를 끝까지 수집하지 못했으면 수집된 데이터와 함께 "PARTIAL" 신호를 반환합니다 (캐시하지 않음).
+    progress_callback(event_type, **fields)이 있으면 단계 전환('stage')과 각 단계의 진행 이벤트를 받습니다.
+    crawl_params(조회 조건: 거래유형/가격/면적/최소 세대수)는 두 단계의 API 요청 파라미터로 적용됩니다.
+    previous_crawl(이전 수집의 (DataFrame, 단지별 스냅샷))이 있으면 마커 카운트와 첫 페이지가 바뀐 단지만 다시 수집하고,
+    나머지 단지는 이전 매물을 그대로 합칩니다 (증분 재수집).
+    반환값: (DataFrame, str_dong_name, str_error_signal or None, 단지별 스냅샷 or None)
+    """
+    crawl_params = normalize_crawl_filters(crawl_params)
+    dong_name = get_dong_name(cortars_info)
+    save_stage_output(workspace_dir, 'cortars_info.json', cortars_info)
+    # 모든 단계는 naver_http의 공유 세션(keep-alive 연결 풀)을 사용하며, 조회별 연결 재사용 현황을 로그로 남깁니다.
+    connection_stats_before = get_connection_stats()
+
+    # 1. 마커 정보 수집
+    print("\n--- fetch_marker_ids 단계 시작 ---", file=sys.stderr)
+    emit_progress(progress_callback, 'stage', stage='markers')
+    if not credentials.get('client_id') or not credentials.get('client_secret'):
+        print("오류: 네이버 API 키가 설정되지 않아 마커 정보를 수집할 수 없습니다.", file=sys.stderr)
+        return pd.DataFrame(), dong_name, None, None
     try:
-        # 외부 스크립트의 작업 디렉토리를 프로젝트 루트로 설정
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # src 폴더의 부모
-        
-        # 환경 변수 설정
-        env = os.environ.copy()
-        if headers_to_pass and isinstance(headers_to_pass, dict):
-            env['NAVER_API_ALL_HEADERS_JSON'] = json.dumps(headers_to_pass)
-        if cookies_to_pass and isinstance(cookies_to_pass, dict):
-            env['NAVER_API_COOKIES_JSON'] = json.dumps(cookies_to_pass)
-        if client_id_to_pass:
-            env['NAVER_CLIENT_ID'] = client_id_to_pass
-        if client_secret_to_pass:
-            env['NAVER_CLIENT_SECRET'] = client_secret_to_pass
-        
-        result = subprocess.run(
-            command,
-            check=False,        # False로 설정하여 반환 코드를 직접 확인
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            cwd=project_root,   # 작업 디렉토리 설정
-            env=env             # 수정된 환경 변수 전달
+        all_marker_info = collect_all_marker_info(
+            [cortars_info], credentials['headers'], credentials['cookies'],
+            credentials['client_id'], credentials['client_secret'],
+            cancel_event=cancel_event, progress_callback=progress_callback, crawl_filters=crawl_params
         )
-        
-        # 종료 코드 확인
-        if result.returncode == 99: # API 키 에러 특정 종료 코드 (fetch_marker_ids.py에서 설정)
-            print(f"Script {script_name} indicated API Key (401) error via exit code 99.", file=sys.stderr)
-            if result.stderr: # 에러 스트림이 있다면 출력 (디버깅용)
-                print(f"STDERR from API Key errored script ({script_name}):\n{result.stderr[:1000]}...", file=sys.stderr)
-            return "API_KEY_ERROR_FROM_SCRIPT_EXIT_CODE_99" # 특별한 문자열 반환
-
-        elif result.returncode != 0: # 99가 아닌 다른 오류 종료 코드
-            print(f"Script {script_name} failed with exit code {result.returncode}.", file=sys.stderr)
-            if result.stdout: print(f"STDOUT ({script_name}):\n{result.stdout[:1000]}...", file=sys.stderr)
-            if result.stderr: print(f"STDERR ({script_name}):\n{result.stderr[:1000]}...", file=sys.stderr)
-            return False # 일반적인 실패
-
-        # 성공 시 (returncode == 0)
-        print(f"Script {script_name} executed successfully.", file=sys.stderr)
-        if result.stdout: print(f"STDOUT ({script_name}):\n{result.stdout[:500]}...", file=sys.stderr)
-        if result.stderr: print(f"STDERR (Info/Warnings from {script_name}):\n{result.stderr[:500]}...", file=sys.stderr)
-        return True
-
-    except FileNotFoundError:
-        print(f"FileNotFoundError: Command '{' '.join(command)}' failed. Check script path and python executable.", file=sys.stderr)
-        return False # 일반적인 실패
-    except Exception as e: # subprocess.run 자체에서 발생할 수 있는 다른 예외들 (권한 문제 등)
-        print(f"Unexpected error running {script_name}: {e}", file=sys.stderr)
-        return False # 일반적인 실패
-
-def fetch_data(coords_tuple, output_dir):
-    """
-    좌표 튜플을 기반으로 외부 스크립트를 순차적으로 실행하여 부동산 데이터를 가져옵니다.
-    반환값: (DataFrame, str_dong_name, str_error_signal or None)
-    - DataFrame: 성공 시 로드된 데이터, 실패 시 빈 DataFrame
-    - str_dong_name: 확인된 동 이름, 실패 시 "Unknown" 또는 유사 값
-    - str_error_signal: API 키 오류 시 "API_KEY_ERROR_SIGNAL", 그 외 성공/일반실패 시 None
+    except Exception as e:
+        print(f"오류: fetch_marker_ids 단계 중 예상치 못한 오류: {e}", file=sys.stderr)
+        return pd.DataFrame(), dong_name, None, None
+
+    if is_cancelled(cancel_event):
+        print("crawl_region: 취소됨 (fetch_marker_ids 단계).", file=sys.stderr)
+        return pd.DataFrame(), dong_name, "CANCELLED", None
+    # API 키 오류 시그널 확인
+    if all_marker_info == API_KEY_ERROR_SIGNAL:
+        print("crawl_region: API Key error detected from fetch_marker_ids stage.", file=sys.stderr)
+        # API 키 에러 발생 시, (빈 DataFrame, 현재까지의 동 이름, "API_KEY_ERROR_SIGNAL") 반환
+        return pd.DataFrame(), dong_name, "API_KEY_ERROR_SIGNAL", None
+    elif not all_marker_info:
+        print("오류: fetch_marker_ids 단계 실패 (일반 오류).", file=sys.stderr)
+        return pd.DataFrame(), dong_name, None, None # 일반 실패 시 에러 신호는 None
+    save_stage_output(workspace_dir, 'all_marker_info.json', all_marker_info)
+    print("--- fetch_marker_ids 단계 완료 ---", file=sys.stderr)
+
+    # 2. 매물 상세 정보 수집
+    print("\n--- collect_complex_details 단계 시작 ---", file=sys.stderr)
+    emit_progress(progress_callback, 'stage', stage='details')
+    try:
+        raw_data, _, incomplete_complexes, complex_snapshots = collect_complex_details(
+            all_marker_info, credentials['headers'], credentials['cookies'],
+            max_workers=CRAWL_MAX_WORKERS, cancel_event=cancel_event, progress_callback=progress_callback,
+            crawl_filters=crawl_params, previous_snapshots=_previous_complex_snapshots(previous_crawl)
+        )
+    except Exception as e:
+        print(f"오류: collect_complex_details 단계 중 예상치 못한 오류: {e}", file=sys.stderr)
+        return pd.DataFrame(), dong_name, None, None
+    if is_cancelled(cancel_event):
+        print("crawl_region: 취소됨 (collect_complex_details 단계). 부분 결과는 버립니다.", file=sys.stderr)
+        return pd.DataFrame(), dong_name, "CANCELLED", None
+    # 매물은 고정 스키마의 Arrow 테이블로 한 번만 변환하여 작업 공간 기록(Parquet)과 DataFrame 생성에 함께 사용
+    details_table = districts_to_table(raw_data)
+    save_stage_table(workspace_dir, 'complex_details_by_district.parquet', details_table)
+    log_connection_stats(f"crawl_region {cortars_info.get('cortarNo')}", since=connection_stats_before)
+    print("--- collect_complex_details 단계 완료 ---", file=sys.stderr)
+
+    # 3. 최종 데이터 변환: 동 이름으로 데이터 추출 (없으면 첫 번째 키 사용)
+    emit_progress(progress_callback, 'stage', stage='building')
+    area_key_to_load = dong_name if dong_name != "Unknown" and dong_name in raw_data else None
+    if not area_key_to_load and raw_data:
+        area_key_to_load = next(iter(raw_data), None)
+
+    result_signal = "PARTIAL" if incomplete_complexes else None
+    if area_key_to_load and raw_data.get(area_key_to_load):
+        loaded_df = table_to_frame(details_table, area_key_to_load)
+        print("데이터 수집 및 DataFrame 변환 성공.", file=sys.stderr)
+        return loaded_df, dong_name, result_signal, complex_snapshots # 성공 시 에러 신호는 None (일부 단지 실패 시 "PARTIAL")
+
+    print(f"경고: 수집된 데이터가 비었거나 '{dong_name}' 지역 키가 없습니다.", file=sys.stderr)
+    return pd.DataFrame(), dong_name, result_signal, complex_snapshots # 데이터 없어도 일반적인 흐름, 에러 신호 None
+
+def _crawl_and_cache(coords_tuple, cortars_info, credentials, output_dir, crawl_params, cache_key,
+                     cancel_event=None, progress_callback=None):
     """
+    요청별 작업 공간을 만들어 지역을 수집하고, 정상 수집된 결과를 단지별 스냅샷과 함께 지역 캐시와 매물 저장소에 저장합니다.
+    INCREMENTAL_REFRESH이면 캐시(없으면 매물 저장소)에 남아 있는 이전 결과를 기준으로 바뀐 단지만 재수집합니다.
+    세션 상태를 읽지 않으므로 백그라운드 스레드에서도 호출할 수 있습니다.
+    반환값: (DataFrame, dong_name, error_signal)
+    """
+    cleanup_stale_workspaces(output_dir) # 오래된 작업 공간 정리
+    try:
+        workspace_dir = create_workspace(output_dir)
+    except Exception as e:
+        # 작업 공간은 추적용이므로, 생성 실패 시 파일 기록 없이 계속 진행
+        print(f"경고: 작업 공간 생성 실패 ({output_dir}): {e}. 단계 결과를 기록하지 않습니다.", file=sys.stderr)
+        workspace_dir = None
+    save_stage_output(workspace_dir, 'params.json', {'coords': create_params(*coords_tuple), 'crawl_params': crawl_params or {}})
+
+    region_cache = get_region_cache()
+    article_store = get_article_store()
+    previous_crawl = None
+    if INCREMENTAL_REFRESH:
+        previous_crawl = region_cache.get_previous_crawl(cache_key)
+        stored_snapshot = None if previous_crawl else article_store.latest_snapshot(*cache_key, max_age=REGION_CACHE_MAX_STALE_SECONDS)
+        if stored_snapshot and stored_snapshot['complex_snapshots']:
+            stored_df = article_store.load_snapshot(stored_snapshot['snapshot_id'])
+            if stored_df is not None:
+                previous_crawl = (stored_df, stored_snapshot['complex_snapshots'])
+    df, dong_name, error_signal, complex_snapshots = crawl_region(
+        cortars_info, credentials, workspace_dir, crawl_params, cancel_event, progress_callback, previous_crawl
+    )
+    if error_signal is None and not df.empty: # 정상 수집된 결과만 캐시 (실패/빈 결과는 다음 클릭에 재시도)
+        region_cache.put(cache_key, df, dong_name, complex_snapshots)
+        article_store.save_snapshot(*cache_key, df, dong_name, complex_snapshots) # 매물 이력 (articleNo 기준 upsert)
+    return df, dong_name, error_signal
+
+def start_background_refresh(coords_tuple, cortars_info, credentials, output_dir, crawl_params, cache_key):
+    """
+    지역 재수집을 백그라운드 작업(fetch_jobs)으로 시작하고 작업 ID를 반환합니다.
+    같은 키가 이미 재수집 중이면 그 작업 ID를 그대로 반환합니다.
+    credentials는 호출 측에서 미리 읽어 전달해야 합니다 (백그라운드 스레드는 세션 상태에 접근할 수 없음).
+    """
+    job_runner = get_fetch_job_runner()
+    with _refresh_lock:
+        job = job_runner.get(_refresh_jobs.get(cache_key))
+        if job is not None and not job.is_finished:
+            return job.job_id
+        job_id = job_runner.submit(
+            _crawl_and_cache, coords_tuple, cortars_info, credentials, output_dir, crawl_params, cache_key,
+            description=f"refresh {cache_key[0]}"
+        )
+        _refresh_jobs[cache_key] = job_id
+        return job_id
+
+def get_refresh_status(cache_key):
+    """
+    백그라운드 재수집 상태를 반환합니다.
+    반환값: None (재수집 기록 없음), "running", 또는 완료 시 ("done", error_signal)
+    같은 스냅샷을 보고 있는 여러 세션이 모두 결과를 확인할 수 있도록, 완료된 기록은 조회해도 지우지 않고
+    fetch_jobs의 보관 시간(FETCH_JOB_RETENTION_SECONDS)이 지나 작업 기록이 사라질 때 함께 정리합니다.
+    """
+    with _refresh_lock:
+        job = get_fetch_job_runner().get(_refresh_jobs.get(cache_key))
+        if job is None:
+            _refresh_jobs.pop(cache_key, None) # 보관 시간이 지나 작업 기록이 삭제됨
+            return None
+        if not job.is_finished:
+            return "running"
+    error_signal = job.result[2] if job.status == JOB_DONE and job.result else "ERROR"
+    return "done", error_signal
+
+def _fetch_region_data(coords_tuple, output_dir, crawl_params, credentials, serve_stale,
+                       cancel_event=None, progress_callback=None):
+    """fetch_data / fetch_data_or_stale 공통 흐름. 반환값: (DataFrame, dong_name, error_signal, stale_info)"""
     print(f"--- fetch_data 실행 시작 for coords: {coords_tuple} ---", file=sys.stderr)
 
-    # --- 1. 입력 유효성 검사 및 파라미터 준비 ---
+    # --- 1. 입력 유효성 검사 및 설정값 준비 ---
     if not isinstance(coords_tuple, tuple) or len(coords_tuple) != 2:
         print("오류: fetch_data: 유효하지 않은 좌표 튜플입니다.", file=sys.stderr)
-        return pd.DataFrame(), "Invalid_Coords", None # (df, dong_name, error_signal)
+        return pd.DataFrame(), "Invalid_Coords", None, None # (df, dong_name, error_signal, stale_info)
 
     latitude, longitude = coords_tuple
-    
-    # save_coordinates는 현재 직접적인 데이터 흐름에 영향을 주지 않으므로, 필요시 호출
-    # save_coordinates({'lat': latitude, 'lng': longitude}, output_dir) 
+    if credentials is None:
+        credentials = get_credentials_from_session()
+    crawl_params = normalize_crawl_filters(crawl_params) # 기본값을 채워, 같은 조건이면 항상 같은 캐시 키 사용
 
-    params = create_params(latitude, longitude)
-    params_file_rel_path = os.path.join(output_dir, 'params.json')
-    params_file_abs_path = os.path.abspath(params_file_rel_path)
-    try:
-        os.makedirs(output_dir, exist_ok=True) # 출력 디렉토리 생성
-        with open(params_file_abs_path, 'w', encoding='utf-8') as f:
-            json.dump(params, f, ensure_ascii=False, indent=4)
-        print(f"파라미터 저장 완료: {params_file_abs_path}", file=sys.stderr)
-    except Exception as e:
-        print(f"오류: 파라미터 저장 중 오류: {e}", file=sys.stderr)
-        return pd.DataFrame(), "Params_Save_Error", None
-
-    # --- 2. 세션에서 설정값 가져오기 ---
-    user_headers = st.session_state.get('user_headers', {})
-    user_cookies = st.session_state.get('user_cookies', {})
-    naver_client_id = st.session_state.get('naver_client_id')
-    naver_client_secret = st.session_state.get('naver_client_secret')
-
-    common_run_params = {
-        "headers_to_pass": user_headers,
-        "cookies_to_pass": user_cookies,
-        "client_id_to_pass": naver_client_id,
-        "client_secret_to_pass": naver_client_secret
-    }
+    # --- 2. 클릭 좌표 -> 지역(cortar) 해석 ---
+    emit_progress(progress_callback, 'stage', stage='region')
+    cortars_info = resolve_region(latitude, longitude, credentials)
+    if not cortars_info:
+        return pd.DataFrame(), "Unknown", "ERROR", None
 
-    # --- 3. 외부 스크립트 순차 실행 ---
-    # 3.1. fetch_cortars.py 실행
-    print("\n--- fetch_cortars.py 실행 시작 ---", file=sys.stderr)
-    script_cortars_result = run_external_script('fetch_cortars.py', params_file_rel_path, **common_run_params)
-    # fetch_cortars.py는 API 키 오류를 직접 감지하지 않는다고 가정 (일반 성공/실패만 반환)
-    if not script_cortars_result: # True가 아닌 경우 (False 또는 다른 문자열 - 여기서는 False만 일반 실패로 간주)
-        print("오류: fetch_cortars.py 실행 실패.", file=sys.stderr)
-        #dong_name_on_cortars_fail = get_dong_name_from_file(output_dir) # 실패해도 동 이름은 시도
-        return pd.DataFrame(), "Unknown", "ERROR"
-    print("--- fetch_cortars.py 실행 완료 ---", file=sys.stderr)
-    dong_name = get_dong_name_from_file(output_dir) # 성공 후 동 이름 가져오기
-    print(f"동 이름 가져오기(파일): {dong_name}", file=sys.stderr)
-
-    # 3.2. fetch_marker_ids.py 실행
-    print("\n--- fetch_marker_ids.py 실행 시작 ---", file=sys.stderr)
-    script_marker_result = run_external_script('fetch_marker_ids.py', **common_run_params)
-    
-    # API 키 오류 시그널 확인
-    if script_marker_result == "API_KEY_ERROR_FROM_SCRIPT_EXIT_CODE_99":
-        print("fetch_data: API Key error (exit code 99) detected from fetch_marker_ids.py.", file=sys.stderr)
-        # API 키 에러 발생 시, (빈 DataFrame, 현재까지의 동 이름, "API_KEY_ERROR_SIGNAL") 반환
-        return pd.DataFrame(), dong_name, "API_KEY_ERROR_SIGNAL" 
-    elif not script_marker_result: # True가 아닌 일반적인 실패 (False)
-        print("오류: fetch_marker_ids.py 실행 실패 (일반 오류).", file=sys.stderr)
-        return pd.DataFrame(), dong_name, None # 일반 실패 시 에러 신호는 None
-    print("--- fetch_marker_ids.py 실행 완료 ---", file=sys.stderr)
-
-    # 3.3. collect_complex_details.py 실행
-    print("\n--- collect_complex_details.py 실행 시작 ---", file=sys.stderr)
-    # 이 스크립트도 API 키 오류를 직접 감지하지 않는다고 가정
-    if not run_external_script('collect_complex_details.py', **common_run_params):
-        print("오류: collect_complex_details.py 실행 실패.", file=sys.stderr)
-        return pd.DataFrame(), dong_name, None
-    print("--- collect_complex_details.py 실행 완료 ---", file=sys.stderr)
-
-    # --- 4. 최종 데이터 로드 ---
-    final_data_file_rel_path = os.path.join(output_dir, 'complex_details_by_district.json')
-    final_data_file_abs_path = os.path.abspath(final_data_file_rel_path)
-    print(f"\n최종 데이터 로드 시도: {final_data_file_abs_path}", file=sys.stderr)
-    try:
-        with open(final_data_file_abs_path, 'r', encoding='utf-8') as file:
-            raw_data = json.load(file)
-        
-        # 동 이름으로 데이터 추출 (기존 로직과 유사)
-        area_key_to_load = dong_name if dong_name != "Unknown" and dong_name in raw_data else None
-        if not area_key_to_load and raw_data: # 첫 번째 키를 사용하거나, 더 나은 로직 필요
-            area_key_to_load = list(raw_data.keys())[0] if raw_data.keys() else None
-
-        if area_key_to_load and raw_data.get(area_key_to_load):
-            loaded_df = pd.DataFrame(raw_data[area_key_to_load])
-            print("데이터 로딩 및 DataFrame 변환 성공.", file=sys.stderr)
-            return loaded_df, dong_name, None # 성공 시 에러 신호는 None
-        else:
-            print(f"경고: 로드된 JSON 데이터가 비었거나 '{dong_name}' 또는 '{area_key_to_load}' 지역 키가 없습니다.", file=sys.stderr)
-            return pd.DataFrame(), dong_name, None # 데이터 없어도 일반적인 흐름, 에러 신호 None
-    except FileNotFoundError:
-        print(f"오류: 최종 데이터 파일({final_data_file_abs_path}) 없음.", file=sys.stderr)
-    except json.JSONDecodeError:
-        print(f"오류: 최종 데이터 파일({final_data_file_abs_path}) JSON 파싱 오류.", file=sys.stderr)
-    except Exception as e:
-        print(f"오류: 최종 데이터 로드 중 예상치 못한 오류: {e}", file=sys.stderr)
+    # --- 3. 지역 단위 캐시 확인 ---
+    region_cache = get_region_cache()
+    cache_key = make_region_cache_key(cortars_info.get('cortarNo'), crawl_params)
+    cached_result = region_cache.get(cache_key)
+    if cached_result is not None:
+        region_cache.log_stats(f"hit {cache_key[0]}")
+        cached_df, cached_dong_name = cached_result
+        return cached_df, cached_dong_name, None, None
+    region_cache.log_stats(f"miss {cache_key[0]}")
+
+    # --- 3-1. 캐시에 없으면 매물 저장소(SQLite)의 마지막 수집 기록을 인덱스로 조회 ---
+    article_store = get_article_store()
+    stored_snapshot = article_store.latest_snapshot(*cache_key, max_age=REGION_CACHE_MAX_STALE_SECONDS)
+    if stored_snapshot is not None and stored_snapshot['age_seconds'] <= REGION_DISK_CACHE_TTL_SECONDS:
+        stored_df = article_store.load_snapshot(stored_snapshot['snapshot_id'])
+        if stored_df is not None and not stored_df.empty:
+            print(f"--- 매물 저장소에서 로드 ({cache_key[0]}, {len(stored_df)}건) ---", file=sys.stderr)
+            region_cache.put(cache_key, stored_df, stored_snapshot['dong_name'], stored_snapshot['complex_snapshots'],
+                             created_at=stored_snapshot['crawled_at'])
+            return stored_df, stored_snapshot['dong_name'], None, None
+
+    # --- 3-2. (stale-while-revalidate) 만료된 스냅샷이 있으면 즉시 반환하고 백그라운드에서 재수집 ---
+    if serve_stale:
+        stale_result = region_cache.get_stale(cache_key)
+        if stale_result is None and stored_snapshot is not None:
+            stored_df = article_store.load_snapshot(stored_snapshot['snapshot_id'])
+            if stored_df is not None and not stored_df.empty:
+                stale_result = (stored_df, stored_snapshot['dong_name'], stored_snapshot['age_seconds'])
+        if stale_result is not None:
+            stale_df, stale_dong_name, age_seconds = stale_result
+            print(f"--- 만료된 스냅샷 반환 ({cache_key[0]}, {age_seconds:.0f}초 전) ---", file=sys.stderr)
+            start_background_refresh(coords_tuple, cortars_info, credentials, output_dir, crawl_params, cache_key)
+            return stale_df, stale_dong_name, None, {'cache_key': cache_key, 'age_seconds': age_seconds}
+
+    # --- 4. 수집 단계 실행 (요청별 작업 공간 사용) ---
+    if is_cancelled(cancel_event):
+        return pd.DataFrame(), get_dong_name(cortars_info), "CANCELLED", None
+    df, dong_name, error_signal = _crawl_and_cache(
+        coords_tuple, cortars_info, credentials, output_dir, crawl_params, cache_key, cancel_event, progress_callback
+    )
+    return df, dong_name, error_signal, None
+
+def fetch_data(coords_tuple, output_dir, crawl_params=None, credentials=None, cancel_event=None, progress_callback=None):
+    """
+    좌표 튜플을 기반으로 부동산 데이터를 가져옵니다.
+    crawl_params는 조회 조건(crawl_filters.DEFAULT_CRAWL_FILTERS 형식, 생략 시 기본값)이며 API 요청과 캐시 키에 모두 반영됩니다.
+    먼저 좌표가 속한 동(cortarNo)을 확인하고, 같은 동 + 같은 수집 파라미터의 결과가 지역 캐시에 있으면 그대로 반환합니다.
+    캐시에 없으면 output_dir 아래 요청마다 새로 만든 작업 공간을 사용해 수집 단계를 실행합니다.
+    credentials를 생략하면 세션에서 설정값을 읽습니다 (백그라운드 작업에서는 반드시 전달).
+    cancel_event(threading.Event)가 설정되면 수집을 중단하고, progress_callback이 있으면 진행 이벤트를 전달합니다.
+    반환값: (DataFrame, str_dong_name, str_error_signal or None)
+    - DataFrame: 성공 시 로드된 데이터, 실패 시 빈 DataFrame
+    - str_dong_name: 확인된 동 이름, 실패 시 "Unknown" 또는 유사 값
+    - str_error_signal: API 키 오류 시 "API_KEY_ERROR_SIGNAL", cortars 조회 실패 시 "ERROR",
+      취소 시 "CANCELLED", 일부 단지 수집 실패 시 "PARTIAL" (데이터는 반환), 그 외 성공/일반실패 시 None
+    """
+    df, dong_name, error_signal, _ = _fetch_region_data(
+        coords_tuple, output_dir, crawl_params, credentials, serve_stale=False,
+        cancel_event=cancel_event, progress_callback=progress_callback
+    )
+    return df, dong_name, error_signal
+
+def fetch_data_or_stale(coords_tuple, output_dir, crawl_params=None, credentials=None, cancel_event=None, progress_callback=None):
+    """
+    fetch_data의 stale-while-revalidate 버전입니다.
+    TTL 안의 결과가 없지만 이전 스냅샷이 남아 있으면 그 스냅샷을 즉시 반환하고, 백그라운드에서 재수집을 시작합니다.
+    반환값: (DataFrame, str_dong_name, str_error_signal or None, stale_info or None)
+    - stale_info: 스냅샷을 반환한 경우 {'cache_key': 캐시 키, 'age_seconds': 스냅샷 나이(초)}, 그 외 None
+      (get_refresh_status(cache_key)가 완료를 알리면 get_region_cache().get(cache_key)로 최신 결과를 읽습니다)
+    """
+    return _fetch_region_data(
+        coords_tuple, output_dir, crawl_params, credentials, serve_stale=True,
+        cancel_event=cancel_event, progress_callback=progress_callback
+    )
 
-    # 최종적으로 실패한 경우
-    return pd.DataFrame(), dong_name, None
\ No newline at end of file
+def submit_fetch_job(coords_tuple, output_dir, serve_stale=False, crawl_params=None, credentials=None):
+    """
+    좌표 조회를 백그라운드 작업(fetch_jobs)으로 제출하고 작업 ID를 바로 반환합니다.
+    credentials를 생략하면 제출 시점에 세션에서 읽어 작업에 전달합니다.
+    작업 결과(FetchJob.result)는 fetch_data_or_stale과 같은 (DataFrame, dong_name, error_signal, stale_info)이며,
+    진행 상황은 FetchJob.progress.snapshot()으로 확인합니다.
+    """
+    if credentials is None:
+        credentials = get_credentials_from_session()
+    return get_fetch_job_runner().submit(
+        _fetch_region_data, coords_tuple, output_dir, crawl_params, credentials, serve_stale,
+        description=f"fetch {coords_tuple}"
+    )
@@ -1,9 +1,30 @@
 # src/data_processor.py
+import sys
 import streamlit as st
 import pandas as pd
 import numpy as np
 # src 패키지 내 utils 모듈에서 필요한 함수 임포트
-from .utils import convert_price_to_number, extract_numeric_area, extract_floor
+from .utils import (convert_prices_to_numbers, extract_numeric_areas, split_floor_info, parse_floor_numbers, classify_floors,
+                    PRICE_NUMBER_COLUMN, AREA_NUMBER_COLUMN, PYEONG_NUMBER_COLUMN, FLOOR_LABEL_COLUMN, FLOOR_NUMBER_COLUMN,
+                    TOTAL_FLOORS_COLUMN, FLOOR_BAND_COLUMN, FLOOR_POSITION_COLUMN)
+
+# 같은 값이 수천 번 반복되는 문자열 열 (compact_dataframe에서 category로 변환)
+# 가격/면적/층 등 apply로 숫자를 뽑아내는 열은 결과가 category가 되므로 제외합니다.
+CATEGORY_COLUMNS = [
+    'tradeTypeCode', 'tradeTypeName', 'realEstateTypeCode', 'realEstateTypeName', 'articleStatus',
+    'verificationTypeCode', 'priceChangeState', 'direction', 'realtorName', 'cpName',
+    'divisionName', 'cortarName', 'markerId', 'articleName', 'buildingName', FLOOR_LABEL_COLUMN, FLOOR_BAND_COLUMN,
+]
+CATEGORY_MAX_UNIQUE_RATIO = 0.5 # 고유값 비율이 이 값 이하일 때만 category로 변환
+SHARED_LIST_COLUMNS = ['tagList'] # 같은 목록은 하나의 리스트 객체를 공유
+LOW_FLOOR_MAX = 3 # '저층 제외': 이 층 이하(지하 포함)와 '저' 표기 매물을 제외
+# create_summary 결과 열 (단지/평형별 거래유형 가격 통계)
+SUMMARY_TRADE_TYPES = ['매매', '전세']
+SUMMARY_COLUMNS = [
+    "구", "동", "아파트명", "연식", "총세대수", "공급면적", "평형",
+    "매매개수", "전세개수", "매매평균", "매매중간", "매매최대", "매매최소",
+    "전세평균", "전세중간", "전세최대", "전세최소", "갭(매매-전세)(평균)"
+]
 
 
 def extract_year_from_string(value):
@@ -15,159 +36,264 @@ def extract_year_from_string(value):
     except ValueError:
         return pd.NA # 변환 실패 시 NA 반환
 
-def create_summary(df_detail):
+def add_typed_columns(df):
     """
-    상세 데이터프레임(df_detail)에서 아파트 단지 및 평형별 요약 데이터를 생성합니다.
-    '구', '동' 컬럼이 df_detail에 반드시 포함되어야 합니다.
+    조회 결과(원본 필드명)에 정렬/필터/요약용 숫자 열(utils.TYPED_COLUMNS)을 한 번에 추가합니다.
+    가격(dealOrWarrantPrc) -> 원, 공급면적(areaName) -> ㎡와 평형, 층수(floorInfo) -> compute_floor_columns.
+    연식은 prepare_fetched_df에서 이미 연도(정수)로 변환됩니다. 조회할 때 한 번만 실행해 rerun마다 문자열을 다시 해석하지 않습니다.
     """
-    df_summary = df_detail.copy()
-
-    required_cols = ['구', '동', '매물명', '공급면적', '가격', '거래유형', '연식', '총세대수']
-    if not all(col in df_summary.columns for col in required_cols):
-        missing = [col for col in required_cols if col not in df_summary.columns]
-        st.error(f"요약 생성 오류: 상세 데이터에 필수 컬럼 누락: {', '.join(missing)}")
-        return pd.DataFrame(columns=[
-            "구", "동", "아파트명", "연식", "총세대수", "공급면적", "평형",
-            "매매개수", "전세개수", "매매평균", "매매중간", "매매최대", "매매최소",
-            "전세평균", "전세중간", "전세최대", "전세최소", "갭(매매-전세)(평균)"
-        ])
-
-    df_summary['가격_숫자'] = df_summary['가격'].apply(convert_price_to_number)
-    df_summary["공급면적_숫자"] = df_summary["공급면적"].apply(extract_numeric_area)
-    df_summary["평형"] = np.where(
-        df_summary["공급면적_숫자"].notna() & (df_summary["공급면적_숫자"] != 0),
-        (df_summary["공급면적_숫자"] / 3.3).round(1),
-        None
-    )
-
-    # 정보제공 컬럼 이름 변경 (CP사 -> 정보제공) - df_detail에 해당 컬럼이 있는지 확인 필요
-    if "CP사" in df_summary.columns:
-        df_summary = df_summary.rename(columns={"CP사": "정보제공"})
-
-    # 정보제공 컬럼 기준으로 필터링
-    if "정보제공" in df_summary.columns:
-        df_filtered = df_summary[df_summary["정보제공"] != "한국공인중개사협회"].copy()
-    else:
-        df_filtered = df_summary.copy() # 정보제공 컬럼 없으면 필터링 없이 진행
-
-    grouping_cols = ["구", "동", "매물명", "공급면적", "평형", "연식", "총세대수"]
-
-    # 필수 그룹핑 컬럼 존재 확인
-    missing_group_cols = [col for col in grouping_cols if col not in df_filtered.columns]
-    if missing_group_cols:
-        st.error(f"요약 생성 오류: 그룹핑에 필요한 컬럼 누락: {', '.join(missing_group_cols)}")
-        # 빈 데이터프레임 또는 기본 구조를 반환
-        return pd.DataFrame(columns=[
-            "구", "동", "아파트명", "연식", "총세대수", "공급면적", "평형",
-            "매매개수", "전세개수", "매매평균", "매매중간", "매매최대", "매매최소",
-            "전세평균", "전세중간", "전세최대", "전세최소", "갭(매매-전세)(평균)"
-        ])
-
-
-    agg_funcs = {
-        "평균": ("가격_숫자", "mean"),
-        "중간": ("가격_숫자", "median"),
-        "최대": ("가격_숫자", "max"),
-        "최소": ("가격_숫자", "min"),
-        "개수": ("가격_숫자", "size")
+    typed_columns = {}
+    if 'dealOrWarrantPrc' in df.columns:
+        typed_columns[PRICE_NUMBER_COLUMN] = convert_prices_to_numbers(df['dealOrWarrantPrc'])
+    if 'areaName' in df.columns:
+        area_numbers = extract_numeric_areas(df['areaName'])
+        typed_columns[AREA_NUMBER_COLUMN] = area_numbers
+        typed_columns[PYEONG_NUMBER_COLUMN] = (area_numbers / 3.3).round(1).where(area_numbers != 0)
+    if 'floorInfo' in df.columns:
+        typed_columns.update(compute_floor_columns(df['floorInfo']))
+    return df.assign(**typed_columns) if typed_columns else df
+
+
+def compute_floor_columns(floor_series):
+    """층수 Series('5/15', '저/20')를 해당층/해당층 숫자/총층수/층구분/층위치 열 딕셔너리로 변환합니다."""
+    floor_labels, total_floors = split_floor_info(floor_series)
+    floor_numbers = parse_floor_numbers(floor_labels)
+    floor_bands, floor_positions = classify_floors(floor_labels, floor_numbers, total_floors)
+    return {
+        FLOOR_LABEL_COLUMN: floor_labels, FLOOR_NUMBER_COLUMN: floor_numbers, TOTAL_FLOORS_COLUMN: total_floors,
+        FLOOR_BAND_COLUMN: floor_bands, FLOOR_POSITION_COLUMN: floor_positions,
     }
 
-    # 가격 데이터가 없는 경우 집계 시 오류 발생 가능성 -> NaN 처리된 데이터 제외 고려
-    df_agg_ready = df_filtered.dropna(subset=['가격_숫자']) # 가격이 NaN인 행 제외하고 집계
 
-    # 집계 수행 (데이터가 없는 경우 빈 DF 반환될 수 있음)
-    if not df_agg_ready.empty:
-        summary_stats = df_agg_ready.groupby(grouping_cols + ["거래유형"], as_index=False).agg(**agg_funcs)
-    else:
-        summary_stats = pd.DataFrame() # 집계할 데이터 없으면 빈 DF
-
-    # Pivot 테이블 변환 (데이터 있을 때만)
-    if not summary_stats.empty:
-        summary_pivot = summary_stats.pivot_table(
-            index=grouping_cols,
-            columns='거래유형',
-            values=['평균', '중간', '최대', '최소', '개수'],
-            fill_value=pd.NA # 집계값 없는 경우 0 대신 NA로 채워서 타입 유지
-        )
+def compact_dataframe(df):
+    """
+    세션에 보관하는 매물 DataFrame의 메모리 사용량을 줄입니다 (값은 그대로 유지).
+    - CATEGORY_COLUMNS 중 반복 값이 많은 문자열 열 -> category
+    - 정수 열 -> 값 범위에 맞는 가장 작은 정수형 (nullable Int64 -> Int8/Int16/Int32)
+    - 태그 목록(tagList)은 내용이 같으면 하나의 리스트 객체를 공유
+    실수 열(위도/경도 등)은 정밀도가 줄지 않도록 그대로 둡니다.
+    """
+    if df.empty:
+        return df
+    compacted_columns = {}
+    for name in df.columns:
+        column = df[name]
+        if name in CATEGORY_COLUMNS and column.dtype == object:
+            try:
+                unique_count = column.nunique(dropna=True)
+            except TypeError: # 리스트 등 해시할 수 없는 값이 섞인 열
+                continue
+            if unique_count <= len(column) * CATEGORY_MAX_UNIQUE_RATIO:
+                compacted_columns[name] = column.astype('category')
+        elif name in SHARED_LIST_COLUMNS and column.dtype == object:
+            shared_lists = {}
+            compacted_columns[name] = pd.Series(
+                [shared_lists.setdefault(tuple(value), value) if isinstance(value, list) else value for value in column],
+                index=column.index, dtype=object
+            )
+        elif pd.api.types.is_integer_dtype(column.dtype):
+            compacted_columns[name] = pd.to_numeric(column, downcast='integer')
+    return df.assign(**compacted_columns) if compacted_columns else df
+
+
+def estimate_uncompacted_bytes(df):
+    """
+    compact_dataframe 적용 전 형태(문자열 object 열, 64비트 정수 열)였다면 차지했을 메모리(바이트)를 추정합니다.
+    category 열은 코드별 원래 문자열 크기를, 정수 열은 행당 8바이트(nullable은 마스크 1바이트 추가)를 사용합니다.
+    """
+    total_bytes = df.index.memory_usage()
+    for name in df.columns:
+        column = df[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # 마지막 원소는 결측값(코드 -1)의 크기
+            value_sizes = np.array([sys.getsizeof(value) for value in column.cat.categories] + [sys.getsizeof(np.nan)])
+            total_bytes += int(value_sizes[column.cat.codes.to_numpy()].sum()) + 8 * len(column)
+        elif pd.api.types.is_integer_dtype(column.dtype):
+            total_bytes += len(column) * (9 if isinstance(column.dtype, pd.api.extensions.ExtensionDtype) else 8)
+        else:
+            total_bytes += column.memory_usage(index=False, deep=True)
+    return int(total_bytes)
+
+
+def dataframe_memory_report(frames):
+    """
+    DataFrame 목록의 메모리 사용량을 {'bytes', 'uncompacted_bytes', 'saved_bytes'}로 집계합니다.
+    uncompacted_bytes는 compact_dataframe을 적용하지 않았을 때의 추정치입니다.
+    """
+    frames = [df for df in frames if isinstance(df, pd.DataFrame)]
+    used_bytes = sum(int(df.memory_usage(index=True, deep=True).sum()) for df in frames)
+    uncompacted_bytes = sum(estimate_uncompacted_bytes(df) for df in frames)
+    return {'bytes': used_bytes, 'uncompacted_bytes': uncompacted_bytes, 'saved_bytes': max(0, uncompacted_bytes - used_bytes)}
 
-        summary_pivot.columns = [f'{col[1]}{col[0]}' for col in summary_pivot.columns]
-        summary_pivot = summary_pivot.reset_index()
-    else:
-        # 집계 결과 없으면 기본 컬럼 구조 가진 빈 DF 생성
-        summary_pivot = pd.DataFrame(columns=grouping_cols)
 
-    # 갭 계산 (NA 값 고려)
-    매매평균_col = '매매평균'
-    전세평균_col = '전세평균'
+def _factorize_sorted(values):
+    """값을 정렬 순서대로 번호 매긴 정수 코드(NA = -1)와 고유값을 반환합니다. category 열은 기존 코드를 그대로 사용합니다."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(dtype=np.int64), values.cat.categories
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int64, copy=False), uniques
+
 
-    if 매매평균_col in summary_pivot.columns and 전세평균_col in summary_pivot.columns:
-        # NA가 아닌 경우에만 계산, 한쪽이라도 NA면 결과도 NA
-        summary_pivot["갭(매매-전세)(평균)"] = summary_pivot[매매평균_col].astype(float) - summary_pivot[전세평균_col].astype(float)
+def summarize_prices_by_group(group_keys, trade_types, prices, summary_trade_types=SUMMARY_TRADE_TYPES):
+    """
+    group_keys(DataFrame)의 값 조합별로 거래유형(summary_trade_types)마다 가격 개수/평균/중간/최대/최소를 계산합니다.
+    키/거래유형/가격을 정수 코드로 바꿔 하나의 int64 키로 합쳐 한 번 정렬한 뒤, 같은 (그룹, 거래유형) 구간을
+    np.add.reduceat으로 합산하고 구간의 양 끝(최소/최대)과 가운데(중간값)를 바로 읽습니다.
+    키/거래유형/가격이 NA인 행은 제외하며(groupby dropna와 동일), 결과는 키 순으로 정렬됩니다.
+    """
+    prices = np.asarray(prices, dtype=float)
+    key_codes = [_factorize_sorted(group_keys[col]) for col in group_keys.columns]
+    trade_codes, trade_names = _factorize_sorted(trade_types)
+    valid = (trade_codes >= 0) & ~np.isnan(prices)
+    for codes, _ in key_codes:
+        valid &= codes >= 0
+    rows = np.flatnonzero(valid)
+
+    price_codes, price_uniques = pd.factorize(prices[rows], sort=True)
+    trade_count, price_count = max(len(trade_names), 1), max(len(price_uniques), 1)
+    int64_max = np.iinfo(np.int64).max
+
+    # 키 열 코드를 하나의 int64 그룹 키로 합침 (int64를 넘을 수 있으면 그때까지의 키를 조밀한 순번으로 다시 매김)
+    group_codes = np.zeros(len(rows), dtype=np.int64)
+    key_space = 1
+    for codes, uniques in key_codes:
+        cardinality = max(len(uniques), 1)
+        if key_space * cardinality * trade_count * price_count > int64_max:
+            distinct_codes, group_codes = np.unique(group_codes, return_inverse=True)
+            key_space = len(distinct_codes)
+        group_codes = group_codes * cardinality + codes[rows]
+        key_space *= cardinality
+    # (그룹 키, 거래유형, 가격 순위)를 하나의 정수로 만들어 한 번만 정렬
+    sort_keys = (group_codes * trade_count + trade_codes[rows]) * price_count + price_codes
+    sort_order = np.argsort(sort_keys)
+    order = rows[sort_order]
+    row_count = len(order)
+    sorted_keys = sort_keys[sort_order]
+    sorted_groups = sorted_keys // (trade_count * price_count)
+    sorted_segments = sorted_keys // price_count
+
+    new_group = np.zeros(row_count, dtype=bool)
+    new_group[:1] = True
+    new_group[1:] = sorted_groups[1:] != sorted_groups[:-1]
+    group_starts = np.flatnonzero(new_group)
+    group_ids = np.cumsum(new_group) - 1
+
+    sorted_trades = trade_codes[order]
+    sorted_prices = prices[order]
+    new_segment = new_group.copy()
+    new_segment[1:] |= sorted_segments[1:] != sorted_segments[:-1]
+    segment_starts = np.flatnonzero(new_segment)
+    segment_counts = np.diff(np.append(segment_starts, row_count))
+    segment_groups = group_ids[segment_starts]
+    segment_trades = sorted_trades[segment_starts]
+    if row_count:
+        segment_sums = np.add.reduceat(sorted_prices, segment_starts)
+        segment_medians = (sorted_prices[segment_starts + (segment_counts - 1) // 2] +
+                           sorted_prices[segment_starts + segment_counts // 2]) / 2
     else:
-        summary_pivot["갭(매매-전세)(평균)"] = pd.NA
+        segment_sums = segment_medians = np.empty(0)
+
+    summary = group_keys.take(order[group_starts]).reset_index(drop=True).infer_objects()
+    group_count = len(group_starts)
+    for trade_name in summary_trade_types:
+        in_trade = segment_trades == pd.Index(trade_names).get_indexer([trade_name])[0] # 없는 거래유형은 -1 (해당 구간 없음)
+        groups = segment_groups[in_trade]
+        counts = np.zeros(group_count, dtype=np.int64)
+        counts[groups] = segment_counts[in_trade]
+        stats = {
+            '평균': segment_sums[in_trade] / segment_counts[in_trade],
+            '중간': segment_medians[in_trade],
+            '최대': sorted_prices[segment_starts[in_trade] + segment_counts[in_trade] - 1],
+            '최소': sorted_prices[segment_starts[in_trade]],
+        }
+        summary[f'{trade_name}개수'] = counts
+        for stat_name, values in stats.items():
+            column = np.full(group_count, np.nan)
+            column[groups] = values
+            summary[f'{trade_name}{stat_name}'] = column
+    return summary
 
-    summary_pivot = summary_pivot.rename(columns={
-        "매물명": "아파트명",
-        "매매개수": "매매개수",
-        "전세개수": "전세개수"
-    })
 
-    final_columns = [
-        "구", "동", "아파트명", "연식", "총세대수", "공급면적", "평형",
-        "매매개수", "전세개수", "매매평균", "매매중간", "매매최대", "매매최소",
-        "전세평균", "전세중간", "전세최대", "전세최소", "갭(매매-전세)(평균)"
-    ]
-    existing_final_columns = [col for col in final_columns if col in summary_pivot.columns]
-    summary_final = summary_pivot.reindex(columns=final_columns) # 모든 최종 컬럼 포함, 없는 값은 NA
+def create_summary(df_detail):
+    """
+    상세 데이터프레임(df_detail)에서 아파트 단지 및 평형별 요약 데이터를 생성합니다.
+    '구', '동' 컬럼이 df_detail에 반드시 포함되어야 합니다.
+    집계는 필요한 열만 꺼내 summarize_prices_by_group으로 한 번에 계산합니다 (전체 복사/pivot 없음).
+    """
+    required_cols = ['구', '동', '매물명', '공급면적', '가격', '거래유형', '연식', '총세대수']
+    if not all(col in df_detail.columns for col in required_cols):
+        missing = [col for col in required_cols if col not in df_detail.columns]
+        st.error(f"요약 생성 오류: 상세 데이터에 필수 컬럼 누락: {', '.join(missing)}")
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
 
-    # 개수 컬럼 NA -> 0, 정수형 변환
-    if '매매개수' in summary_final.columns:
-        summary_final['매매개수'] = summary_final['매매개수'].fillna(0).astype(int)
-    if '전세개수' in summary_final.columns:
-        summary_final['전세개수'] = summary_final['전세개수'].fillna(0).astype(int)
+    # 조회 시 계산해 둔 숫자 열(add_typed_columns)이 있으면 그대로 사용
+    if PRICE_NUMBER_COLUMN in df_detail.columns:
+        prices = df_detail[PRICE_NUMBER_COLUMN].to_numpy(dtype=float, na_value=np.nan)
+    else:
+        prices = np.asarray(convert_prices_to_numbers(df_detail['가격']), dtype=float)
+    if PYEONG_NUMBER_COLUMN in df_detail.columns:
+        pyeong = df_detail[PYEONG_NUMBER_COLUMN]
+    else:
+        areas = df_detail[AREA_NUMBER_COLUMN] if AREA_NUMBER_COLUMN in df_detail.columns else extract_numeric_areas(df_detail["공급면적"])
+        pyeong = (areas / 3.3).round(1).where(areas != 0)
 
-    # 평균, 중간, 최대, 최소 등 수치형 컬럼도 필요 시 NA 처리 및 타입 변환
-    numeric_summary_cols = ['매매평균', '매매중간', '매매최대', '매매최소',
-                            '전세평균', '전세중간', '전세최대', '전세최소', '갭(매매-전세)(평균)']
-    for col in numeric_summary_cols:
-        if col in summary_final.columns:
-            # pd.to_numeric으로 이미 숫자형(주로 float)으로 변환되었거나 원본이 숫자형임.
-            # 추가적인 astype('Int64') 변환을 시도하지 않습니다.
-            # 필요하다면 여기서 .astype(float) 등으로 명시할 수 있으나, 보통 불필요합니다.
-            pass # 특별한 타입 변환 없이 넘어감
+    # 정보제공(CP사)이 한국공인중개사협회인 매물은 집계에서 제외
+    provider_col = "CP사" if "CP사" in df_detail.columns else "정보제공"
+    if provider_col in df_detail.columns:
+        prices = np.where((df_detail[provider_col] != "한국공인중개사협회").to_numpy(dtype=bool), prices, np.nan)
+
+    group_keys = pd.DataFrame({
+        "구": df_detail["구"], "동": df_detail["동"], "매물명": df_detail["매물명"], "공급면적": df_detail["공급면적"],
+        "평형": pyeong, "연식": df_detail["연식"], "총세대수": df_detail["총세대수"],
+    })
+    summary = summarize_prices_by_group(group_keys, df_detail["거래유형"], prices)
+    summary["갭(매매-전세)(평균)"] = summary["매매평균"] - summary["전세평균"]
+    return summary.rename(columns={"매물명": "아파트명"})[SUMMARY_COLUMNS]
 
-    # 또는 Pandas의 nullable float 타입 사용 시 (선택 사항):
-    # for col in numeric_summary_cols:
-    #     if col in summary_final.columns:
-    #         summary_final[col] = pd.to_numeric(summary_final[col], errors='coerce').astype('Float64')
 
-    return summary_final
+def floor_filter_mask(df, exclude_low_floors=False, min_floor=None, exclude_bottom_ratio=0.0, bands=None):
+    """
+    층 조건을 만족하는 행을 True로 하는 bool 배열을 반환합니다. 층 정보 열이 없으면 None.
+    - exclude_low_floors: LOW_FLOOR_MAX층 이하(지하 포함)와 '저' 표기 매물 제외
+    - min_floor: 해당층 번호가 이 값 이상인 매물만 (번호 없이 저/중/고로 표기된 매물은 제외)
+    - exclude_bottom_ratio: 상대 위치(해당층 / 총층수)가 이 비율 이하인 매물 제외 (예: 0.2 = 하위 20%)
+    - bands: 남길 층 구분 목록 (예: ['중', '고'])
+    조건이 하나라도 있으면 층 정보가 없는 매물은 제외합니다.
+    조회 시 계산해 둔 층 열(add_typed_columns)을 사용하고, 없으면 '층수' 열에서 계산합니다.
+    """
+    if FLOOR_LABEL_COLUMN in df.columns:
+        floor_columns = df
+    elif '층수' in df.columns:
+        floor_columns = compute_floor_columns(df['층수'])
+    else:
+        return None
+
+    floor_labels = floor_columns[FLOOR_LABEL_COLUMN]
+    mask = floor_labels.notna().to_numpy(dtype=bool)
+    floor_numbers = floor_columns[FLOOR_NUMBER_COLUMN].to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(invalid='ignore'): # NaN 비교는 False
+        if exclude_low_floors:
+            mask &= ~(floor_numbers <= LOW_FLOOR_MAX) & ~floor_labels.isin(['저']).to_numpy(dtype=bool)
+        if min_floor is not None:
+            mask &= floor_numbers >= min_floor
+        if exclude_bottom_ratio:
+            mask &= floor_columns[FLOOR_POSITION_COLUMN].to_numpy(dtype=float, na_value=np.nan) > exclude_bottom_ratio
+    if bands:
+        mask &= floor_columns[FLOOR_BAND_COLUMN].isin(list(bands)).to_numpy(dtype=bool)
+    return mask
 
 
 def filter_out_low_floors(df, exclude_low_floors):
     """
-    '저층 제외' 옵션에 따라 데이터프레임을 필터링합니다.
+    '저층 제외' 옵션에 따라 데이터프레임을 필터링합니다 (floor_filter_mask).
     """
     if not exclude_low_floors:
         return df
-
-    df_filtered = df.copy()
-    if '층수' in df_filtered.columns:
-        # extract_floor 함수는 문자열 반환하므로, NaN 처리 후 적용
-        df_filtered['층'] = df_filtered['층수'].dropna().apply(extract_floor)
-    else:
+    mask = floor_filter_mask(df, exclude_low_floors=True)
+    if mask is None:
         st.warning("'층수' 컬럼이 없어 저층 필터링을 수행할 수 없습니다.")
         return df
-
-    low_floor_criteria = ['1', '2', '3', '저']
-    # '층' 컬럼이 생성되었고, 값이 있는 행에 대해서만 필터링
-    df_filtered = df_filtered[
-        df_filtered['층'].notna() & ~df_filtered['층'].isin(low_floor_criteria)
-    ]
-    # 임시 '층' 컬럼 제거 (필터링 후 제거해야 함)
-    if '층' in df_filtered.columns:
-        df_filtered = df_filtered.drop(columns=['층'])
-    return df_filtered
+    return df[mask]
 
 
 def sort_dataframe(df, sort_columns, ascending_list):
@@ -177,7 +303,12 @@ def sort_dataframe(df, sort_columns, ascending_list):
     if not sort_columns or df.empty: # 정렬 기준 없거나 df 비어있으면 원본 반환
         return df
 
-    df_sorted = df.copy()
+    # 조회 시 계산해 둔 숫자 열(add_typed_columns)이 있으면 문자열을 다시 해석하지 않고 그 열로 정렬
+    typed_sort_columns = {'가격': PRICE_NUMBER_COLUMN, '공급면적': AREA_NUMBER_COLUMN}
+    sort_columns = [typed_sort_columns[col] if typed_sort_columns.get(col) in df.columns else col for col in sort_columns]
+
+    # 임시 정렬용 컬럼을 만들어야 할 때만 복사
+    df_sorted = df.copy() if any(col in typed_sort_columns for col in sort_columns) else df
 
     # 임시 정렬용 컬럼 생성 리스트
     temp_sort_cols = []
@@ -186,7 +317,7 @@ def sort_dataframe(df, sort_columns, ascending_list):
     if '가격' in sort_columns:
         if '가격_숫자_정렬용' not in df_sorted.columns: # 기존 임시 컬럼명과 겹치지 않게
             try:
-                df_sorted['가격_숫자_정렬용'] = df_sorted['가격'].apply(convert_price_to_number)
+                df_sorted['가격_숫자_정렬용'] = convert_prices_to_numbers(df_sorted['가격'])
                 temp_sort_cols.append('가격_숫자_정렬용')
             except Exception as e:
                 st.error(f"가격 숫자 변환 중 오류 (정렬): {e}")
@@ -202,7 +333,7 @@ def sort_dataframe(df, sort_columns, ascending_list):
     if '공급면적' in sort_columns:
         if '공급면적_숫자_정렬용' not in df_sorted.columns:
             try:
-                df_sorted['공급면적_숫자_정렬용'] = df_sorted['공급면적'].apply(extract_numeric_area)
+                df_sorted['공급면적_숫자_정렬용'] = extract_numeric_areas(df_sorted['공급면적'])
                 temp_sort_cols.append('공급면적_숫자_정렬용')
             except Exception as e:
                 st.error(f"공급면적 숫자 변환 중 오류 (정렬): {e}")
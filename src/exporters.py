@@ -3,15 +3,35 @@ import pandas as pd
 from io import BytesIO
 import numpy as np # NaN 값 처리 위해 추가
 # src 패키지 내 utils 모듈에서 필요한 함수 임포트
-from .utils import format_eok
+from .utils import format_eok, drop_typed_columns, floor_filter_suffix
+
+EXCEL_SHEET_NAME_MAX = 31 # Excel 시트 이름 길이 제한
 # data_processor 임포트는 제거 (순환 참조 방지, 필요 시 함수 인자로 전달받도록 구조 변경)
 # from .data_processor import create_summary
 
-def to_excel(df_detail, summary_df, area_name, current_date, exclude_low_floors):
+def sheet_name_with_suffix(base_name, suffix, used_names=None):
+    """
+    base_name 뒤에 suffix('_상세' 등)를 붙인 시트 이름을 만듭니다. 31자를 넘으면 base_name 쪽을 잘라 suffix는 남기고,
+    used_names에 이미 있는 이름이면 '~2', '~3'...을 붙여 중복을 피합니다 (used_names에 새 이름을 추가).
+    """
+    sheet_name = f"{base_name[:EXCEL_SHEET_NAME_MAX - len(suffix)]}{suffix}"
+    if used_names is None:
+        return sheet_name
+    duplicate_index = 1
+    while sheet_name in used_names:
+        duplicate_index += 1
+        marker = f"~{duplicate_index}"
+        sheet_name = f"{base_name[:EXCEL_SHEET_NAME_MAX - len(suffix) - len(marker)]}{marker}{suffix}"
+    used_names.add(sheet_name)
+    return sheet_name
+
+def to_excel(df_detail, summary_df, area_name, current_date, floor_filter=None):
     """
     상세 데이터(df_detail)와 요약 데이터(summary_df)를 별도의 시트로 Excel 파일 생성합니다.
-    summary_df는 외부에서 생성되어 전달받습니다.
+    summary_df는 외부에서 생성되어 전달받습니다. 정렬/필터용 숫자 열(TYPED_COLUMNS)은 내보내지 않습니다.
+    floor_filter(층 조건 dict)가 있으면 시트 이름에 조건을 붙입니다 (floor_filter_suffix).
     """
+    df_detail = drop_typed_columns(df_detail)
     summary_formatted = summary_df.copy()
     format_cols = [
         '매매평균', '매매중간', '매매최대', '매매최소',
@@ -26,14 +46,10 @@ def to_excel(df_detail, summary_df, area_name, current_date, exclude_low_floors)
             # np.nan으로 변환된 숫자 컬럼에 format_eok 적용 (format_eok은 pd.isna로 np.nan을 처리함)
             summary_formatted[col] = numeric_col.apply(format_eok)
 
-    base_name = f"{area_name}_{current_date}"
-    if exclude_low_floors:
-        base_name += "_저층제외"
-    sheet1_name = f"{base_name}_상세"
-    sheet2_name = f"{base_name}_요약"
-    # 시트 이름 길이 제한 (Excel 제한: 31자) 고려
-    sheet1_name = sheet1_name[:31]
-    sheet2_name = sheet2_name[:31]
+    base_name = f"{area_name}_{current_date}{floor_filter_suffix(floor_filter)}"
+    # 시트 이름 길이 제한 (Excel 제한: 31자) 고려, '_상세'/'_요약'은 잘리지 않도록
+    sheet1_name = sheet_name_with_suffix(base_name, "_상세")
+    sheet2_name = sheet_name_with_suffix(base_name, "_요약")
 
 
     output = BytesIO()
@@ -71,6 +87,7 @@ def to_excel(df_detail, summary_df, area_name, current_date, exclude_low_floors)
 def export_combined_excel(selected_areas_data, current_date):
     """
     선택된 여러 지역의 상세/요약 데이터를 종합하여 하나의 Excel 파일로 생성합니다.
+    selected_areas_data의 키는 (구, 동, 층 조건 키(floor_filter_key)) 튜플입니다.
     """
     output = BytesIO()
     try:
@@ -80,7 +97,7 @@ def export_combined_excel(selected_areas_data, current_date):
             cover_data = []
 
             # 1. 데이터 수집 및 표지 데이터 생성
-            for (division, dong, exclude_low_floors), data in selected_areas_data.items():
+            for (division, dong, floor_key), data in selected_areas_data.items():
                 # 데이터 유효성 검사 (detail, summary 키 존재 여부)
                 if 'detail' not in data or 'summary' not in data:
                     print(f"경고: 키 '{division} {dong}' 데이터에 'detail' 또는 'summary' 누락. 종합 리포트에서 제외됩니다.")
@@ -88,7 +105,7 @@ def export_combined_excel(selected_areas_data, current_date):
 
                 detail_df = data['detail'].copy()
                 summary_df = data['summary'].copy()
-                display_name = f"{division} {dong}{'_저층제외' if exclude_low_floors else ''}"
+                display_name = f"{division} {dong}{floor_filter_suffix(floor_key)}"
 
                 # 지역명 컬럼 추가 (만약 이미 존재하면 덮어쓰지 않도록)
                 if '조회지역' not in detail_df.columns:
@@ -156,13 +173,14 @@ def export_combined_excel(selected_areas_data, current_date):
             # 4. 개별 상세 시트 생성 및 하이퍼링크 설정
             workbook = writer.book
             url_format = workbook.add_format({'font_color': 'blue', 'underline': 1})
-            for (division, dong, exclude_low_floors), data in selected_areas_data.items():
+            used_sheet_names = set(writer.sheets)
+            for (division, dong, floor_key), data in selected_areas_data.items():
                 # 데이터 유효성 검사 반복 (위에서 했지만 안전하게)
                 if 'detail' not in data: continue
 
-                detail_df = data['detail']
-                base_name = f"{division}_{dong}_{current_date}{'_저층제외' if exclude_low_floors else ''}"
-                sheet_name = f"{base_name}_상세"[:31] # 시트 이름 길이 제한
+                detail_df = drop_typed_columns(data['detail'])
+                base_name = f"{division}_{dong}_{current_date}{floor_filter_suffix(floor_key)}"
+                sheet_name = sheet_name_with_suffix(base_name, "_상세", used_sheet_names) # 시트 이름 길이 제한, 잘려서 겹치는 이름 방지
 
                 detail_df.to_excel(writer, sheet_name=sheet_name, index=False)
                 worksheet = writer.sheets[sheet_name]
@@ -0,0 +1,212 @@
+# your_project_directory/src/external_scripts/article_table.py
+# 매물 목록을 고정 스키마의 Arrow 테이블 / Parquet 파일로 변환합니다.
+# 들여쓴 JSON 대신 열 단위로 저장하므로 파일이 작고, 읽을 때 메모리 매핑으로 바로 DataFrame을 만듭니다.
+# 응답을 파싱할 때부터 스키마 필드만 담는 Article 레코드(__slots__)로 바꾸고, 열 버퍼(ArticleColumns)에 모아 테이블을 만듭니다.
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+AREA_KEY_COLUMN = 'areaKey' # 지역명 ('강남구 역삼동' 등) 열
+
+# 매물 API 응답 + 단지 정보(enrichment) 중 앱에서 사용하는 필드와 타입. 목록에 없는 응답 필드는 파싱 단계에서 버립니다.
+ARTICLE_SCHEMA = pa.schema([
+    ('articleNo', pa.string()),
+    ('articleName', pa.string()),
+    ('articleStatus', pa.string()),
+    ('realEstateTypeCode', pa.string()),
+    ('realEstateTypeName', pa.string()),
+    ('tradeTypeCode', pa.string()),
+    ('tradeTypeName', pa.string()),
+    ('verificationTypeCode', pa.string()),
+    ('floorInfo', pa.string()),
+    ('priceChangeState', pa.string()),
+    ('dealOrWarrantPrc', pa.string()),
+    ('rentPrc', pa.string()),
+    ('areaName', pa.string()),
+    ('area1', pa.int64()),
+    ('area2', pa.int64()),
+    ('direction', pa.string()),
+    ('articleConfirmYmd', pa.string()),
+    ('articleFeatureDesc', pa.string()),
+    ('tagList', pa.list_(pa.string())),
+    ('buildingName', pa.string()),
+    ('sameAddrCnt', pa.int64()),
+    ('sameAddrMaxPrc', pa.string()),
+    ('sameAddrMinPrc', pa.string()),
+    ('cpName', pa.string()),
+    ('realtorName', pa.string()),
+    ('markerId', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('completionYearMonth', pa.string()),
+    ('totalHouseholdCount', pa.int64()),
+    ('divisionName', pa.string()),
+    ('cortarName', pa.string()),
+])
+_SCHEMA_FIELD_NAMES = frozenset(ARTICLE_SCHEMA.names)
+
+
+def _to_arrow_column(values, arrow_type):
+    """파이썬 값 목록을 지정한 타입의 Arrow 배열로 변환합니다. 변환할 수 없는 값은 null이 됩니다."""
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        return pa.array(numbers, type=pa.float64(), from_pandas=True).cast(arrow_type, safe=False)
+    if pa.types.is_list(arrow_type):
+        return pa.array([[str(item) for item in value] if isinstance(value, (list, tuple)) else None for value in values],
+                        type=arrow_type)
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError): # 숫자 등 문자열이 아닌 값이 섞인 경우
+        return pa.array([None if value is None else str(value) for value in values], type=arrow_type)
+
+
+class Article:
+    """
+    매물 한 건. ARTICLE_SCHEMA의 필드만 __slots__로 보관하므로 응답 딕셔너리(필드 수십 개)보다 훨씬 작습니다.
+    기존 딕셔너리 매물을 다루던 코드와 같이 get(필드명)으로 값을 읽을 수 있습니다.
+    """
+    __slots__ = tuple(ARTICLE_SCHEMA.names)
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_api(cls, item):
+        """응답(또는 이전 수집 결과)의 매물 딕셔너리에서 스키마 필드만 골라 Article을 만듭니다."""
+        article = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(article, name, item.get(name))
+        return article
+
+    def get(self, name, default=None):
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def update(self, fields):
+        """단지 정보(enrichment) 등 스키마 필드 값을 덮어씁니다. 스키마에 없는 키는 무시합니다."""
+        for name, value in fields.items():
+            if name in _SCHEMA_FIELD_NAMES:
+                setattr(self, name, value)
+
+    def to_dict(self):
+        """값이 있는 필드만 담은 딕셔너리 (JSON 출력용)."""
+        return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+
+    def __repr__(self):
+        return f"Article(articleNo={self.articleNo!r}, articleName={self.articleName!r}, dealOrWarrantPrc={self.dealOrWarrantPrc!r})"
+
+
+def decode_article_hook(obj):
+    """
+    json.loads(object_hook=...)용: 매물 객체(articleNo가 있는 객체)는 파싱되는 즉시 Article로 바꿔
+    나머지 응답 필드를 담은 딕셔너리가 목록에 남지 않게 합니다. 그 밖의 객체는 그대로 둡니다.
+    """
+    return Article.from_api(obj) if 'articleNo' in obj else obj
+
+
+def to_article(item):
+    """Article 또는 매물 딕셔너리(이전 수집 결과 등)를 Article로 반환합니다. 그 밖의 값은 None."""
+    if isinstance(item, Article):
+        return item
+    if isinstance(item, dict):
+        return Article.from_api(item)
+    return None
+
+
+class ArticleColumns:
+    """매물을 필드별 열 버퍼(리스트)에 모았다가 한 번에 ARTICLE_SCHEMA 타입의 Arrow 테이블로 변환합니다."""
+
+    def __init__(self):
+        self._columns = {name: [] for name in ARTICLE_SCHEMA.names}
+        self._area_keys = []
+
+    def __len__(self):
+        return len(self._area_keys)
+
+    def append(self, article, area_key=None):
+        for name, values in self._columns.items():
+            values.append(getattr(article, name))
+        self._area_keys.append(area_key)
+
+    def extend(self, articles, area_key=None):
+        """매물 목록(Article 또는 딕셔너리)을 버퍼에 추가합니다. 매물이 아닌 값은 건너뜁니다."""
+        for item in articles:
+            article = to_article(item)
+            if article is not None:
+                self.append(article, area_key)
+
+    def to_table(self, with_area_key=True):
+        columns = [_to_arrow_column(self._columns[field.name], field.type) for field in ARTICLE_SCHEMA]
+        names = list(ARTICLE_SCHEMA.names)
+        if with_area_key:
+            names.append(AREA_KEY_COLUMN)
+            columns.append(pa.array(self._area_keys, type=pa.string()))
+        return pa.Table.from_arrays(columns, names=names)
+
+
+def articles_to_table(articles, area_keys=None):
+    """
+    매물 목록(Article 또는 딕셔너리)을 ARTICLE_SCHEMA 순서의 Arrow 테이블로 변환합니다.
+    area_keys(매물별 지역명 목록)가 있으면 areaKey 열을 붙입니다.
+    """
+    buffer = ArticleColumns()
+    for index, item in enumerate(articles):
+        article = to_article(item)
+        if article is not None:
+            buffer.append(article, area_keys[index] if area_keys is not None else None)
+    return buffer.to_table(with_area_key=area_keys is not None)
+
+
+def districts_to_table(articles_by_district):
+    """{지역명: [매물, ...]} 형태의 수집 결과를 areaKey 열이 있는 하나의 Arrow 테이블로 변환합니다."""
+    buffer = ArticleColumns()
+    for area_key, district_articles in articles_by_district.items():
+        buffer.extend(district_articles, area_key)
+    return buffer.to_table()
+
+
+def table_to_frame(table, area_key=None):
+    """
+    Arrow 테이블을 DataFrame으로 변환합니다. area_key가 있으면 해당 지역 행만 남기고 areaKey 열은 제외합니다.
+    모든 값이 null인 열(해당 지역에 없던 필드)은 제외하고, 목록 열(tagList 등)은 파이썬 리스트로 돌려놓습니다.
+    """
+    if AREA_KEY_COLUMN in table.column_names:
+        if area_key is not None:
+            table = table.filter(pc.equal(table[AREA_KEY_COLUMN], area_key))
+        table = table.drop_columns([AREA_KEY_COLUMN])
+    table = table.select([name for name in table.column_names if table[name].null_count < len(table)])
+    df = table.to_pandas()
+    for field in table.schema:
+        if pa.types.is_list(field.type):
+            df[field.name] = [value.tolist() if value is not None else None for value in df[field.name]]
+    return df
+
+
+def frame_to_articles(df):
+    """
+    table_to_frame의 반대: DataFrame 행을 Article 목록으로 되돌립니다 (증분 재수집 때 이전 매물 재사용).
+    결측값(NaN/None/pd.NA, category 열의 결측 포함)은 None이 되고, 결측값 때문에 float이 된 정수 필드는 정수로 돌려놓습니다.
+    """
+    columns = {}
+    for field in ARTICLE_SCHEMA:
+        if field.name not in df.columns:
+            continue
+        # Series.where(..., None)는 다시 float으로 바뀔 수 있으므로 object 배열에서 직접 None으로 바꿈
+        values = np.where(df[field.name].notna().to_numpy(dtype=bool), df[field.name].astype(object).to_numpy(), None).tolist()
+        if pa.types.is_integer(field.type):
+            values = [int(value) if isinstance(value, float) and value.is_integer() else value for value in values]
+        columns[field.name] = values
+    return [Article(**dict(zip(columns, row))) for row in zip(*columns.values())]
+
+
+def write_articles_parquet(table, path):
+    """Arrow 테이블을 Parquet 파일(zstd 압축)로 저장합니다."""
+    pq.write_table(table, path, compression='zstd')
+
+
+def read_articles_parquet(path):
+    """Parquet 파일을 메모리 매핑으로 읽어 Arrow 테이블로 반환합니다."""
+    return pq.read_table(path, memory_map=True)
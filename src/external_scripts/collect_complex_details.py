@@ -1,10 +1,27 @@
 # your_project_directory/src/external_scripts/collect_complex_details.py
 import requests
 import json
-import pprint # 디버깅용, 실제로는 제거 가능
-import time # API 호출 간격 제어 등에 필요
 import sys
 import os
+import argparse
+import math
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from .naver_http import get_land_session, is_cancelled, emit_progress, throttled_get
+    from .article_table import Article, decode_article_hook, districts_to_table, write_articles_parquet
+    from .crawl_filters import (apply_crawl_filters, normalize_crawl_filters, parse_price_manwon,
+                                get_listing_targets, bound_articles, TRADE_TYPE_COUNT_KEYS, UNBOUNDED)
+except ImportError: # 스크립트 단독 실행 시 (python src/external_scripts/collect_complex_details.py)
+    from naver_http import get_land_session, is_cancelled, emit_progress, throttled_get
+    from article_table import Article, decode_article_hook, districts_to_table, write_articles_parquet
+    from crawl_filters import (apply_crawl_filters, normalize_crawl_filters, parse_price_manwon,
+                               get_listing_targets, bound_articles, TRADE_TYPE_COUNT_KEYS, UNBOUNDED)
+
+# 동시에 수집할 단지 수 기본값 (단지 내 페이지는 항상 순서대로 수집)
+DEFAULT_MAX_WORKERS = 4
+ARTICLES_PER_PAGE = 20 # 매물 목록 API 한 페이지당 매물 수 (페이지 수 추정용)
+MAX_PAGES_PER_COMPLEX = 50 # 단지당 최대 수집 페이지
 
 def get_config_from_env():
     """
@@ -43,8 +60,14 @@ def get_config_from_env():
     return parsed_headers, parsed_cookies
 
 # fetch_complex_details 함수 시그니처 변경: headers_env, cookies_env 인자 추가
-def fetch_complex_details(complex_no, page, headers_env, cookies_env):
-    """주어진 단지 번호(complex_no)와 페이지 번호로 매물 상세 정보를 가져옵니다."""
+def fetch_complex_details(complex_no, page, headers_env, cookies_env, cancel_event=None, crawl_filters=None):
+    """
+    주어진 단지 번호(complex_no)와 페이지 번호로 매물 상세 정보를 가져옵니다.
+    crawl_filters(거래유형/가격/면적)는 API 파라미터로 적용되어, 조건에 맞는 매물만 내려받습니다.
+    응답의 매물은 파싱 시점에 사용하는 필드만 담은 Article 레코드로 변환됩니다 (나머지 필드는 보관하지 않음).
+    반환값: (Article 목록, 다음 페이지 존재 여부). 재시도 후에도 요청이 실패하면 (None, False)를 반환하여
+    '더 이상 매물 없음'([], False)과 구분합니다.
+    """
     detail_url = f'https://new.land.naver.com/api/articles/complex/{complex_no}'
     params = {
         'realEstateType': 'APT:JGC:PRE:ABYG', 
@@ -56,14 +79,23 @@ def fetch_complex_details(complex_no, page, headers_env, cookies_env):
         'directions': '', 'page': page, 'complexNo': complex_no,
         'buildingNos': '', 'areaNos': '', 'type': 'list', 'order': 'prc'
     }
+    params = apply_crawl_filters(params, crawl_filters)
+    params['minHouseHoldCount'] = '' # 세대수 조건은 마커 단계에서 이미 적용됨
 
     try:
-        # 함수 호출 시 전달받은 headers_env, cookies_env 사용
-        response = requests.get(detail_url, params=params, cookies=cookies_env, headers=headers_env, timeout=15)
+        # headers_env, cookies_env가 미리 설정된 공유 세션(keep-alive 연결 풀) 사용
+        session = get_land_session(headers_env, cookies_env)
+        # 호스트별 속도 제한 + 429/5xx 재시도 (고정 지연 없이 허용되는 최대 속도로 요청)
+        response = throttled_get(session, detail_url, cancel_event=cancel_event, params=params, timeout=15)
         response.raise_for_status() 
 
-        response_data = response.json()
-        article_list = response_data.get("articleList", [])
+        response_data = response.json(object_hook=decode_article_hook)
+        article_list = []
+        for item in response_data.get("articleList") or []:
+            if isinstance(item, Article):
+                article_list.append(item)
+            else:
+                print(f"Warning: Non-article item in articleList for {complex_no}, page {page}: {item}", file=sys.stderr)
         is_more_data = response_data.get("isMoreData", False)
 
         print(f"Fetched page {page} for complex {complex_no}. Articles: {len(article_list)}, More data: {is_more_data}", file=sys.stderr)
@@ -71,157 +103,324 @@ def fetch_complex_details(complex_no, page, headers_env, cookies_env):
 
     except requests.exceptions.RequestException as e:
         print(f"Error fetching details for complex {complex_no}, page {page}: {e}", file=sys.stderr)
-        return [], False
+        return None, False
     except json.JSONDecodeError:
         # 응답 내용이 너무 길 수 있으므로, 처음 200자만 미리보기로 출력
         response_text_preview = response.text[:200] + "..." if len(response.text) > 200 else response.text
         print(f"Error parsing JSON response for complex {complex_no}, page {page}. Response preview: {response_text_preview}", file=sys.stderr)
-        return [], False
+        return None, False
     except Exception as e:
         print(f"An unexpected error in fetch_complex_details for complex {complex_no}, page {page}: {e}", file=sys.stderr)
-        return [], False
+        return None, False
 
-if __name__ == "__main__":
-    project_root_cwd = os.getcwd()
-    print(f"Executing collect_complex_details.py from CWD: {project_root_cwd}", file=sys.stderr)
+def get_marker_counts(marker_info):
+    """마커의 거래유형별 매물 수 (dealCount, leaseCount, rentCount)를 리스트로 반환합니다. (증분 재수집 비교용)"""
+    return [marker_info.get(count_key) for count_key in TRADE_TYPE_COUNT_KEYS.values()]
 
-    # 환경 변수에서 Header와 Cookie 정보 가져오기
-    headers_from_env, cookies_from_env = get_config_from_env()
+def page_fingerprint(articles):
+    """
+    첫 페이지 매물 목록의 지문(매물 번호, 가격, 확인일자 기준 sha1)을 만듭니다.
+    마커 카운트가 같아도 가격 변경이나 매물 교체가 있으면 지문이 달라집니다.
+    """
+    digest = hashlib.sha1()
+    for article in articles:
+        if isinstance(article, (Article, dict)):
+            key_fields = (article.get('articleNo'), article.get('dealOrWarrantPrc'), article.get('articleConfirmYmd'))
+            digest.update(json.dumps(key_fields, ensure_ascii=False, default=str).encode('utf-8'))
+    return digest.hexdigest()
 
-    if not headers_from_env or not cookies_from_env:
-        print("Warning (collect_complex_details): Headers or Cookies could not be loaded from environment variables.", file=sys.stderr)
-        print("API requests to Naver Land might fail or be incomplete.", file=sys.stderr)
-        # 여기서 스크립트를 종료할 수도 있지만, 일단 진행하도록 둡니다.
-        # sys.exit(1) # 필요시 주석 해제
+def collect_complex_articles(marker_info, headers_env, cookies_env, cancel_event=None, progress_callback=None,
+                             crawl_filters=None, previous_snapshot=None):
+    """
+    단일 단지(marker_info)의 모든 매물 페이지를 순서대로 수집합니다.
+    각 매물(Article)에는 단지 정보(markerId, latitude, completionYearMonth 등)가 채워집니다.
+    cancel_event가 설정되면 다음 페이지를 요청하지 않고 그때까지 수집한 매물만 반환합니다.
+    progress_callback이 있으면 페이지마다 'page_fetched', 단지가 끝나면 'complex_done' 이벤트를 보냅니다.
+    매물은 가격순으로 내려오므로, 거래유형별 최저가 K건(max_listings_per_complex)을 모두 모으면 남은 페이지는 요청하지 않습니다.
+    가격 상한(price_max)은 요청 파라미터(priceMax)로 이미 서버에서 걸러지므로, 상한을 넘는 매물이 나왔을 때 멈추는 검사는
+    서버가 priceMax를 무시하는 경우를 위한 대비책일 뿐 평소에는 페이지를 줄이지 않습니다.
+    previous_snapshot({'counts', 'fingerprint', 'articles'})이 있고 마커 카운트와 첫 페이지 지문이 그대로이면
+    나머지 페이지를 요청하지 않고 이전 매물 목록을 그대로 반환합니다 (증분 재수집).
+    반환값: (매물 목록, 완료 여부, 단지 스냅샷 {'counts', 'fingerprint'} 또는 None).
+    요청 실패(재시도 소진)로 중간에 멈췄으면 완료 여부는 False이고 스냅샷은 None입니다.
+    """
+    complex_no = marker_info.get('markerId')
+    complex_name = marker_info.get('complexName', '')
+    print(f"Processing complex: {complex_name} ({complex_no})...", file=sys.stderr)
+    enrichment = {
+        'markerId': complex_no,
+        'latitude': marker_info.get('latitude'),
+        'longitude': marker_info.get('longitude'),
+        'completionYearMonth': marker_info.get('completionYearMonth', ''),
+        'totalHouseholdCount': marker_info.get('totalHouseholdCount', 0),
+        'divisionName': marker_info.get('divisionName', ''),
+        'cortarName': marker_info.get('cortarName', ''),
+    }
 
-    output_dir = 'output'
-    input_filename = 'all_marker_info.json'
-    output_filename = 'complex_details_by_district.json'
+    crawl_filters = normalize_crawl_filters(crawl_filters)
+    price_ceiling = crawl_filters['price_max'] if crawl_filters['price_max'] < UNBOUNDED else None
+    listing_targets = get_listing_targets(marker_info, crawl_filters)
+    trade_type_counts = {}
+    snapshot = {'counts': get_marker_counts(marker_info), 'fingerprint': None}
 
-    input_filepath = os.path.join(output_dir, input_filename)
-    input_abs_filepath = os.path.abspath(input_filepath) # 로그용
-    output_filepath = os.path.join(output_dir, output_filename)
-    output_abs_filepath = os.path.abspath(output_filepath) # 로그용
+    complex_articles = []
+    is_complete = True
+    page = 1
+    while True:
+        if is_cancelled(cancel_event):
+            print(f"Cancelled complex {complex_no} before page {page}.", file=sys.stderr)
+            is_complete = False
+            break
+        details, has_more_data = fetch_complex_details(complex_no, page, headers_env, cookies_env, cancel_event, crawl_filters)
+        if details is None: # 재시도 후에도 실패: '매물 없음'으로 취급하지 않고 불완전 수집으로 기록
+            print(f"Warning: Stopped complex {complex_no} ({complex_name}) at page {page} due to request failure. "
+                  f"Articles so far: {len(complex_articles)}.", file=sys.stderr)
+            is_complete = False
+            break
+        emit_progress(progress_callback, 'page_fetched', complex_no=complex_no, page=page, articles=len(details))
+        if page == 1:
+            snapshot['fingerprint'] = page_fingerprint(details)
+            if (previous_snapshot and previous_snapshot.get('counts') == snapshot['counts']
+                    and previous_snapshot.get('fingerprint') == snapshot['fingerprint']):
+                print(f"Complex {complex_no} ({complex_name}) unchanged since last snapshot. "
+                      f"Reusing {len(previous_snapshot.get('articles') or [])} articles.", file=sys.stderr)
+                previous_articles = list(previous_snapshot.get('articles') or [])
+                emit_progress(progress_callback, 'complex_done', complex_no=complex_no, articles=len(previous_articles))
+                return previous_articles, True, snapshot
 
-    print(f"Attempting to read marker info from: {input_abs_filepath} (relative: {input_filepath})", file=sys.stderr)
-    if not os.path.exists(input_filepath): # 상대 경로로 파일 존재 확인
-        print(f"Error: Input file '{input_filepath}' (abs: '{input_abs_filepath}') not found. Run fetch_marker_ids.py first.", file=sys.stderr)
-        sys.exit(1)
+        for detail_item in details:
+            detail_item.update(enrichment)
+            trade_type = detail_item.tradeTypeCode
+            trade_type_counts[trade_type] = trade_type_counts.get(trade_type, 0) + 1
+        complex_articles.extend(details)
 
-    try:
-        with open(input_filepath, 'r', encoding='utf-8') as file: # 상대 경로 사용
-            all_markers_data = json.load(file)
-    except Exception as e:
-        print(f"Error reading or parsing input file '{input_filepath}': {e}", file=sys.stderr)
-        sys.exit(1)
+        if not has_more_data or not details:
+            if page == 1 and not details:
+                print(f"No articles found for complex {complex_no} ({complex_name}).", file=sys.stderr)
+            else:
+                print(f"Finished fetching for complex {complex_no}. Articles: {len(complex_articles)}. Last page: {page}.", file=sys.stderr)
+            break
+        # 대비책: priceMax가 무시되어 상한 초과 매물이 내려온 경우, 가격순 목록이므로 이후 페이지는 모두 상한 초과
+        last_price = parse_price_manwon(details[-1].dealOrWarrantPrc)
+        if price_ceiling is not None and last_price is not None and last_price > price_ceiling:
+            print(f"Price ceiling ({price_ceiling}만원) reached for complex {complex_no} at page {page}. Stopping.", file=sys.stderr)
+            break
+        if listing_targets and all(trade_type_counts.get(trade_type, 0) >= target for trade_type, target in listing_targets.items()):
+            print(f"Collected cheapest {crawl_filters['max_listings_per_complex']} listings per trade type for complex {complex_no} "
+                  f"at page {page}. Stopping.", file=sys.stderr)
+            break
+        page += 1
+        if page > MAX_PAGES_PER_COMPLEX: # 최대 페이지 제한
+            print(f"Warning: Reached page limit ({MAX_PAGES_PER_COMPLEX}) for complex {complex_no}. Stopping.", file=sys.stderr)
+            break
 
-    if not isinstance(all_markers_data, dict):
-        print(f"Error: Expected input from '{input_filepath}' to be a dict, but got {type(all_markers_data)}.", file=sys.stderr)
-        sys.exit(1)
+    complex_articles = bound_articles(complex_articles, crawl_filters)
+    emit_progress(progress_callback, 'complex_done', complex_no=complex_no, articles=len(complex_articles))
+    return complex_articles, is_complete, (snapshot if is_complete else None)
 
-    complex_details_by_district_output = {} # 최종 출력용
-    total_articles_collected = 0
-    total_complexes_processed = 0
+def estimate_listing_count(marker_info, trade_types=None):
+    """
+    마커의 거래유형별 카운트(dealCount/leaseCount/rentCount) 중 trade_types(기본: 전체)에 해당하는 값의 합으로
+    단지의 매물 수를 추정합니다. 카운트 정보가 하나도 없거나 숫자가 아니면 None (알 수 없음)을 반환합니다.
+    """
+    trade_types = trade_types or list(TRADE_TYPE_COUNT_KEYS)
+    counts = [marker_info.get(TRADE_TYPE_COUNT_KEYS[trade_type]) for trade_type in trade_types if trade_type in TRADE_TYPE_COUNT_KEYS]
+    if all(count is None for count in counts):
+        return None
+    try:
+        return sum(int(count or 0) for count in counts)
+    except (TypeError, ValueError):
+        return None
 
-    for area_name_loop, markers_list_loop in all_markers_data.items(): # 변수명 충돌 방지
-        if not isinstance(markers_list_loop, list):
-            print(f"Warning: Skipping area '{area_name_loop}', marker data not a list (type: {type(markers_list_loop)}).", file=sys.stderr)
+def plan_crawl_tasks(crawl_tasks, crawl_filters=None):
+    """
+    (지역명, 마커 정보) 작업 목록으로 수집 계획을 세웁니다.
+    - crawl_filters에서 선택한 거래유형의 마커 카운트가 0인 단지는 요청하지 않고 건너뜁니다.
+    - 단지별 최저가 K건 조건이 있으면 추정 매물 수를 거래유형별 K건 이하로 잡습니다.
+    - 단지별 페이지 수를 ceil(매물 수 / ARTICLES_PER_PAGE)로 추정하고, 페이지가 많은 단지부터 수집하도록 정렬합니다
+      (긴 작업을 먼저 시작해 마지막 단지 때문에 늦어지는 꼬리 지연을 줄임). 카운트를 모르는 단지는 가장 앞에 둡니다.
+    반환값: ([(원래 순번, 지역명, 마커 정보, 추정 페이지 수 또는 None), ...], 건너뛴 단지 수)
+    """
+    crawl_filters = normalize_crawl_filters(crawl_filters)
+    planned_tasks = []
+    skipped_count = 0
+    for task_index, (area_name, marker_info) in enumerate(crawl_tasks):
+        listing_count = estimate_listing_count(marker_info, crawl_filters['trade_types'])
+        if listing_count == 0:
+            skipped_count += 1
             continue
+        listing_targets = get_listing_targets(marker_info, crawl_filters)
+        if listing_count is not None and listing_targets:
+            listing_count = min(listing_count, sum(listing_targets.values()))
+        estimated_pages = None if listing_count is None else min(MAX_PAGES_PER_COMPLEX, math.ceil(listing_count / ARTICLES_PER_PAGE))
+        planned_tasks.append((task_index, area_name, marker_info, estimated_pages))
 
-        print(f"Collecting details for area: {area_name_loop}", file=sys.stderr)
-        area_complex_details_list = [] # 현재 지역 상세 정보 리스트, 변수명 변경
+    planned_tasks.sort(key=lambda task: -(task[3] if task[3] is not None else MAX_PAGES_PER_COMPLEX + 1))
+    estimated_requests = sum(task[3] or 1 for task in planned_tasks)
+    print(f"Crawl plan: {len(planned_tasks)} complexes to fetch (~{estimated_requests} page requests), "
+          f"{skipped_count} skipped with no listings.", file=sys.stderr)
+    return planned_tasks, skipped_count
+
+def collect_complex_details(all_markers_data, headers_env, cookies_env, max_workers=DEFAULT_MAX_WORKERS,
+                            cancel_event=None, progress_callback=None, crawl_filters=None, previous_snapshots=None):
+    """
+    {지역명: [마커 정보, ...]} 형태의 마커 데이터를 받아 지역별 매물 상세 정보를 수집합니다.
+    최대 max_workers개의 단지를 스레드 풀에서 동시에 수집하며, 단지 내 페이지 순서와
+    지역별 단지 순서(입력 순서)는 그대로 유지됩니다. 매물이 없는 단지는 건너뛰고, 페이지가 많은 단지부터 수집합니다 (plan_crawl_tasks).
+    cancel_event가 설정되면 진행 중인 단지는 다음 페이지 요청 전에, 대기 중인 단지는 시작 전에 중단됩니다.
+    crawl_filters(조회 조건)는 모든 매물 요청의 API 파라미터와 수집 계획(선택한 거래유형의 매물 수)에 적용됩니다.
+    progress_callback이 있으면 작업 목록이 정해질 때 'complexes_planned' 이벤트와 단지별 진행 이벤트를 보냅니다.
+    previous_snapshots({markerId: {'counts', 'fingerprint', 'articles'}})가 있으면 바뀌지 않은 단지는
+    첫 페이지만 확인하고 이전 매물을 재사용합니다 (증분 재수집: 비용이 시장 규모가 아닌 변동량에 비례).
+    반환값: ({지역명: [Article, ...]}, 수집한 단지 수, 요청 실패로 일부만 수집된 단지 번호 목록,
+            {markerId: 단지 스냅샷} (다음 증분 재수집의 previous_snapshots 비교 기준))
+    """
+    # 1. 유효한 단지만 골라 (지역명, 마커 정보) 작업 목록 구성
+    crawl_tasks = []
+    for area_name, markers_list in all_markers_data.items():
+        if not isinstance(markers_list, list):
+            print(f"Warning: Skipping area '{area_name}', marker data not a list (type: {type(markers_list)}).", file=sys.stderr)
+            continue
 
-        for marker_info_loop in markers_list_loop: # 변수명 충돌 방지
-            if not isinstance(marker_info_loop, dict):
-                print(f"Warning: Skipping invalid marker (not a dict) in '{area_name_loop}': {marker_info_loop}", file=sys.stderr)
+        print(f"Collecting details for area: {area_name} ({len(markers_list)} markers)", file=sys.stderr)
+        for marker_info in markers_list:
+            if not isinstance(marker_info, dict):
+                print(f"Warning: Skipping invalid marker (not a dict) in '{area_name}': {marker_info}", file=sys.stderr)
                 continue
+            if not marker_info.get('markerId'):
+                print(f"Warning: Skipping marker due to missing 'markerId' in '{area_name}': {marker_info}", file=sys.stderr)
+                continue
+            crawl_tasks.append((area_name, marker_info))
+
+    # 2. 수집 계획: 매물 없는 단지 제외, 큰 단지부터
+    crawl_filters = normalize_crawl_filters(crawl_filters)
+    planned_tasks, skipped_count = plan_crawl_tasks(crawl_tasks, crawl_filters)
+    emit_progress(progress_callback, 'complexes_planned', total=len(planned_tasks), skipped=skipped_count)
 
-            complex_no_loop = marker_info_loop.get('markerId') # 변수명 변경
-            latitude_loop = marker_info_loop.get('latitude') # 변수명 변경
-            longitude_loop = marker_info_loop.get('longitude') # 변수명 변경
-            completionYearMonth_loop = marker_info_loop.get('completionYearMonth', '') # 변수명 변경
-            totalHouseholdCount_loop = marker_info_loop.get('totalHouseholdCount', 0) # 변수명 변경
-            divisionName_loop = marker_info_loop.get('divisionName', '') # 변수명 변경
-            cortarName_loop = marker_info_loop.get('cortarName', '') # 변수명 변경
-            complexName_loop = marker_info_loop.get('complexName', '') # 변수명 변경
-
-            if not complex_no_loop:
-                print(f"Warning: Skipping marker due to missing 'markerId' in '{area_name_loop}': {marker_info_loop}", file=sys.stderr)
+    # 3. 단지 단위로 동시 수집 (제출은 계획 순서, 결과는 원래 작업 목록 순서대로 취합)
+    area_articles = {area_name: [] for area_name, _ in crawl_tasks}
+    incomplete_complexes = []
+    complex_snapshots = {}
+    reused_count = 0
+    previous_snapshots = previous_snapshots or {}
+    max_workers = max(1, int(max_workers or 1))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="complex_crawler") as executor:
+        futures_by_index = {
+            task_index: executor.submit(collect_complex_articles, marker_info, headers_env, cookies_env,
+                                        cancel_event, progress_callback, crawl_filters,
+                                        previous_snapshots.get(marker_info.get('markerId')))
+            for task_index, _, marker_info, _ in planned_tasks
+        }
+        for task_index, (area_name, marker_info) in enumerate(crawl_tasks):
+            future = futures_by_index.get(task_index)
+            if future is None: # 매물이 없어 건너뛴 단지
                 continue
+            complex_no = marker_info.get('markerId')
+            try:
+                complex_articles, is_complete, snapshot = future.result()
+            except Exception as e:
+                print(f"Error collecting complex {complex_no} in {area_name}: {e}", file=sys.stderr)
+                complex_articles, is_complete, snapshot = [], False, None
+            if not is_complete and not is_cancelled(cancel_event):
+                incomplete_complexes.append(complex_no)
+            if snapshot:
+                complex_snapshots[complex_no] = snapshot
+                previous_snapshot = previous_snapshots.get(complex_no)
+                if previous_snapshot and all(previous_snapshot.get(field) == snapshot[field] for field in ('counts', 'fingerprint')):
+                    reused_count += 1
+            area_articles[area_name].extend(complex_articles)
 
-            print(f"Processing complex: {complexName_loop} ({complex_no_loop}) in {area_name_loop}...", file=sys.stderr)
-            total_complexes_processed += 1
-            complex_article_count_loop = 0 # 변수명 변경
-            page_loop = 1 # 변수명 변경
-
-            while True:
-                # fetch_complex_details 호출 시 환경 변수에서 가져온 headers와 cookies 전달
-                details_loop, has_more_data_loop = fetch_complex_details(
-                    complex_no_loop, page_loop, headers_from_env, cookies_from_env
-                ) # 변수명 변경
-
-                if details_loop:
-                    for detail_item in details_loop: # 변수명 변경
-                        if isinstance(detail_item, dict):
-                            detail_item['markerId'] = complex_no_loop
-                            detail_item['latitude'] = latitude_loop
-                            detail_item['longitude'] = longitude_loop
-                            detail_item['completionYearMonth'] = completionYearMonth_loop
-                            detail_item['totalHouseholdCount'] = totalHouseholdCount_loop
-                            detail_item['divisionName'] = divisionName_loop
-                            detail_item['cortarName'] = cortarName_loop
-                        else:
-                            print(f"Warning: Non-dict item in articleList for {complex_no_loop}, page {page_loop}: {detail_item}", file=sys.stderr)
-                    area_complex_details_list.extend(details_loop)
-                    complex_article_count_loop += len(details_loop)
-
-                if not has_more_data_loop or not details_loop:
-                    if page_loop == 1 and not details_loop:
-                        print(f"No articles found for complex {complex_no_loop} ({complexName_loop}).", file=sys.stderr)
-                    else:
-                        print(f"Finished fetching for complex {complex_no_loop}. Articles: {complex_article_count_loop}. Last page: {page_loop}.", file=sys.stderr)
-                    break 
-                page_loop += 1
-                if page_loop > 50: # 최대 페이지 제한
-                    print(f"Warning: Reached page limit (50) for complex {complex_no_loop}. Stopping.", file=sys.stderr)
-                    break
-                time.sleep(0.05) # API 요청 간 짧은 지연 (필요시 조절)
-
-        if area_complex_details_list:
-            complex_details_by_district_output[area_name_loop] = area_complex_details_list
-            total_articles_collected += len(area_complex_details_list)
-            print(f"Finished for area: {area_name_loop}. Total articles: {len(area_complex_details_list)}", file=sys.stderr)
+    # 4. 매물이 있는 지역만 결과에 포함
+    complex_details_by_district = {}
+    for area_name, articles in area_articles.items():
+        if articles:
+            complex_details_by_district[area_name] = articles
+            print(f"Finished for area: {area_name}. Total articles: {len(articles)}", file=sys.stderr)
         else:
-            print(f"No details collected for area: {area_name_loop}.", file=sys.stderr)
+            print(f"No details collected for area: {area_name}.", file=sys.stderr)
 
-    if complex_details_by_district_output:
+    if previous_snapshots:
+        print(f"Incremental refresh: {reused_count} of {len(planned_tasks)} complexes unchanged, "
+              f"{len(planned_tasks) - reused_count} re-crawled.", file=sys.stderr)
+    if incomplete_complexes:
+        print(f"Warning: {len(incomplete_complexes)} complexes were only partially collected: {incomplete_complexes}", file=sys.stderr)
+    return complex_details_by_district, len(planned_tasks), incomplete_complexes, complex_snapshots
+
+def main():
+    """
+    CLI 진입점: all_marker_info.json을 읽어 매물 상세 정보를 수집하고
+    complex_details_by_district.parquet(areaKey 열로 지역 구분, --output-format json이면 .json)으로 저장합니다.
+    반환값은 프로세스 종료 코드입니다.
+    """
+    print(f"Executing collect_complex_details.py from CWD: {os.getcwd()}", file=sys.stderr)
+    parser = argparse.ArgumentParser(description="Naver Land 단지별 매물 상세 정보 수집")
+    parser.add_argument('--output-dir', default='output', help="입력/결과 파일이 위치한 작업 디렉토리 (기본값: output)")
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f"동시에 수집할 단지 수 (기본값: {DEFAULT_MAX_WORKERS})")
+    parser.add_argument('--output-format', choices=('parquet', 'json'), default='parquet',
+                        help="결과 파일 형식 (기본값: parquet)")
+    parser.add_argument('--crawl-filters', type=json.loads, default=None,
+                        help='조회 조건 JSON (예: \'{"trade_types": ["A1", "B1"], "price_max": 150000}\')')
+    args = parser.parse_args()
+    output_dir = args.output_dir
+
+    # 환경 변수에서 Header와 Cookie 정보 가져오기
+    headers_from_env, cookies_from_env = get_config_from_env()
+    if not headers_from_env or not cookies_from_env:
+        print("Warning (collect_complex_details): Headers or Cookies could not be loaded from environment variables.", file=sys.stderr)
+        print("API requests to Naver Land might fail or be incomplete.", file=sys.stderr)
+
+    input_filepath = os.path.join(output_dir, 'all_marker_info.json')
+    output_filepath = os.path.join(output_dir, f'complex_details_by_district.{args.output_format}')
+    output_abs_filepath = os.path.abspath(output_filepath) # 로그용
+
+    print(f"Attempting to read marker info from: {os.path.abspath(input_filepath)} (relative: {input_filepath})", file=sys.stderr)
+    if not os.path.exists(input_filepath):
+        print(f"Error: Input file '{input_filepath}' not found. Run fetch_marker_ids.py first.", file=sys.stderr)
+        return 1
+
+    try:
+        with open(input_filepath, 'r', encoding='utf-8') as file:
+            all_markers_data = json.load(file)
+    except Exception as e:
+        print(f"Error reading or parsing input file '{input_filepath}': {e}", file=sys.stderr)
+        return 1
+
+    if not isinstance(all_markers_data, dict):
+        print(f"Error: Expected input from '{input_filepath}' to be a dict, but got {type(all_markers_data)}.", file=sys.stderr)
+        return 1
+
+    complex_details_output, total_complexes_processed, incomplete_complexes, _ = collect_complex_details(
+        all_markers_data, headers_from_env, cookies_from_env, max_workers=args.max_workers,
+        crawl_filters=args.crawl_filters
+    )
+    total_articles_collected = sum(len(articles) for articles in complex_details_output.values())
+    if complex_details_output:
         print(f"Saving {total_articles_collected} articles from {total_complexes_processed} complexes", file=sys.stderr)
-        print(f"Writing to: {output_abs_filepath} (relative: {output_filepath})", file=sys.stderr)
-        try:
-            os.makedirs(output_dir, exist_ok=True)
-            with open(output_filepath, 'w', encoding='utf-8') as file:
-                json.dump(complex_details_by_district_output, file, ensure_ascii=False, indent=4)
-            print(f"Complex details saved to '{output_abs_filepath}'", file=sys.stderr)
-        except Exception as e:
-            print(f"Error writing output file '{output_filepath}': {e}", file=sys.stderr)
-            sys.exit(1)
     else:
-        print("No complex details collected overall. Initializing/Clearing JSON file.", file=sys.stderr)
-        try:
-            # 기존 파일이 있으면 빈 JSON 객체로 덮어쓰기
-            os.makedirs(output_dir, exist_ok=True)
-            with open(output_filepath, 'w', encoding='utf-8') as file:
-                json.dump({}, file, ensure_ascii=False, indent=4)
-            print(f"Initialized/Cleared JSON file at '{output_abs_filepath}'.", file=sys.stderr)
-        except Exception as e:
-            print(f"Error initializing JSON file '{output_filepath}': {e}", file=sys.stderr)
-            sys.exit(1)
-        
-        # 처리 시도는 했으나 결과가 없는 경우 (복잡한 단지는 처리했으나 매물이 하나도 없음)
-        if total_articles_collected == 0 and total_complexes_processed > 0:
-            sys.exit(1)  # 실패로 간주
+        print("No complex details collected overall. Initializing/Clearing output file.", file=sys.stderr)
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        if args.output_format == 'parquet':
+            write_articles_parquet(districts_to_table(complex_details_output), output_filepath)
         else:
-            sys.exit(0)  # 처리할 데이터 자체가 없었을 경우 정상 종료
+            with open(output_filepath, 'w', encoding='utf-8') as file:
+                json.dump({area_name: [article.to_dict() if isinstance(article, Article) else article for article in articles]
+                           for area_name, articles in complex_details_output.items()}, file, ensure_ascii=False)
+        print(f"Complex details saved to '{output_abs_filepath}'", file=sys.stderr)
+    except Exception as e:
+        print(f"Error writing output file '{output_filepath}': {e}", file=sys.stderr)
+        return 1
 
+    # 처리 시도는 했으나 결과가 없는 경우 (단지는 처리했으나 매물이 하나도 없음) 또는 일부 단지 수집 실패는 실패로 간주
+    if total_articles_collected == 0 and total_complexes_processed > 0:
+        return 1
+    if incomplete_complexes:
+        print(f"Error: Incomplete results for complexes {incomplete_complexes} (rate limited or server errors).", file=sys.stderr)
+        return 1
     print("Script finished successfully.", file=sys.stderr)
-    sys.exit(0)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
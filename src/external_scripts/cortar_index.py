@@ -0,0 +1,140 @@
+# your_project_directory/src/external_scripts/cortar_index.py
+import os
+import sys
+import json
+import math
+import tempfile
+import threading
+
+try:
+    from .geo_utils import points_in_polygon
+    from .geocode_cache import CACHE_DIR
+except ImportError: # 스크립트 단독 실행 시 (python src/external_scripts/cortar_index.py)
+    from geo_utils import points_in_polygon
+    from geocode_cache import CACHE_DIR
+
+DEFAULT_INDEX_PATH = os.path.join(CACHE_DIR, 'cortar_index.json')
+GRID_CELL_SIZE = 0.01 # 격자 한 칸의 크기 (도 단위, 약 1km)
+
+
+def _ring_bounds(vertex_lists):
+    """cortarVertexLists 전체의 (min_lat, min_lng, max_lat, max_lng)를 계산합니다. 실패 시 None."""
+    points = [point for ring in vertex_lists or [] for point in ring
+              if isinstance(point, (list, tuple)) and len(point) == 2]
+    if len(points) < 3:
+        return None
+    lats = [float(point[0]) for point in points]
+    lngs = [float(point[1]) for point in points]
+    return min(lats), min(lngs), max(lats), max(lngs)
+
+
+class CortarIndex:
+    """
+    지금까지 조회한 cortar(동) 다각형을 cortarNo로 보관하고, 균일 격자로 좌표 -> cortar를 빠르게 찾는 공간 인덱스.
+    파일(output/cache/cortar_index.json)에 저장되어 재시작 후에도 유지되며, 새 지역을 방문할 때마다 커집니다.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, cell_size=GRID_CELL_SIZE):
+        self.path = path
+        self.cell_size = cell_size
+        self._cortars = {}  # {cortarNo: cortars_info}
+        self._bounds = {}   # {cortarNo: (min_lat, min_lng, max_lat, max_lng)}
+        self._grid = {}     # {(lat_cell, lng_cell): [cortarNo, ...]}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._cortars)
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / self.cell_size), math.floor(lng / self.cell_size)
+
+    def _insert(self, cortars_info):
+        """메모리 인덱스에 추가합니다. 다각형이 유효하지 않으면 False."""
+        cortar_no = cortars_info.get('cortarNo') if isinstance(cortars_info, dict) else None
+        bounds = _ring_bounds(cortars_info.get('cortarVertexLists')) if cortar_no else None
+        if not bounds:
+            return False
+
+        if cortar_no in self._cortars: # 기존 항목 교체 시 격자에서 먼저 제거
+            for cell_members in self._grid.values():
+                if cortar_no in cell_members:
+                    cell_members.remove(cortar_no)
+        self._cortars[cortar_no] = cortars_info
+        self._bounds[cortar_no] = bounds
+
+        min_lat_cell, min_lng_cell = self._cell(bounds[0], bounds[1])
+        max_lat_cell, max_lng_cell = self._cell(bounds[2], bounds[3])
+        for lat_cell in range(min_lat_cell, max_lat_cell + 1):
+            for lng_cell in range(min_lng_cell, max_lng_cell + 1):
+                self._grid.setdefault((lat_cell, lng_cell), []).append(cortar_no)
+        return True
+
+    def load(self):
+        """파일에서 인덱스를 읽어 옵니다. 파일이 없거나 손상되었으면 빈 인덱스로 시작합니다."""
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except Exception as e:
+            print(f"Warning (cortar_index): Could not load '{self.path}': {e}. Starting with an empty index.", file=sys.stderr)
+            return self
+        with self._lock:
+            for cortars_info in (stored.get('cortars') or {}).values():
+                self._insert(cortars_info)
+        print(f"Cortar index loaded: {len(self)} regions from '{self.path}'", file=sys.stderr)
+        return self
+
+    def save(self):
+        """인덱스를 임시 파일에 쓴 뒤 교체하여 원자적으로 저장합니다. 다른 프로세스가 추가한 지역은 병합합니다."""
+        with self._lock:
+            try:
+                on_disk = CortarIndex(self.path, self.cell_size).load()
+                for cortar_no, cortars_info in on_disk._cortars.items():
+                    if cortar_no not in self._cortars:
+                        self._insert(cortars_info)
+
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'cortars': self._cortars}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Warning (cortar_index): Could not save '{self.path}': {e}", file=sys.stderr)
+
+    def add(self, cortars_info, save=True):
+        """새로 조회한 cortar 정보를 인덱스에 추가하고 (기본) 파일에 저장합니다."""
+        with self._lock:
+            added = self._insert(cortars_info)
+        if added and save:
+            self.save()
+        return added
+
+    def lookup(self, lat, lng):
+        """좌표가 속한 cortar 정보를 반환합니다. 알려진 다각형에 없으면 None."""
+        try:
+            lat, lng = float(lat), float(lng)
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            for cortar_no in self._grid.get(self._cell(lat, lng), []):
+                min_lat, min_lng, max_lat, max_lng = self._bounds[cortar_no]
+                if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+                    continue
+                cortars_info = self._cortars[cortar_no]
+                if points_in_polygon([lat], [lng], cortars_info.get('cortarVertexLists'))[0]:
+                    return cortars_info
+        return None
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_cortar_index():
+    """프로세스 전체에서 공유하는 CortarIndex를 반환합니다. 처음 호출될 때 파일에서 읽어 옵니다."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = CortarIndex().load()
+        return _default_index
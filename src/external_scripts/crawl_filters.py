@@ -0,0 +1,112 @@
+# your_project_directory/src/external_scripts/crawl_filters.py
+# 사용자 조회 조건(거래유형, 가격/면적 범위, 최소 세대수)을 네이버 부동산 API 파라미터로 변환합니다.
+# 매물 목록은 가격순(order=prc)으로 내려오므로, 단지별 최저가 K건 조건으로 페이지 수집을 일찍 끝낼 수 있습니다 (가격 상한은 priceMax로 서버에서 적용).
+import re
+
+TRADE_TYPE_CODES = {'매매': 'A1', '전세': 'B1', '월세': 'B2'}
+# 마커 응답에서 거래유형별 매물 수가 담긴 키
+TRADE_TYPE_COUNT_KEYS = {'A1': 'dealCount', 'B1': 'leaseCount', 'B2': 'rentCount'}
+UNBOUNDED = 900000000 # API가 '제한 없음'으로 사용하는 최대값
+
+DEFAULT_CRAWL_FILTERS = {
+    'trade_types': ['A1', 'B1', 'B2'], # 거래유형 코드 (전체)
+    'price_min': 0, 'price_max': UNBOUNDED, # 만원 단위 (매매가 / 전세·월세 보증금)
+    'area_min': 0, 'area_max': UNBOUNDED,   # ㎡ 단위
+    'min_households': 300,                   # 최소 세대수
+    'max_listings_per_complex': 0,           # 단지별 거래유형마다 최저가 K건만 수집 (0 = 전체)
+}
+
+
+def normalize_crawl_filters(crawl_params=None):
+    """
+    조회 조건 딕셔너리를 기본값으로 채우고 정규화합니다 (거래유형 코드 순서 고정, 숫자 변환).
+    같은 조건이면 입력 순서와 관계없이 같은 딕셔너리가 되므로 캐시 키로 사용할 수 있습니다.
+    """
+    filters = dict(DEFAULT_CRAWL_FILTERS)
+    filters.update({key: value for key, value in (crawl_params or {}).items() if value is not None})
+
+    trade_types = filters.get('trade_types') or DEFAULT_CRAWL_FILTERS['trade_types']
+    if isinstance(trade_types, str):
+        trade_types = trade_types.split(':')
+    codes = {TRADE_TYPE_CODES.get(trade_type, trade_type) for trade_type in trade_types}
+    filters['trade_types'] = [code for code in TRADE_TYPE_COUNT_KEYS if code in codes] or list(DEFAULT_CRAWL_FILTERS['trade_types'])
+
+    for key in ('price_min', 'price_max', 'area_min', 'area_max', 'min_households', 'max_listings_per_complex'):
+        try:
+            filters[key] = max(0, int(filters[key]))
+        except (TypeError, ValueError):
+            filters[key] = DEFAULT_CRAWL_FILTERS[key]
+    return filters
+
+
+def apply_crawl_filters(params, crawl_filters=None):
+    """
+    API 요청 파라미터(params)에 조회 조건을 적용한 새 딕셔너리를 반환합니다.
+    거래유형이 전체이면 tradeType은 기존과 같이 빈 값으로 보냅니다.
+    """
+    filters = normalize_crawl_filters(crawl_filters)
+    all_trade_types = len(filters['trade_types']) == len(TRADE_TYPE_COUNT_KEYS)
+    updated_params = dict(params)
+    updated_params.update({
+        'tradeType': '' if all_trade_types else ':'.join(filters['trade_types']),
+        'priceMin': filters['price_min'], 'priceMax': filters['price_max'],
+        'areaMin': filters['area_min'], 'areaMax': filters['area_max'],
+        'minHouseHoldCount': filters['min_households'] or '',
+    })
+    return updated_params
+
+
+def parse_price_manwon(price_str):
+    """
+    매물 가격 문자열('12억 5,000', '9,000', '3억')을 만원 단위 정수로 변환합니다.
+    월세('1억/120')는 보증금만 사용하며, 변환할 수 없으면 None을 반환합니다.
+    """
+    if price_str is None:
+        return None
+    text = str(price_str).split('/')[0].replace(',', '').replace(' ', '')
+    match = re.fullmatch(r'(?:(\d+)억)?(\d+)?', text)
+    if not text or not match:
+        return None
+    eok, man = match.groups()
+    return int(eok or 0) * 10000 + int(man or 0)
+
+
+def get_listing_targets(marker_info, crawl_filters=None):
+    """
+    max_listings_per_complex(K)가 설정되어 있으면 단지에서 거래유형별로 모아야 할 매물 수를 반환합니다.
+    마커 카운트가 K보다 적은 거래유형은 그 카운트가 목표가 됩니다. K가 0이면 None (제한 없음).
+    """
+    filters = normalize_crawl_filters(crawl_filters)
+    limit = filters['max_listings_per_complex']
+    if not limit:
+        return None
+    targets = {}
+    for trade_type in filters['trade_types']:
+        try:
+            count = int(marker_info.get(TRADE_TYPE_COUNT_KEYS[trade_type]))
+        except (TypeError, ValueError):
+            count = limit # 카운트를 모르면 K건을 목표로 함
+        targets[trade_type] = min(limit, count)
+    return targets
+
+
+def bound_articles(articles, crawl_filters=None):
+    """
+    가격순으로 모은 매물 목록에서 가격 상한을 넘는 매물을 빼고, 거래유형별 최저가 K건만 남깁니다.
+    가격을 해석할 수 없는 매물은 상한 판단에서 제외하고 그대로 둡니다.
+    """
+    filters = normalize_crawl_filters(crawl_filters)
+    price_ceiling = filters['price_max'] if filters['price_max'] < UNBOUNDED else None
+    limit = filters['max_listings_per_complex']
+    kept_articles = []
+    kept_counts = {}
+    for article in articles:
+        price = parse_price_manwon(article.get('dealOrWarrantPrc'))
+        if price_ceiling is not None and price is not None and price > price_ceiling:
+            continue
+        trade_type = article.get('tradeTypeCode')
+        if limit and kept_counts.get(trade_type, 0) >= limit:
+            continue
+        kept_counts[trade_type] = kept_counts.get(trade_type, 0) + 1
+        kept_articles.append(article)
+    return kept_articles
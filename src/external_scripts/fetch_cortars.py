@@ -4,6 +4,11 @@ import json
 import pprint
 import sys
 import os # os 모듈 임포트
+import argparse
+try:
+    from .naver_http import get_land_session, throttled_get
+except ImportError: # 스크립트 단독 실행 시 (python src/external_scripts/fetch_cortars.py)
+    from naver_http import get_land_session, throttled_get
 
 # header와 cookie 정보는 환경 변수로부터 가져옵니다.
 def get_config_from_env():
@@ -45,8 +50,9 @@ def get_config_from_env():
 def fetch_cortars(params, headers_env, cookies_env): # 인자로 headers와 cookies를 받도록 수정
     """지정된 파라미터로 Naver Land API에서 Cortar 정보를 가져옵니다."""
     try:
-        # 함수 호출 시 전달받은 headers_env, cookies_env 사용
-        response = requests.get('https://new.land.naver.com/api/cortars', params=params, cookies=cookies_env, headers=headers_env, timeout=10)
+        # headers_env, cookies_env가 미리 설정된 공유 세션(keep-alive 연결 풀) 사용
+        session = get_land_session(headers_env, cookies_env)
+        response = throttled_get(session, 'https://new.land.naver.com/api/cortars', params=params, timeout=10)
         response.raise_for_status() # HTTP 오류 발생 시 예외 발생
 
         response_data = response.json()
@@ -89,95 +95,76 @@ def fetch_cortars(params, headers_env, cookies_env): # 인자로 headers와 cook
         print(f"An unexpected error occurred in fetch_cortars: {e}", file=sys.stderr)
         return None
 
-if __name__ == "__main__":
-    project_root_cwd = os.getcwd() # 현재 작업 디렉토리 가져오기
-    print(f"Executing fetch_cortars.py from CWD: {project_root_cwd}")
-
-    output_dir = 'output' # 출력 디렉토리, 필요시 CWD 기준으로 상대 경로 사용 가능
+def save_cortars_info(cortars_info, output_dir):
+    """
+    Cortar 정보를 output_dir/cortars_info.json 파일로 저장합니다.
+    cortars_info가 비어 있으면 빈 JSON 객체로 파일을 초기화합니다.
+    성공 시 True, 실패 시 False를 반환합니다.
+    """
+    output_filepath = os.path.join(output_dir, 'cortars_info.json')
+    output_abs_filepath = os.path.abspath(output_filepath) # 로그용
+    try:
+        os.makedirs(output_dir, exist_ok=True) # output 디렉토리 생성 (이미 있어도 에러 안남)
+        with open(output_filepath, 'w', encoding='utf-8') as file:
+            json.dump(cortars_info or {}, file, ensure_ascii=False, indent=4)
+        if cortars_info:
+            display_name = f"{cortars_info.get('divisionName', 'Unknown_Division')} {cortars_info.get('cortarName', 'Unknown_Cortar')}".strip()
+            print(f"Cortars info for '{display_name}' collected and saved to '{output_abs_filepath}'")
+        else:
+            print(f"Initialized/Cleared JSON file at '{output_abs_filepath}'.", file=sys.stderr)
+        return True
+    except IOError as e:
+        print(f"Error writing cortars info to file '{output_abs_filepath}': {e}", file=sys.stderr)
+        return False
+    except Exception as e:
+        print(f"An unexpected error occurred while writing cortars info: {e}", file=sys.stderr)
+        return False
 
-    # 스크립트 직접 실행 시에도 환경 변수에서 config 가져오기
+def main():
+    """
+    CLI 진입점: 파라미터 파일을 읽어 fetch_cortars를 실행하고 결과를 파일로 저장합니다.
+    앱에서는 data_handling.fetch_data가 fetch_cortars를 직접 호출하므로 이 경로를 거치지 않습니다.
+    반환값은 프로세스 종료 코드입니다.
+    """
+    print(f"Executing fetch_cortars.py from CWD: {os.getcwd()}")
+    parser = argparse.ArgumentParser(description="Naver Land cortars 정보 수집")
+    parser.add_argument('params_file', help="조회 파라미터 JSON 파일 경로")
+    parser.add_argument('--output-dir', default='output', help="결과 파일을 저장할 작업 디렉토리 (기본값: output)")
+    args = parser.parse_args()
+    output_dir = args.output_dir
+
+    # 스크립트 직접 실행 시에는 환경 변수에서 config 가져오기
     headers_from_env, cookies_from_env = get_config_from_env()
-
     if not headers_from_env or not cookies_from_env:
         print("Warning: Headers or Cookies could not be loaded from environment variables for standalone execution.", file=sys.stderr)
         print("API requests might fail or be incomplete.", file=sys.stderr)
-        # 여기서 스크립트를 종료할 수도 있지만, 일단 진행하도록 둡니다.
-        # sys.exit(1)
-
-    if len(sys.argv) > 1:
-        params_file_rel_path = sys.argv[1]
-        # params_file_abs_path는 CWD 기준으로 절대 경로를 만듭니다.
-        # data_handling.py에서 cwd를 프로젝트 루트로 설정하므로, 여기서도 동일한 가정을 합니다.
-        params_file_abs_path = os.path.abspath(params_file_rel_path) 
-
-        print(f"Attempting to read params from: {params_file_abs_path}")
 
-        if not os.path.exists(params_file_abs_path):
-            print(f"Error: Parameter file not found at '{params_file_abs_path}'", file=sys.stderr)
-            sys.exit(1)
+    params_file_abs_path = os.path.abspath(args.params_file)
+    print(f"Attempting to read params from: {params_file_abs_path}")
+    if not os.path.exists(params_file_abs_path):
+        print(f"Error: Parameter file not found at '{params_file_abs_path}'", file=sys.stderr)
+        return 1
 
-        try:
-            with open(params_file_abs_path, 'r', encoding='utf-8') as f:
-                params_main = json.load(f) # 변수명 변경 (params -> params_main)
-        except json.JSONDecodeError:
-            print(f"Error: Failed to parse JSON from parameter file '{params_file_abs_path}'", file=sys.stderr)
-            sys.exit(1)
-        except IOError as e:
-            print(f"Error reading parameter file '{params_file_abs_path}': {e}", file=sys.stderr)
-            sys.exit(1)
-        except Exception as e:
-            print(f"An unexpected error occurred while reading params file: {e}", file=sys.stderr)
-            sys.exit(1)
-
-        # fetch_cortars 함수에 환경변수에서 가져온 headers와 cookies 전달
-        cortars_info_main = fetch_cortars(params_main, headers_from_env, cookies_from_env) # 변수명 변경
-        # 출력 파일 경로도 CWD 기준으로 output 디렉토리 안에 저장
-        output_filename = 'cortars_info.json'
-        # output_dir이 상대 경로인 경우, CWD를 기준으로 경로가 결정됩니다.
-        # data_handling.py와 일관성을 위해 os.path.join을 사용합니다.
-        output_filepath = os.path.join(output_dir, output_filename) 
-        # 절대 경로는 로그용으로만 사용
-        output_abs_filepath = os.path.abspath(output_filepath)
-
-        if cortars_info_main:
-
-            print(f"Attempting to write cortars info to: {output_abs_filepath} (relative path used: {output_filepath})")
-
-            division_name = cortars_info_main.get('divisionName', 'Unknown_Division')
-            cortar_name = cortars_info_main.get('cortarName', 'Unknown_Cortar')
-            display_name = f"{division_name} {cortar_name}".strip()
-
-            try:
-                # output 디렉토리가 CWD 내에 없다면 생성
-                # data_handling.py에서 cwd를 프로젝트 루트로 설정하고 output 디렉토리를 생성할 것이므로
-                # 이 스크립트가 직접 output 디렉토리를 생성해야 할 수도 있습니다.
-                # 하지만 보통 data_handling.py에 의해 이미 생성되어 있을 것입니다.
-                # 안전을 위해 여기서도 확인 및 생성 로직을 추가할 수 있습니다.
-                os.makedirs(output_dir, exist_ok=True) # output 디렉토리 생성 (이미 있어도 에러 안남)
+    try:
+        with open(params_file_abs_path, 'r', encoding='utf-8') as f:
+            params_main = json.load(f)
+    except json.JSONDecodeError:
+        print(f"Error: Failed to parse JSON from parameter file '{params_file_abs_path}'", file=sys.stderr)
+        return 1
+    except IOError as e:
+        print(f"Error reading parameter file '{params_file_abs_path}': {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"An unexpected error occurred while reading params file: {e}", file=sys.stderr)
+        return 1
 
-                with open(output_filepath, 'w', encoding='utf-8') as file: # 상대 경로 사용
-                    json.dump(cortars_info_main, file, ensure_ascii=False, indent=4)
-                print(f"Cortars info for '{display_name}' collected and saved to '{output_abs_filepath}'")
-            except IOError as e:
-                print(f"Error writing cortars info to file '{output_abs_filepath}': {e}", file=sys.stderr)
-                sys.exit(1)
-            except Exception as e:
-                print(f"An unexpected error occurred while writing cortars info: {e}", file=sys.stderr)
-                sys.exit(1)
-        else:
-            print("No cortars data collected or an error occurred during fetching.", file=sys.stderr)            
-            try:
-                # 기존 파일이 있으면 빈 JSON 객체로 덮어쓰기
-                os.makedirs(output_dir, exist_ok=True)
-                with open(output_filepath, 'w', encoding='utf-8') as file:
-                    json.dump({}, file, ensure_ascii=False, indent=4)
-                print(f"Initialized/Cleared JSON file at '{output_abs_filepath}'.", file=sys.stderr)
-            except Exception as e:
-                print(f"Error initializing JSON file '{output_filepath}': {e}", file=sys.stderr)
-                sys.exit(1)
-    else:
-        print("Error: No parameter file path provided as command-line argument.", file=sys.stderr)
-        print("Usage: python fetch_cortars.py <path_to_params.json>", file=sys.stderr)
-        sys.exit(1)
+    cortars_info_main = fetch_cortars(params_main, headers_from_env, cookies_from_env)
+    if not cortars_info_main:
+        print("No cortars data collected or an error occurred during fetching.", file=sys.stderr)
+    # 수집 실패 시에도 기존 파일은 빈 JSON 객체로 덮어씁니다 (이전 결과가 남지 않도록).
+    if not save_cortars_info(cortars_info_main, output_dir):
+        return 1
+    return 0
 
-    sys.exit(0) # 성공 시 종료 코드 0
+if __name__ == "__main__":
+    sys.exit(main())
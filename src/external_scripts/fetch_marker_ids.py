@@ -2,11 +2,28 @@
 import requests
 import json
 import pprint
-import time
 import sys
 import os
+import argparse
+try:
+    from .naver_http import get_land_session, get_geocode_session, is_cancelled, emit_progress, throttled_get
+    from .geocode_cache import get_geocode_cache
+    from .geo_utils import points_in_polygon
+    from .cortar_index import get_cortar_index
+    from .crawl_filters import apply_crawl_filters, normalize_crawl_filters
+except ImportError: # 스크립트 단독 실행 시 (python src/external_scripts/fetch_marker_ids.py)
+    from naver_http import get_land_session, get_geocode_session, is_cancelled, emit_progress, throttled_get
+    from geocode_cache import get_geocode_cache
+    from geo_utils import points_in_polygon
+    from cortar_index import get_cortar_index
+    from crawl_filters import apply_crawl_filters, normalize_crawl_filters
 # toml 라이브러리 임포트는 더 이상 필요하지 않습니다.
 
+# fetch_marker_info가 역지오코딩 401을 감지했을 때 반환하는 신호 값
+API_KEY_ERROR_SIGNAL = "PROPAGATE_API_KEY_ERROR_401"
+# CLI 실행 시 API 키 오류를 호출 측에 알리는 종료 코드
+API_KEY_ERROR_EXIT_CODE = 99
+
 def get_all_configs_from_env():
     """
     환경 변수에서 Header, Cookie, Naver API 키 정보를 가져와 파싱합니다.
@@ -50,7 +67,7 @@ def get_all_configs_from_env():
         
     return parsed_headers, parsed_cookies, client_id_env, client_secret_env
 
-def reverse_geocode(lat, lng, client_id, client_secret):
+def reverse_geocode(lat, lng, client_id, client_secret, cancel_event=None):
     if not client_id or not client_secret:
         print("Error: Naver Client ID or Client Secret not provided for reverse geocoding.", file=sys.stderr)
         return ("API_KEYS_MISSING", "API_KEYS_MISSING") # API 키 누락 시 다른 에러 반환
@@ -58,8 +75,10 @@ def reverse_geocode(lat, lng, client_id, client_secret):
     try:
         url = "https://maps.apigw.ntruss.com/map-reversegeocode/v2/gc"
         params = {"coords": f"{lng},{lat}", "output": "json", "orders": "legalcode"}
-        api_headers = {"X-NCP-APIGW-API-KEY-ID": client_id, "X-NCP-APIGW-API-KEY": client_secret}
-        response = requests.get(url, params=params, headers=api_headers, timeout=10)
+        # API 키 헤더가 미리 설정된 공유 세션(keep-alive 연결 풀) 사용
+        session = get_geocode_session(client_id, client_secret)
+        # 호스트별 속도 제한 + 429/5xx 재시도 (고정 지연 없이 허용되는 최대 속도로 요청)
+        response = throttled_get(session, url, cancel_event=cancel_event, params=params, timeout=10)
         
         # 401 에러를 가장 먼저 명시적으로 확인
         if response.status_code == 401:
@@ -108,8 +127,14 @@ def calculate_bounds(vertices):
         return None, None, None, None
 
 # fetch_marker_info 함수 시그니처 변경: headers, cookies, client_id, client_secret 인자 추가
-def fetch_marker_info(cortars_info, headers_env, cookies_env, client_id_env, client_secret_env):
-    """주어진 cortar 정보로 네이버 부동산 API에서 마커 정보를 가져옵니다."""
+def fetch_marker_info(cortars_info, headers_env, cookies_env, client_id_env, client_secret_env,
+                      cancel_event=None, progress_callback=None, crawl_filters=None):
+    """
+    주어진 cortar 정보로 네이버 부동산 API에서 마커 정보를 가져옵니다.
+    crawl_filters(거래유형/가격/면적/최소 세대수)는 API 파라미터로 적용되어, 조건에 맞는 단지만 반환됩니다.
+    cancel_event가 설정되면 다음 HTTP 요청 전에 중단하고 None을 반환합니다.
+    progress_callback이 있으면 마커 조회/역지오코딩 요청마다 진행 이벤트를 보냅니다.
+    """
     cortarNo = cortars_info.get('cortarNo')
     cortarVertexLists = cortars_info.get('cortarVertexLists', [[]])
 
@@ -140,14 +165,19 @@ def fetch_marker_info(cortars_info, headers_env, cookies_env, client_id_env, cli
         'leftLon': leftLon, 'rightLon': rightLon, 'topLat': topLat, 'bottomLat': bottomLat,
         'isPresale': 'false'
     }
+    params = apply_crawl_filters(params, crawl_filters)
+
+    if is_cancelled(cancel_event):
+        print(f"fetch_marker_info cancelled before requesting markers for cortarNo: {cortarNo}", file=sys.stderr)
+        return None
 
     try:
-        # 환경 변수에서 가져온 headers_env, cookies_env 사용
-        response = requests.get(
-            'https://new.land.naver.com/api/complexes/single-markers/2.0',
+        # headers_env, cookies_env가 미리 설정된 공유 세션(keep-alive 연결 풀) 사용
+        session = get_land_session(headers_env, cookies_env)
+        response = throttled_get(
+            session, 'https://new.land.naver.com/api/complexes/single-markers/2.0',
+            cancel_event=cancel_event,
             params=params,
-            cookies=cookies_env,
-            headers=headers_env,
             timeout=20 # 타임아웃 증가
         )
         print(f"Fetching marker IDs for cortarNo: {cortarNo} - HTTP status code: {response.status_code}")
@@ -159,44 +189,83 @@ def fetch_marker_info(cortars_info, headers_env, cookies_env, client_id_env, cli
             pprint.pprint(response_data, stream=sys.stderr) # 응답 내용 확인
             return None
 
-        marker_info_list = []
-        processed_coords = set() # 중복 좌표 처리용
+        emit_progress(progress_callback, 'markers_fetched', count=len(response_data))
 
+        # 1. 유효한 마커만 골라내고 중복 좌표는 건너뛰기
+        valid_items = []
+        processed_coords = set() # 중복 좌표 처리용
         for item in response_data:
             if isinstance(item, dict) and all(k in item for k in ['markerId', 'latitude', 'longitude']):
-                lat = item['latitude']
-                lng = item['longitude']
-                coord_key = (lat, lng)
-
+                coord_key = (item['latitude'], item['longitude'])
                 if coord_key in processed_coords: # 이미 처리된 좌표면 건너뛰기
                     continue
-
-                # reverse_geocode 호출 시 환경 변수에서 가져온 client_id_env, client_secret_env 전달
-                divisionName, cortarName = reverse_geocode(lat, lng, client_id_env, client_secret_env)
-                
-                # API 키 에러가 발생했는지 확인
-                if divisionName == "API_KEY_ERROR_401" or cortarName == "API_KEY_ERROR_401":
-                    print(f"Error (fetch_marker_info): API Key 401 detected from reverse_geocode for marker at ({lat},{lng}) in cortarNo {cortarNo}. Stopping and propagating error.", file=sys.stderr)
-                    # 이 지점에서 함수는 "PROPAGATE_API_KEY_ERROR_401"을 반환하고 *즉시 종료*되어야 합니다.
-                    # 더 이상 marker_info_list에 아무것도 추가하지 않습니다.
-                    return "PROPAGATE_API_KEY_ERROR_401"
-                    
                 processed_coords.add(coord_key)
-                time.sleep(0.1) # API 요청 간 지연
-
-                marker_info = {
-                    'markerId': item.get('markerId'), 'latitude': lat, 'longitude': lng,
-                    'complexName': item.get('complexName', ''),
-                    'completionYearMonth': item.get('completionYearMonth', ''),
-                    'totalHouseholdCount': item.get('totalHouseholdCount', 0),
-                    'dealCount': item.get('dealCount', 0), 'leaseCount': item.get('leaseCount', 0),
-                    'rentCount': item.get('rentCount', 0),
-                    'divisionName': divisionName, 'cortarName': cortarName
-                }
-                marker_info_list.append(marker_info)
+                valid_items.append(item)
             else:
                 print(f"Warning: Skipping invalid marker item: {item}", file=sys.stderr)
 
+        # 2. 이미 받아 둔 cortar 다각형 안에 있는 마커는 역지오코딩 없이 구/동 이름을 지정 (벡터 연산으로 일괄 판정)
+        polygon_names = (cortars_info.get('divisionName', ''), cortars_info.get('cortarName', ''))
+        if all(polygon_names) and valid_items:
+            inside_mask = points_in_polygon(
+                [item['latitude'] for item in valid_items],
+                [item['longitude'] for item in valid_items],
+                cortarVertexLists
+            )
+        else:
+            inside_mask = [False] * len(valid_items)
+        print(f"Point-in-polygon for cortarNo {cortarNo}: {int(sum(inside_mask))}/{len(valid_items)} markers inside the cortar polygon.", file=sys.stderr)
+
+        # 3. 다각형 밖의 마커만 이전에 방문한 cortar 인덱스 -> 캐시 -> 역지오코딩 API 순으로 구/동 이름 조회
+        marker_info_list = []
+        geocode_cache = get_geocode_cache()
+        cortar_index = get_cortar_index()
+        for item, is_inside in zip(valid_items, inside_mask):
+            lat = item['latitude']
+            lng = item['longitude']
+
+            known_cortar = None if is_inside else cortar_index.lookup(lat, lng)
+            if is_inside:
+                divisionName, cortarName = polygon_names
+            elif known_cortar and known_cortar.get('divisionName') and known_cortar.get('cortarName'):
+                divisionName, cortarName = known_cortar['divisionName'], known_cortar['cortarName']
+            else:
+                # 캐시에 있는 좌표는 역지오코딩 API 호출과 지연 없이 바로 사용
+                cached_names = geocode_cache.get(lat, lng)
+                if cached_names:
+                    divisionName, cortarName = cached_names
+                else:
+                    if is_cancelled(cancel_event):
+                        print(f"fetch_marker_info cancelled during reverse geocoding for cortarNo: {cortarNo}", file=sys.stderr)
+                        return None
+                    # reverse_geocode 호출 시 환경 변수에서 가져온 client_id_env, client_secret_env 전달
+                    divisionName, cortarName = reverse_geocode(lat, lng, client_id_env, client_secret_env, cancel_event)
+                    emit_progress(progress_callback, 'geocoded')
+
+                    # API 키 에러가 발생했는지 확인
+                    if divisionName == "API_KEY_ERROR_401" or cortarName == "API_KEY_ERROR_401":
+                        print(f"Error (fetch_marker_info): API Key 401 detected from reverse_geocode for marker at ({lat},{lng}) in cortarNo {cortarNo}. Stopping and propagating error.", file=sys.stderr)
+                        # 이 지점에서 함수는 API_KEY_ERROR_SIGNAL을 반환하고 *즉시 종료*되어야 합니다.
+                        # 더 이상 marker_info_list에 아무것도 추가하지 않습니다.
+                        return API_KEY_ERROR_SIGNAL
+
+                    geocode_cache.put(lat, lng, divisionName, cortarName) # 오류 값은 저장되지 않음
+
+            marker_info = {
+                'markerId': item.get('markerId'), 'latitude': lat, 'longitude': lng,
+                'complexName': item.get('complexName', ''),
+                'completionYearMonth': item.get('completionYearMonth', ''),
+                'totalHouseholdCount': item.get('totalHouseholdCount', 0),
+                'dealCount': item.get('dealCount', 0), 'leaseCount': item.get('leaseCount', 0),
+                'rentCount': item.get('rentCount', 0),
+                'divisionName': divisionName, 'cortarName': cortarName
+            }
+            marker_info_list.append(marker_info)
+
+        cache_stats = geocode_cache.stats()
+        print(f"Geocode cache for cortarNo {cortarNo}: hits={cache_stats['hits']}, misses={cache_stats['misses']}, "
+              f"hit_ratio={cache_stats['hit_ratio']:.1%} (process total)", file=sys.stderr)
+
         if marker_info_list:
             return marker_info_list
         else:
@@ -218,156 +287,145 @@ def fetch_marker_info(cortars_info, headers_env, cookies_env, client_id_env, cli
         print(f"Unexpected error in fetch_marker_info for cortarNo {cortarNo}: {e}", file=sys.stderr)
         return None
 
-if __name__ == "__main__":
-    project_root_cwd = os.getcwd()
-    print(f"Executing fetch_marker_ids.py from CWD: {project_root_cwd}")
+def normalize_cortars_data(loaded_data):
+    """
+    cortars 입력 데이터(단일 dict 또는 list of dicts)를 list 형태로 정규화합니다.
+    형식이 잘못된 경우 None을 반환합니다.
+    """
+    if isinstance(loaded_data, dict):
+        if 'cortarNo' in loaded_data: # 유효한 단일 cortar 정보인지 확인
+            return [loaded_data]
+        print("Warning: Input cortars data is a dict but lacks 'cortarNo'. No data to process.", file=sys.stderr)
+        return []
+    if isinstance(loaded_data, list):
+        return loaded_data
+    print(f"Error: Expected cortars data to be a list or a valid dict, but got {type(loaded_data)}.", file=sys.stderr)
+    return None
+
+def collect_all_marker_info(cortars_data_list, headers_env, cookies_env, client_id_env, client_secret_env,
+                            cancel_event=None, progress_callback=None, crawl_filters=None):
+    """
+    각 지역(cortar)별로 마커 정보를 수집하여 {지역명: [마커 정보, ...]} 딕셔너리로 반환합니다.
+    역지오코딩 API 키 오류(401)가 감지되면 즉시 중단하고 API_KEY_ERROR_SIGNAL을 반환합니다.
+    cancel_event가 설정되면 남은 지역은 처리하지 않습니다 (호출 측에서 취소 여부를 확인).
+    """
+    all_marker_info = {}
+
+    for cortars_item in cortars_data_list:
+        if is_cancelled(cancel_event):
+            print("collect_all_marker_info cancelled. Skipping remaining areas.", file=sys.stderr)
+            break
+        # 입력된 cortars_item이 유효한 딕셔너리이고, 'cortarNo'를 포함하는지 확인
+        if not (isinstance(cortars_item, dict) and cortars_item.get('cortarNo')):
+            print(f"Warning: Skipping invalid cortars_item or item missing 'cortarNo': {str(cortars_item)[:100]}...", file=sys.stderr)
+            continue
+
+        # 지역 키 생성 (divisionName과 cortarName 사용, 없으면 cortarNo로 대체)
+        division_name = cortars_item.get('divisionName', 'UnknownGu')
+        cortar_name = cortars_item.get('cortarName', 'UnknownDong')
+        area_key = f"{division_name} {cortar_name}".strip()
+        if not area_key or "UnknownGu UnknownDong" == area_key: # 지역 이름이 제대로 구성되지 않은 경우
+            area_key = cortars_item.get('cortarNo') # fallback으로 cortarNo 사용
+
+        print(f"\nProcessing for area: {area_key} (cortarNo: {cortars_item.get('cortarNo')})", file=sys.stderr)
+
+        marker_list_result = fetch_marker_info(
+            cortars_item, headers_env, cookies_env, client_id_env, client_secret_env,
+            cancel_event=cancel_event, progress_callback=progress_callback, crawl_filters=crawl_filters
+        )
+# ======================== ▼▼▼ API 키 오류 명시적 확인 및 처리 ▼▼▼ ========================
+        if marker_list_result == API_KEY_ERROR_SIGNAL:
+            print(f"CRITICAL_ERROR_SIGNAL: API Key 401 error detected while processing area '{area_key}'. Stopping marker collection.", file=sys.stderr)
+            return API_KEY_ERROR_SIGNAL # 더 이상 다른 지역 처리 안 함
+# ======================== ▲▲▲ API 키 오류 명시적 확인 및 처리 ▲▲▲ ========================
+        elif marker_list_result is not None: # None이 아니면 (즉, 유효한 리스트)
+            all_marker_info[area_key] = marker_list_result
+            print(f"Finished processing for {area_key}. Found {len(marker_list_result)} markers.", file=sys.stderr)
+        else: # fetch_marker_info에서 일반 오류 발생
+            print(f"Warning: Error or no data returned from fetch_marker_info for {area_key}. Assigning empty list for this area.", file=sys.stderr)
+            all_marker_info[area_key] = [] # 해당 지역은 빈 리스트로 처리
+
+    return all_marker_info
+
+def save_json_output(data, output_dir, output_filename):
+    """data를 output_dir/output_filename에 JSON으로 저장합니다. 성공 시 True를 반환합니다."""
+    output_filepath = os.path.join(output_dir, output_filename) # CWD 기준
+    try:
+        os.makedirs(output_dir, exist_ok=True) # 출력 디렉토리 생성 (이미 존재해도 에러 없음)
+        with open(output_filepath, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=4)
+        print(f"Data successfully saved to '{output_filepath}'", file=sys.stderr)
+        return True
+    except IOError as e:
+        print(f"Error: Could not write output file '{output_filepath}': {e}", file=sys.stderr)
+        return False
+    except Exception as e:
+        print(f"Error: An unexpected error occurred while writing output file: {e}", file=sys.stderr)
+        return False
+
+def main():
+    """
+    CLI 진입점: cortars_info.json을 읽어 마커 정보를 수집하고 all_marker_info.json으로 저장합니다.
+    반환값은 프로세스 종료 코드이며, API 키 오류 시 API_KEY_ERROR_EXIT_CODE(99)를 반환합니다.
+    """
+    print(f"Executing fetch_marker_ids.py from CWD: {os.getcwd()}")
+    parser = argparse.ArgumentParser(description="Naver Land 단지 마커 정보 수집")
+    parser.add_argument('--output-dir', default='output', help="입력/결과 파일이 위치한 작업 디렉토리 (기본값: output)")
+    parser.add_argument('--crawl-filters', type=json.loads, default=None,
+                        help='조회 조건 JSON (예: \'{"trade_types": ["A1", "B1"], "price_max": 150000}\')')
+    args = parser.parse_args()
+    output_dir = args.output_dir
+    crawl_filters = normalize_crawl_filters(args.crawl_filters)
 
     # 환경 변수에서 모든 설정값 가져오기
     headers_from_env, cookies_from_env, client_id_from_env, client_secret_from_env = get_all_configs_from_env()
-    
+
     if not client_id_from_env or not client_secret_from_env:
         print("CRITICAL (__main__): Naver API keys not found in env. Exiting.", file=sys.stderr)
-        sys.exit(1) # API 키 없으면 실행 불가 (종료 코드 1은 일반 오류)
-    output_dir = 'output'; input_filename = 'cortars_info.json'; output_filename = 'all_marker_info.json'
+        return 1 # API 키 없으면 실행 불가 (종료 코드 1은 일반 오류)
     # Header나 Cookie가 없어도 일단 진행은 하되, 경고를 표시합니다. API 요청은 실패할 수 있습니다.
     if not headers_from_env or not cookies_from_env:
         print("Warning (__main__): Headers or Cookies could not be loaded from environment variables. API requests to Naver Land might fail.", file=sys.stderr)
-        # API 요청이 실패할 수 있으므로, 여기서 종료하는 것을 고려할 수 있습니다.
-        # sys.exit(1) # 필요시 주석 해제
 
-    output_dir = 'output'
-    input_filename = 'cortars_info.json'
+    input_filepath = os.path.join(output_dir, 'cortars_info.json') # CWD 기준
     output_filename = 'all_marker_info.json'
 
-    input_filepath = os.path.join(output_dir, input_filename) # CWD 기준
-    # input_abs_filepath = os.path.abspath(input_filepath) # 로그용
-    output_filepath = os.path.join(output_dir, output_filename) # CWD 기준
-    # output_abs_filepath = os.path.abspath(output_filepath) # 로그용
-
     print(f"Attempting to read cortars info from: {input_filepath}", file=sys.stderr)
     if not os.path.exists(input_filepath):
         print(f"Error (__main__): Input file '{input_filepath}' not found. Please run fetch_cortars.py first.", file=sys.stderr)
-        sys.exit(1)
+        return 1
 
-    # 입력 파일(cortars_info.json) 로드
-    cortars_data_list_main = [] # 변수명 변경 및 초기화
     try:
-        with open(input_filepath, 'r', encoding='utf-8') as file: # 상대 경로 사용
-            loaded_data = json.load(file) # 임시 변수에 로드
-        # 입력 데이터 형식 처리 (단일 dict 또는 list of dicts)
-        if isinstance(loaded_data, dict):
-            if 'cortarNo' in loaded_data: # 유효한 단일 cortar 정보인지 확인
-                cortars_data_list_main = [loaded_data]
-            else:
-                print(f"Warning (__main__): Input data from '{input_filepath}' is a dict but lacks 'cortarNo'. No data to process.", file=sys.stderr)
-        elif isinstance(loaded_data, list):
-            cortars_data_list_main = loaded_data
-        else:
-            print(f"Error (__main__): Expected input data from '{input_filepath}' to be a list or a valid dict, but got {type(loaded_data)}.", file=sys.stderr)
-            sys.exit(1)
+        with open(input_filepath, 'r', encoding='utf-8') as file:
+            loaded_data = json.load(file)
     except json.JSONDecodeError as e:
         print(f"Error (__main__): Failed to parse JSON from input file '{input_filepath}': {e}", file=sys.stderr)
-        sys.exit(1)
-    except IOError as e:
+        return 1
+    except Exception as e:
         print(f"Error (__main__): Could not read input file '{input_filepath}': {e}", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e: # 기타 예외 처리
-        print(f"Error (__main__): An unexpected error occurred while loading '{input_filepath}': {e}", file=sys.stderr)
-        sys.exit(1)
-        
-    if not cortars_data_list_main: # 로드된 데이터가 없으면
-        print("Info (__main__): No cortars data to process from input file. Exiting.", file=sys.stderr)
-        # 이 경우, 결과 파일은 생성하지 않고 정상 종료(0)할 수 있습니다.
-        # 또는, 입력 파일이 비어있는 것을 오류로 간주한다면 sys.exit(1)도 가능합니다.
-        # 여기서는 할 일이 없으므로 정상 종료로 간주합니다.
-        # 단, all_marker_info.json 파일이 비어있는 상태로 생성될 수 있으므로, 
-        # 아예 파일 생성을 건너뛰거나, 빈 JSON 객체 {} 를 저장할 수 있습니다.
-        # 여기서는 빈 JSON 객체를 저장하고 정상 종료합니다.
-        try:
-            os.makedirs(output_dir, exist_ok=True)
-            with open(output_filepath, 'w', encoding='utf-8') as f:
-                json.dump({}, f, ensure_ascii=False, indent=4) # 빈 JSON 객체 저장
-            print(f"No cortars data processed. Empty marker info file created at '{output_filepath}'.", file=sys.stderr)
-        except Exception as e:
-            print(f"Error (__main__): Could not write empty marker info file: {e}", file=sys.stderr)
-        sys.exit(0)
-
-
-    all_marker_info_output_main = {} # 최종 결과를 담을 딕셔너리, 변수명 변경
-    api_key_error_detected_globally = False # API 키 오류 감지 플래그
-
-    # 각 지역(cortar)별로 마커 정보 수집
-    for cortars_item_main in cortars_data_list_main: # 루프 변수명 변경
-        # 입력된 cortars_item이 유효한 딕셔너리이고, 'cortarNo'를 포함하는지 확인
-        if not (isinstance(cortars_item_main, dict) and cortars_item_main.get('cortarNo')):
-            print(f"Warning (__main__): Skipping invalid cortars_item or item missing 'cortarNo': {str(cortars_item_main)[:100]}...", file=sys.stderr)
-            continue
-        
-        # 지역 키 생성 (divisionName과 cortarName 사용, 없으면 cortarNo로 대체)
-        division_name_main = cortars_item_main.get('divisionName', 'UnknownGu') # 변수명 변경
-        cortar_name_main = cortars_item_main.get('cortarName', 'UnknownDong') # 변수명 변경
-        area_key_main = f"{division_name_main} {cortar_name_main}".strip()
-        if not area_key_main or "UnknownGu UnknownDong" == area_key_main : # 지역 이름이 제대로 구성되지 않은 경우
-            area_key_main = cortars_item_main.get('cortarNo') # fallback으로 cortarNo 사용
-            if not area_key_main: # cortarNo조차 없으면 이 아이템은 처리 불가
-                print(f"Warning (__main__): Skipping cortars_item due to unidentifiable area key: {str(cortars_item_main)[:100]}...", file=sys.stderr)
-                continue
-        
-        print(f"\nProcessing for area: {area_key_main} (cortarNo: {cortars_item_main.get('cortarNo')})", file=sys.stderr)
-        
-        # fetch_marker_info 함수 호출하여 해당 지역의 마커 리스트 가져오기
-        marker_list_result_main = fetch_marker_info( # 변수명 변경
-            cortars_item_main, 
-            headers_from_env, 
-            cookies_from_env, 
-            client_id_from_env, 
-            client_secret_from_env
-        )
-# ======================== ▼▼▼ API 키 오류 명시적 확인 및 처리 ▼▼▼ ========================
-        # print("marker_list_result_main:",marker_list_result_main)
-        if marker_list_result_main == "PROPAGATE_API_KEY_ERROR_401":
-            print(f"CRITICAL_ERROR_SIGNAL (__main__): API Key 401 error detected while processing area '{area_key_main}'. Terminating script with exit code 99.", file=sys.stderr)
-            api_key_error_detected_globally = True # 플래그 설정
-            break # for 루프를 즉시 중단합니다. (더 이상 다른 지역 처리 안 함)
-# ======================== ▲▲▲ API 키 오류 명시적 확인 및 처리 ▲▲▲ ========================
-
-        elif marker_list_result_main is not None: # None이 아니면 (즉, 유효한 리스트, 빈 리스트 포함)
-            all_marker_info_output_main[area_key_main] = marker_list_result_main
-            print(f"Finished processing for {area_key_main}. Found {len(marker_list_result_main)} markers.", file=sys.stderr)
-        else: # marker_list_result_main is None (fetch_marker_info에서 일반 오류 발생)
-            print(f"Warning (__main__): Error or no data returned from fetch_marker_info for {area_key_main}. Assigning empty list for this area.", file=sys.stderr)
-            all_marker_info_output_main[area_key_main] = [] # 해당 지역은 빈 리스트로 처리
-
-    # for 루프 종료 후 (API 키 에러로 break 되었거나, 모든 지역 처리 완료)
+        return 1
+
+    cortars_data_list = normalize_cortars_data(loaded_data)
+    if cortars_data_list is None:
+        return 1
+    if not cortars_data_list: # 처리할 데이터가 없으면 빈 JSON 객체를 저장하고 정상 종료
+        save_json_output({}, output_dir, output_filename)
+        print("Info (__main__): No cortars data to process from input file.", file=sys.stderr)
+        return 0
+
+    all_marker_info = collect_all_marker_info(
+        cortars_data_list, headers_from_env, cookies_from_env, client_id_from_env, client_secret_from_env,
+        crawl_filters=crawl_filters
+    )
+    # API 키 에러가 발생했다면 종료 코드 99로 호출 측(run_external_script 등)에 알립니다.
+    if all_marker_info == API_KEY_ERROR_SIGNAL:
+        return API_KEY_ERROR_EXIT_CODE
+
+    if not all_marker_info: # 처리할 아이템이 있었는데 결과가 비었다면 일반 실패로 간주
+        print("\nNo marker information was collected or processed successfully overall (and no API key error).", file=sys.stderr)
+        return 1
 
-    # API 키 에러가 발생했다면, 여기서 스크립트를 종료 코드 99로 종료합니다.
-    if api_key_error_detected_globally:
-        sys.exit(99)
+    return 0 if save_json_output(all_marker_info, output_dir, output_filename) else 1
 
-    # API 키 에러가 아니었고, 수집된 마커 정보가 있다면 파일로 저장합니다.
-    if all_marker_info_output_main: # 저장할 데이터가 하나라도 있다면
-        print(f"\nAttempting to write all marker info to: {output_filepath}", file=sys.stderr)
-        try:
-            os.makedirs(output_dir, exist_ok=True) # 출력 디렉토리 생성 (이미 존재해도 에러 없음)
-            with open(output_filepath, 'w', encoding='utf-8') as file:
-                json.dump(all_marker_info_output_main, file, ensure_ascii=False, indent=4)
-            print(f"All marker information successfully saved to '{output_filepath}'", file=sys.stderr)
-            sys.exit(0) # 성공적으로 모든 작업 완료
-        except IOError as e:
-            print(f"Error (__main__): Could not write output file '{output_filepath}': {e}", file=sys.stderr)
-            sys.exit(1) # 파일 쓰기 오류 시 종료 코드 1
-        except Exception as e:
-            print(f"Error (__main__): An unexpected error occurred while writing output file: {e}", file=sys.stderr)
-            sys.exit(1) # 기타 쓰기 오류 시 종료 코드 1
-    else: # API 키 에러도 아니었고, 저장할 마커 정보도 없는 경우
-        print("\nNo marker information was collected or processed successfully overall (and no API key error).", file=sys.stderr)
-        # 처리할 cortars 데이터가 있었는데 결과가 없는 경우 실패로 간주할 수 있습니다.
-        if cortars_data_list_main: # 처리할 아이템이 있었는데 결과가 비었다면
-            sys.exit(1) # 일반 실패로 간주
-        else: # 처리할 아이템 자체가 없었다면 (예: cortars_info.json이 비어있었음)
-            # 이 경우는 오류가 아니므로 정상 종료할 수 있습니다.
-            # 또는, 이 상황을 알리기 위해 빈 all_marker_info.json을 생성할 수도 있습니다.
-            # 이전 로직에서 cortars_data_list_main이 비면 이미 종료했으므로, 이 else는 거의 도달하지 않을 수 있습니다.
-            # 만약 도달한다면, 안전하게 정상 종료합니다.
-            print("Info (__main__): No cortars data was provided, so no marker info was generated.", file=sys.stderr)
-            sys.exit(0)
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+# your_project_directory/src/external_scripts/geo_utils.py
+import numpy as np
+
+
+def points_in_polygon(lats, lngs, vertex_lists):
+    """
+    여러 점이 cortarVertexLists 형태의 다각형 안에 있는지 한 번에 판정합니다 (ray casting, even-odd 규칙).
+
+    - lats, lngs: 점들의 위도/경도 (같은 길이의 시퀀스)
+    - vertex_lists: [[ [lat, lon], ... ], ...] 형태의 링 목록. 여러 링(섬/구멍)이 있으면
+      모든 링의 교차 횟수를 합산하므로 구멍 안의 점은 바깥으로 판정됩니다.
+    반환값: 각 점의 포함 여부 bool 배열
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    inside = np.zeros(lats.shape, dtype=bool)
+    if lats.size == 0 or not vertex_lists:
+        return inside
+
+    for ring in vertex_lists:
+        ring_array = np.asarray(ring, dtype=float)
+        if ring_array.ndim != 2 or ring_array.shape[0] < 3 or ring_array.shape[1] != 2:
+            continue
+        ring_lats = ring_array[:, 0]
+        ring_lngs = ring_array[:, 1]
+        # 각 변의 시작점(i)과 끝점(j = i-1)
+        lat_i, lng_i = ring_lats[:, None], ring_lngs[:, None]
+        lat_j, lng_j = np.roll(ring_lats, 1)[:, None], np.roll(ring_lngs, 1)[:, None]
+
+        # 점의 위도가 변의 위도 범위를 가로지르는 변만 대상
+        crosses = (lat_i > lats) != (lat_j > lats)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lng_at_lat = (lng_j - lng_i) * (lats - lat_i) / (lat_j - lat_i) + lng_i
+        hits = crosses & (lngs < lng_at_lat)
+        inside ^= (np.count_nonzero(hits, axis=0) % 2).astype(bool)
+
+    return inside
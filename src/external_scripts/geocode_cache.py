@@ -0,0 +1,128 @@
+# your_project_directory/src/external_scripts/geocode_cache.py
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+# 프로젝트 데이터 디렉토리 (output/cache) - 앱/CLI 어느 쪽에서 실행해도 같은 파일을 공유
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DIR = os.path.join(PROJECT_ROOT, 'output', 'cache')
+DEFAULT_DB_PATH = os.path.join(CACHE_DIR, 'geocode_cache.sqlite3')
+
+DEFAULT_TTL_SECONDS = 90 * 24 * 60 * 60 # 단지 위치는 바뀌지 않으므로 길게 유지 (90일)
+COORD_ROUND_DIGITS = 6 # 소수점 6자리 ≈ 0.1m, 같은 단지 마커 좌표를 같은 키로 묶음
+
+# 역지오코딩 실패/미확인 시 반환되는 값의 접두어 (이 값들은 캐시하지 않음)
+_NON_CACHEABLE_PREFIXES = ('Unknown', 'API_KEY', 'No_Results', 'Status_')
+
+
+def is_cacheable_result(division_name, cortar_name):
+    """역지오코딩 결과가 정상적인 (구, 동) 이름인지 확인합니다."""
+    return all(
+        isinstance(name, str) and name and not name.startswith(_NON_CACHEABLE_PREFIXES)
+        for name in (division_name, cortar_name)
+    )
+
+
+class GeocodeCache:
+    """
+    반올림한 (위도, 경도)를 키로 역지오코딩 결과(구, 동)를 저장하는 SQLite 캐시.
+    파일 기반이므로 앱 재시작 후에도 유지되며, 여러 세션/프로세스가 같은 파일을 공유합니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, round_digits=COORD_ROUND_DIGITS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.round_digits = round_digits
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._available = self._initialize()
+
+    def _connect(self):
+        # 스레드마다 다른 연결을 쓰도록 호출 시점에 연결 (SQLite 연결은 스레드 간 공유 불가)
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _initialize(self):
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL") # 여러 프로세스의 동시 읽기/쓰기 허용
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS reverse_geocode (
+                        lat_key REAL NOT NULL,
+                        lng_key REAL NOT NULL,
+                        division_name TEXT NOT NULL,
+                        cortar_name TEXT NOT NULL,
+                        updated_at REAL NOT NULL,
+                        PRIMARY KEY (lat_key, lng_key)
+                    )
+                """)
+            return True
+        except sqlite3.Error as e:
+            print(f"Warning (geocode_cache): Could not initialize cache at '{self.db_path}': {e}. Cache disabled.", file=sys.stderr)
+            return False
+
+    def _key(self, lat, lng):
+        return round(float(lat), self.round_digits), round(float(lng), self.round_digits)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, lat, lng):
+        """캐시된 (구, 동)을 반환합니다. 없거나 TTL이 지났으면 None을 반환합니다."""
+        if not self._available:
+            self._count(False)
+            return None
+        lat_key, lng_key = self._key(lat, lng)
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT division_name, cortar_name FROM reverse_geocode "
+                    "WHERE lat_key = ? AND lng_key = ? AND updated_at >= ?",
+                    (lat_key, lng_key, time.time() - self.ttl_seconds)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning (geocode_cache): Read failed for {lat},{lng}: {e}", file=sys.stderr)
+            row = None
+        self._count(row is not None)
+        return (row[0], row[1]) if row else None
+
+    def put(self, lat, lng, division_name, cortar_name):
+        """정상적인 역지오코딩 결과만 저장합니다. 오류 값은 무시합니다."""
+        if not self._available or not is_cacheable_result(division_name, cortar_name):
+            return
+        lat_key, lng_key = self._key(lat, lng)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO reverse_geocode (lat_key, lng_key, division_name, cortar_name, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (lat_key, lng_key, division_name, cortar_name, time.time())
+                )
+        except sqlite3.Error as e:
+            print(f"Warning (geocode_cache): Write failed for {lat},{lng}: {e}", file=sys.stderr)
+
+    def stats(self):
+        """이 프로세스에서의 캐시 적중/미적중 횟수와 적중률을 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_ratio': (self.hits / total) if total else 0.0}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_geocode_cache():
+    """프로세스 전체에서 공유하는 기본 GeocodeCache 인스턴스를 반환합니다."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = GeocodeCache()
+        return _default_cache
@@ -0,0 +1,325 @@
+# your_project_directory/src/external_scripts/naver_http.py
+import json
+import sys
+import time
+import random
+import threading
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 네이버 엔드포인트 호스트
+LAND_HOST = 'new.land.naver.com'          # 부동산 API (cortars, 마커, 매물)
+GEOCODE_HOST = 'maps.apigw.ntruss.com'    # 역지오코딩 API
+
+# 호스트별 keep-alive 연결 풀 크기 (동시 수집 스레드 수 이상으로 설정)
+POOL_MAXSIZE_BY_HOST = {
+    LAND_HOST: 16,
+    GEOCODE_HOST: 4,
+}
+# 서로 다른 설정(헤더/쿠키/API 키)으로 만든 세션을 최대 몇 개까지 보관할지
+MAX_CACHED_SESSIONS = 8
+
+# 호스트별 요청 속도 제한 (초당 요청 수): 시작값, 최소값, 최대값
+# 성공할 때마다 조금씩 올리고(additive increase), 429/5xx를 받으면 절반으로 줄입니다(multiplicative decrease).
+RATE_LIMITS_BY_HOST = {
+    LAND_HOST: {'initial_rate': 8.0, 'min_rate': 0.5, 'max_rate': 20.0},
+    GEOCODE_HOST: {'initial_rate': 10.0, 'min_rate': 1.0, 'max_rate': 20.0},
+}
+DEFAULT_RATE_LIMIT = {'initial_rate': 5.0, 'min_rate': 0.5, 'max_rate': 10.0}
+RATE_INCREASE_STEP = 0.2 # 성공 1건당 늘리는 초당 요청 수
+RATE_DECREASE_FACTOR = 0.5 # 제한 응답 1건당 곱하는 비율
+RATE_DECREASE_COOLDOWN_SECONDS = 1.0 # 동시에 받은 제한 응답들로 속도가 연달아 줄지 않도록 감소 간 최소 간격
+
+# 재시도 대상 응답 코드와 재시도 간격 (지수 백오프 + full jitter)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 4
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 30.0
+
+_stats_lock = threading.Lock()
+_connection_stats = {'requests': 0, 'new_connections': 0}
+
+_sessions_lock = threading.Lock()
+_sessions = OrderedDict() # {(host, 설정 키): requests.Session}, 최근 사용 순
+
+
+def _record_request():
+    with _stats_lock:
+        _connection_stats['requests'] += 1
+
+
+def _record_new_connection():
+    with _stats_lock:
+        _connection_stats['new_connections'] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    """새 TCP 연결을 만들 때마다 카운트하는 연결 풀"""
+    def _new_conn(self):
+        _record_new_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """새 TCP+TLS 연결을 만들 때마다 카운트하는 연결 풀"""
+    def _new_conn(self):
+        _record_new_connection()
+        return super()._new_conn()
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """
+    요청 수와 신규 연결 수를 집계하는 HTTPAdapter.
+    (요청 수 - 신규 연결 수)가 keep-alive로 재사용된 연결 수입니다.
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _record_request()
+        return super().send(request, **kwargs)
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """속도 제한 대기 또는 재시도 대기 중에 수집이 취소되었을 때 발생합니다."""
+
+
+class AdaptiveRateLimiter:
+    """
+    호스트 하나의 요청 속도를 제한하는 토큰 버킷.
+    모든 수집 스레드가 같은 버킷을 공유하며, 응답 결과에 따라 속도를 AIMD 방식으로 조절합니다.
+    Retry-After를 받으면 그 시간 동안 해당 호스트로의 모든 요청을 멈춥니다.
+    """
+
+    def __init__(self, host, initial_rate, min_rate, max_rate,
+                 increase_step=RATE_INCREASE_STEP, decrease_factor=RATE_DECREASE_FACTOR):
+        self.host = host
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        # 버킷 크기는 1초 분량 (순간적으로 rate개까지 연속 요청 허용)
+        capacity = max(1.0, self.rate)
+        self._tokens = min(capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, cancel_event=None):
+        """요청 1건을 보낼 수 있을 때까지 기다립니다. 기다리는 중에 취소되면 False를 반환합니다."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait_seconds = self._blocked_until - now
+                if wait_seconds <= 0:
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return True
+                    wait_seconds = (1.0 - self._tokens) / self.rate
+            if cancel_event is not None:
+                if cancel_event.wait(wait_seconds):
+                    return False
+            else:
+                time.sleep(wait_seconds)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self, retry_after_seconds=None):
+        """429/5xx 응답을 받았을 때 속도를 줄이고, Retry-After가 있으면 그 시간 동안 요청을 멈춥니다."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease_at >= RATE_DECREASE_COOLDOWN_SECONDS:
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                self._last_decrease_at = now
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after_seconds:
+                self._blocked_until = max(self._blocked_until, now + retry_after_seconds)
+            current_rate = self.rate
+        print(f"[RateLimit] {self.host}: throttled, rate -> {current_rate:.2f} req/s"
+              + (f", paused {retry_after_seconds:.1f}s (Retry-After)" if retry_after_seconds else ""), file=sys.stderr)
+
+
+_limiters_lock = threading.Lock()
+_limiters = {} # {host: AdaptiveRateLimiter}
+
+
+def get_rate_limiter(host):
+    """호스트별로 프로세스 전체에서 공유하는 AdaptiveRateLimiter를 반환합니다."""
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(host, **RATE_LIMITS_BY_HOST.get(host, DEFAULT_RATE_LIMIT))
+            _limiters[host] = limiter
+        return limiter
+
+
+def _parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환합니다. 해석할 수 없으면 None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt):
+    """attempt번째 재시도 전 대기 시간: 지수 백오프 상한 안에서 균등 분포 (full jitter)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * (2 ** attempt)))
+
+
+def throttled_get(session, url, cancel_event=None, max_retries=MAX_RETRIES, **kwargs):
+    """
+    호스트별 속도 제한을 지키며 GET 요청을 보내고, 429/5xx 응답과 연결 오류는 재시도합니다.
+    - 재시도 간격: Retry-After가 있으면 그 값, 없으면 지수 백오프 + jitter
+    - 재시도를 모두 소진하면 마지막 응답을 반환하거나 (호출 측의 raise_for_status에서 오류 처리) 마지막 예외를 다시 발생시킵니다.
+    - 대기 중 cancel_event가 설정되면 RequestCancelled를 발생시킵니다.
+    """
+    limiter = get_rate_limiter(urlparse(url).hostname)
+    attempt = 0
+    while True:
+        if not limiter.acquire(cancel_event):
+            raise RequestCancelled(f"Cancelled while waiting for rate limit: {url}")
+        try:
+            response = session.get(url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= max_retries:
+                raise
+            limiter.on_throttle()
+            delay = _backoff_delay(attempt)
+            print(f"[RateLimit] {url}: {type(e).__name__}, retry {attempt + 1}/{max_retries} in {delay:.2f}s", file=sys.stderr)
+        else:
+            if response.status_code not in RETRY_STATUS_CODES:
+                limiter.on_success()
+                return response
+            retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+            limiter.on_throttle(retry_after)
+            if attempt >= max_retries:
+                print(f"[RateLimit] {url}: HTTP {response.status_code}, retries exhausted", file=sys.stderr)
+                return response
+            delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+            print(f"[RateLimit] {url}: HTTP {response.status_code}, retry {attempt + 1}/{max_retries} in {delay:.2f}s", file=sys.stderr)
+        attempt += 1
+        if cancel_event is not None:
+            if cancel_event.wait(delay):
+                raise RequestCancelled(f"Cancelled while waiting to retry: {url}")
+        else:
+            time.sleep(delay)
+
+
+def _create_session(host, headers=None, cookies=None):
+    """host 전용 keep-alive 연결 풀을 가진 세션을 생성합니다."""
+    session = requests.Session()
+    adapter = CountingHTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE_BY_HOST.get(host, 10))
+    session.mount(f'https://{host}', adapter)
+    session.mount(f'http://{host}', adapter)
+    if headers:
+        session.headers.update(headers)
+    if cookies:
+        session.cookies.update(cookies)
+    return session
+
+
+def _get_session(host, headers=None, cookies=None):
+    """
+    (host, 헤더, 쿠키) 조합별로 하나의 세션을 만들어 재사용합니다.
+    모든 수집 단계와 스레드가 같은 세션(=같은 연결 풀)을 공유합니다.
+    """
+    config_key = json.dumps([headers or {}, cookies or {}], sort_keys=True, ensure_ascii=False)
+    session_key = (host, config_key)
+    with _sessions_lock:
+        session = _sessions.get(session_key)
+        if session is not None:
+            _sessions.move_to_end(session_key)
+            return session
+        session = _create_session(host, headers, cookies)
+        _sessions[session_key] = session
+        # 설정이 바뀌어 오래된 세션이 쌓이면 가장 오래 사용되지 않은 세션부터 목록에서 뺌.
+        # 다른 스레드가 아직 쓰고 있을 수 있으므로 close()하지 않고, 참조가 모두 사라지면 연결 풀과 함께 정리됨
+        while len(_sessions) > MAX_CACHED_SESSIONS:
+            _sessions.popitem(last=False)
+        return session
+
+
+def get_land_session(headers, cookies):
+    """사용자 Header/Cookie가 미리 설정된 new.land.naver.com 전용 공유 세션을 반환합니다."""
+    return _get_session(LAND_HOST, headers, cookies)
+
+
+def get_geocode_session(client_id, client_secret):
+    """API 키 헤더가 미리 설정된 역지오코딩 전용 공유 세션을 반환합니다."""
+    api_headers = {"X-NCP-APIGW-API-KEY-ID": client_id or '', "X-NCP-APIGW-API-KEY": client_secret or ''}
+    return _get_session(GEOCODE_HOST, api_headers)
+
+
+def is_cancelled(cancel_event):
+    """
+    수집 취소 여부를 확인합니다. 각 단계는 HTTP 요청 전에 이 함수로 cancel_event(threading.Event)를 확인합니다.
+    cancel_event가 None이면 취소되지 않은 것으로 봅니다.
+    """
+    return cancel_event is not None and cancel_event.is_set()
+
+
+def emit_progress(progress_callback, event_type, **fields):
+    """
+    수집 단계의 진행 이벤트를 progress_callback(event_type, **fields)로 전달합니다.
+    progress_callback이 None이면 아무 것도 하지 않으며, 콜백 오류는 수집을 멈추지 않도록 로그만 남깁니다.
+    이벤트 종류: 'stage'(stage), 'markers_fetched'(count), 'geocoded', 'complexes_planned'(total),
+    'page_fetched'(complex_no, page, articles), 'complex_done'(complex_no, articles)
+    """
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(event_type, **fields)
+    except Exception as e:
+        print(f"Warning (naver_http): progress callback failed for '{event_type}': {e}", file=sys.stderr)
+
+
+def get_connection_stats():
+    """
+    누적 연결 통계를 반환합니다.
+    반환값: {'requests': 요청 수, 'new_connections': 신규 연결 수, 'reused_connections': 재사용 연결 수}
+    """
+    with _stats_lock:
+        requests_count = _connection_stats['requests']
+        new_connections = _connection_stats['new_connections']
+    return {
+        'requests': requests_count,
+        'new_connections': new_connections,
+        'reused_connections': max(0, requests_count - new_connections),
+    }
+
+
+def log_connection_stats(label, since=None):
+    """
+    연결 통계를 stderr에 출력합니다.
+    since에 이전 get_connection_stats() 값을 주면 그 이후 증가분만 출력합니다.
+    """
+    stats = get_connection_stats()
+    if since:
+        stats = {key: stats[key] - since.get(key, 0) for key in stats}
+    print(f"[HTTP] {label}: requests={stats['requests']}, new_connections={stats['new_connections']}, "
+          f"reused_connections={stats['reused_connections']}", file=sys.stderr)
+    return stats
@@ -0,0 +1,182 @@
+# src/fetch_jobs.py
+import sys
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+FETCH_JOB_MAX_WORKERS = 4 # 동시에 실행할 조회 작업 수 (작업마다 단지 수집 스레드를 따로 사용)
+FETCH_JOB_RETENTION_SECONDS = 600 # 끝난 작업 기록을 보관하는 시간
+
+# 작업 상태 값
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_CANCELLED = "cancelled"
+JOB_FAILED = "failed"
+
+
+# 진행 이벤트 중 HTTP 요청 1건에 해당하는 이벤트
+_REQUEST_EVENTS = ('markers_fetched', 'geocoded', 'page_fetched')
+
+
+class FetchProgress:
+    """
+    수집 단계가 보내는 진행 이벤트(progress_callback)를 모아 진행률/처리량/남은 시간을 계산합니다.
+    인스턴스 자체를 progress_callback으로 넘기며, 여러 수집 스레드에서 동시에 호출될 수 있습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.last_event_at = self.started_at
+        self.details_started_at = None
+        self.stage = None
+        self.complexes_total = 0
+        self.complexes_done = 0
+        self.pages_fetched = 0
+        self.articles_collected = 0
+        self.requests = 0
+
+    def __call__(self, event_type, **fields):
+        with self._lock:
+            now = time.time()
+            self.last_event_at = now
+            if event_type in _REQUEST_EVENTS:
+                self.requests += 1
+            if event_type == 'stage':
+                self.stage = fields.get('stage')
+                if self.stage == 'details':
+                    self.details_started_at = now
+            elif event_type == 'complexes_planned':
+                self.complexes_total = fields.get('total', 0)
+            elif event_type == 'page_fetched':
+                self.pages_fetched += 1
+                self.articles_collected += fields.get('articles', 0)
+            elif event_type == 'complex_done':
+                self.complexes_done += 1
+
+    def snapshot(self):
+        """
+        현재 진행 상황을 딕셔너리로 반환합니다.
+        fraction(0~1), requests_per_second, eta_seconds(단지 처리 속도 기준, 계산 불가 시 None),
+        idle_seconds(마지막 이벤트 이후 경과 시간: 느린 지역과 멈춘 작업을 구분하는 데 사용) 포함
+        """
+        with self._lock:
+            now = time.time()
+            elapsed = now - self.started_at
+            eta_seconds = None
+            if self.complexes_total:
+                fraction = 0.1 + 0.9 * min(1.0, self.complexes_done / self.complexes_total)
+                if self.details_started_at and self.complexes_done:
+                    seconds_per_complex = (now - self.details_started_at) / self.complexes_done
+                    eta_seconds = seconds_per_complex * (self.complexes_total - self.complexes_done)
+            else:
+                fraction = 0.05 if self.stage == 'markers' else 0.0
+            return {
+                'stage': self.stage, 'fraction': fraction,
+                'complexes_done': self.complexes_done, 'complexes_total': self.complexes_total,
+                'pages_fetched': self.pages_fetched, 'articles_collected': self.articles_collected,
+                'requests': self.requests, 'requests_per_second': (self.requests / elapsed) if elapsed > 0 else 0.0,
+                'elapsed_seconds': elapsed, 'eta_seconds': eta_seconds, 'idle_seconds': now - self.last_event_at,
+            }
+
+
+class FetchJob:
+    """
+    백그라운드 조회 작업 하나의 상태.
+    cancel_event는 수집 단계에 그대로 전달되어, 설정되면 다음 HTTP 요청 전에 수집이 중단됩니다.
+    progress는 수집 단계의 진행 이벤트를 모으는 FetchProgress입니다.
+    """
+
+    def __init__(self, job_id, description=""):
+        self.job_id = job_id
+        self.description = description
+        self.status = JOB_PENDING
+        self.result = None # 작업 함수의 반환값
+        self.error = None # 예외 발생 시 메시지
+        self.cancel_event = threading.Event()
+        self.progress = FetchProgress()
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def is_finished(self):
+        return self.status in (JOB_DONE, JOB_CANCELLED, JOB_FAILED)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class FetchJobRunner:
+    """
+    조회 작업을 스레드 풀에서 실행하고 작업 ID로 상태를 조회/취소할 수 있게 하는 실행기.
+    Streamlit 스크립트는 작업을 제출한 뒤 바로 반환하고, 이후 rerun에서 상태를 확인합니다.
+    """
+
+    def __init__(self, max_workers=FETCH_JOB_MAX_WORKERS, retention_seconds=FETCH_JOB_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch_job")
+        self._jobs = {} # {job_id: FetchJob}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, description="", **kwargs):
+        """
+        func(*args, cancel_event=..., progress_callback=..., **kwargs)를 백그라운드에서 실행하고 작업 ID를 반환합니다.
+        func는 cancel_event, progress_callback 키워드 인자를 받아야 합니다.
+        """
+        job = FetchJob(uuid.uuid4().hex[:12], description)
+        with self._lock:
+            self._discard_old_jobs()
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, func, args, kwargs)
+        print(f"[FetchJob] 제출: {job.job_id} ({description})", file=sys.stderr)
+        return job.job_id
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancel_event.is_set(): # 시작 전에 취소됨
+            job.finished_at = time.time()
+            job.status = JOB_CANCELLED
+            return
+        job.status = JOB_RUNNING
+        try:
+            job.result = func(*args, cancel_event=job.cancel_event, progress_callback=job.progress, **kwargs)
+            final_status = JOB_CANCELLED if job.cancel_event.is_set() else JOB_DONE
+        except Exception as e:
+            job.error = str(e)
+            final_status = JOB_FAILED
+            print(f"[FetchJob] 실패: {job.job_id} ({job.description}): {e}", file=sys.stderr)
+        job.finished_at = time.time() # 상태보다 먼저 기록 (끝난 작업은 항상 finished_at을 가짐)
+        job.status = final_status
+        print(f"[FetchJob] 종료: {job.job_id} ({job.description}) - {job.status}, "
+              f"{job.finished_at - job.created_at:.1f}s", file=sys.stderr)
+
+    def get(self, job_id):
+        """작업 ID에 해당하는 FetchJob을 반환합니다. 없으면 None."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """작업에 취소를 요청합니다. 진행 중인 HTTP 요청이 끝나는 대로 수집이 멈춥니다."""
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job.cancel()
+        print(f"[FetchJob] 취소 요청: {job_id} ({job.description})", file=sys.stderr)
+        return True
+
+    def _discard_old_jobs(self):
+        """보관 시간이 지난 끝난 작업 기록을 삭제합니다. (self._lock 안에서 호출)"""
+        now = time.time()
+        expired_ids = [job_id for job_id, job in self._jobs.items()
+                       if job.is_finished and now - job.finished_at > self.retention_seconds]
+        for job_id in expired_ids:
+            del self._jobs[job_id]
+
+
+_job_runner = FetchJobRunner()
+
+
+def get_fetch_job_runner():
+    """프로세스 전체에서 공유하는 FetchJobRunner를 반환합니다."""
+    return _job_runner
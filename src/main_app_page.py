@@ -8,17 +8,107 @@ import folium
 import sys
 
 # 다른 모듈에서 필요한 함수들 임포트 (src 패키지 경로 사용)
-from src.utils import create_article_url, shorten_text, get_current_date_str
-from src.data_handling import fetch_data # 이 fetch_data는 st.session_state를 사용하도록 수정되어야 함
-from src.data_processor import filter_out_low_floors, sort_dataframe, create_summary, extract_year_from_string
+from src.utils import (create_article_url, shorten_text, get_current_date_str, format_elapsed_time, TYPED_COLUMNS,
+                       floor_filter_key, floor_filter_label, floor_filter_suffix)
+from src.data_handling import submit_fetch_job, get_refresh_status # 조회는 백그라운드 작업으로 실행되며, 지역(cortarNo) 단위 캐시를 내부에서 처리
+from src.fetch_jobs import get_fetch_job_runner, JOB_FAILED
+from src.region_cache import get_region_cache
+from src.external_scripts.crawl_filters import TRADE_TYPE_CODES, UNBOUNDED
+from src.data_processor import (floor_filter_mask, sort_dataframe, create_summary, extract_year_from_string,
+                                add_typed_columns, compact_dataframe, dataframe_memory_report)
 from src.exporters import to_excel, export_combined_excel
 from src.ui_elements import create_folium_map, display_table_with_aggrid
 
-# 데이터 가져오기 캐시 함수 (이전과 동일, 반환값 3개 유의)
-@st.cache_data(ttl=600)
-def cached_fetch_data_main(coords_tuple, output_dir_param):
-    print(f"--- cached_fetch_data_main 호출 for {coords_tuple} ---", file=sys.stderr)
-    return fetch_data(coords_tuple, output_dir_param)
+
+STALE_REFRESH_POLL_SECONDS = 2 # 백그라운드 갱신 완료 여부 확인 주기
+FETCH_JOB_POLL_SECONDS = 1 # 백그라운드 조회 작업 상태 확인 주기
+FETCH_STAGE_LABELS = {
+    'region': "지역 확인 중", 'markers': "단지 목록 수집 중",
+    'details': "매물 수집 중", 'building': "결과 정리 중",
+}
+FETCH_IDLE_WARNING_SECONDS = 20 # 이 시간 동안 진행 이벤트가 없으면 응답 지연 경고 표시
+CRAWL_PRICE_SLIDER_MAX = 50 # 가격 슬라이더 최대값 (억). 최대값 선택 시 상한 없음
+CRAWL_AREA_SLIDER_MAX = 300 # 면적 슬라이더 최대값 (㎡). 최대값 선택 시 상한 없음
+FLOOR_RATIO_SLIDER_MAX = 50 # '하위 N% 층 제외' 슬라이더 최대값 (%)
+FLOOR_BAND_OPTIONS = ['저', '중', '고']
+
+
+def build_crawl_params():
+    """
+    조회 조건 위젯 값(세션 상태)을 네이버 API 조회 조건(crawl_params)으로 변환합니다.
+    가격은 억 -> 만원으로 바꾸고, 슬라이더 최대값은 '상한 없음'으로 보냅니다.
+    """
+    price_min, price_max = st.session_state.get('crawl_price_range', (0, CRAWL_PRICE_SLIDER_MAX))
+    area_min, area_max = st.session_state.get('crawl_area_range', (0, CRAWL_AREA_SLIDER_MAX))
+    return {
+        'trade_types': [TRADE_TYPE_CODES[name] for name in st.session_state.get('crawl_trade_types') or TRADE_TYPE_CODES],
+        'price_min': int(price_min * 10000),
+        'price_max': UNBOUNDED if price_max >= CRAWL_PRICE_SLIDER_MAX else int(price_max * 10000),
+        'area_min': int(area_min),
+        'area_max': UNBOUNDED if area_max >= CRAWL_AREA_SLIDER_MAX else int(area_max),
+        'min_households': int(st.session_state.get('crawl_min_households') or 0),
+        'max_listings_per_complex': int(st.session_state.get('crawl_max_listings_per_complex') or 0),
+    }
+
+
+def prepare_fetched_df(df_fetched):
+    """
+    조회된 매물 DataFrame에 매물 링크를 추가하고 연식/세대수/단지매물수를 숫자형으로 변환합니다.
+    가격/면적/평형/층 숫자 열(add_typed_columns)도 여기서 한 번만 계산해 정렬/필터/요약이 재사용합니다.
+    세션에 보관되므로 compact_dataframe으로 반복 문자열은 category, 정수는 작은 정수형으로 줄여 반환합니다.
+    """
+    df_processed = df_fetched.copy()
+    df_processed['매물 링크'] = df_processed.apply(
+        lambda x: create_article_url(
+            x.get('articleNo'), x.get('markerId'),
+            x.get('latitude'), x.get('longitude')
+        ), axis=1
+    )
+    if 'completionYearMonth' in df_processed.columns:
+        df_processed['completionYearMonth'] = df_processed['completionYearMonth'].apply(
+            extract_year_from_string
+        ).astype('Int64')
+    if 'totalHouseholdCount' in df_processed.columns:
+        df_processed['totalHouseholdCount'] = pd.to_numeric(
+            df_processed['totalHouseholdCount'], errors='coerce'
+        ).astype('Int64')
+    if 'sameAddrCnt' in df_processed.columns:
+        df_processed['sameAddrCnt'] = pd.to_numeric(
+            df_processed['sameAddrCnt'], errors='coerce'
+        ).astype('Int64')
+    df_compacted = compact_dataframe(add_typed_columns(df_processed))
+    memory_report = dataframe_memory_report([df_compacted])
+    print(f"Main App Page: 매물 DataFrame 메모리 {memory_report['uncompacted_bytes'] / 1e6:.1f}MB -> "
+          f"{memory_report['bytes'] / 1e6:.1f}MB", file=sys.stderr)
+    return df_compacted
+
+
+def set_current_df(df):
+    """현재 조회 결과를 바꾸고, 이전 결과로 계산해 둔 층 필터 마스크를 비웁니다."""
+    st.session_state.current_df = df
+    st.session_state.floor_mask_cache = {}
+
+
+def get_floor_filter_mask(df, floor_filter):
+    """
+    현재 조회 결과(df)에 대한 층 필터 마스크를 조건별로 세션에 캐시해 재실행(rerun)마다 다시 계산하지 않습니다.
+    캐시는 set_current_df로 조회 결과가 바뀔 때 비워집니다. 층 정보가 없으면 None.
+    """
+    cache = st.session_state.setdefault('floor_mask_cache', {})
+    cache_key = tuple(sorted(floor_filter.items()))
+    if cache_key not in cache:
+        cache[cache_key] = floor_filter_mask(df, **floor_filter)
+    return cache[cache_key]
+
+
+def get_session_memory_report():
+    """현재 조회 결과와 선택된 지역 그룹(상세/요약)이 세션에서 차지하는 메모리와 압축으로 절약한 양을 집계합니다."""
+    frames = [st.session_state.get('current_df')]
+    for group_data in st.session_state.get('selected_areas', {}).values():
+        frames.extend([group_data.get('detail'), group_data.get('summary')])
+    return dataframe_memory_report(frames)
+
+
 def display_main_app_view():
     """
     메인 애플리케이션의 UI와 로직을 표시합니다.
@@ -53,7 +143,7 @@ def display_main_app_view():
 # 1. 페이지 기본 정보 및 스타일 설정 (이전과 동일) ####
 # ==============================================================================
     st.title("부동산 실시간 호가 검색 프로그램")
-    text = "네이버 부동산 API를 사용하여 특정 좌표에 대한 부동산 목록을 가져와서 표시합니다.<br>조회 기준은 300세대 이상 아파트 입니다."
+    text = "네이버 부동산 API를 사용하여 특정 좌표에 대한 부동산 목록을 가져와서 표시합니다.<br>기본 조회 기준은 300세대 이상 아파트의 매매/전세 매물이며, 조회 조건에서 변경할 수 있습니다."
     st.markdown(text, unsafe_allow_html=True)
 
     # 메인 앱 범위에서 사용할 상수 및 변수 
@@ -61,31 +151,6 @@ def display_main_app_view():
     os.makedirs(OUTPUT_DIR, exist_ok=True) 
     current_date = get_current_date_str()
 
-    # HTML/CSS 코드 (전체 화면 오버레이)
-    custom_css = """
-    <style>
-    .fullscreen-overlay {
-        position: fixed; top: 0; left: 0; width: 100%; height: 100%;
-        background-color: rgba(0, 0, 0, 0.65); z-index: 99999;
-        display: flex; flex-direction: column; justify-content: center; align-items: center;
-        color: white; font-family: sans-serif;
-    }
-    .loading-spinner-small {
-        border: 6px solid #f3f3f3; border-top: 6px solid #007bff;
-        border-radius: 50%; width: 60px; height: 60px;
-        animation: spin 1s linear infinite;
-    }
-    .loading-text { margin-top: 20px; font-size: 1.2em; letter-spacing: 1px; }
-    @keyframes spin { 0% { transform: rotate(0deg); } 100% { transform: rotate(360deg); } }
-    </style>
-    """
-    overlay_html_with_text = """
-    <div class="fullscreen-overlay">
-        <div class="loading-spinner-small"></div>
-        <div class="loading-text">⏳ 데이터를 가져오는 중입니다...</div>
-    </div>
-    """
-    st.markdown(custom_css, unsafe_allow_html=True) # CSS는 한 번만 주입
 # ==============================================================================
 # 2. 팝업 다이얼로그 및 콜백 함수 정의 #
 # ==============================================================================
@@ -125,10 +190,6 @@ def display_main_app_view():
             return
 
         lat, lng = map_state['last_clicked']['lat'], map_state['last_clicked']['lng']
-        if st.session_state.is_fetching:
-            print("Callback_main: 데이터 조회 중 - 클릭 무시")
-            return
-        
         if None in (lat, lng): return
         
         last_click_time = st.session_state.get('last_click_time', 0)
@@ -139,6 +200,12 @@ def display_main_app_view():
         
         clicked_coords_tuple = (lat, lng)
         print(f"Callback_main: 새 좌표 감지 {clicked_coords_tuple}")
+
+        # 이전 조회가 아직 진행 중이면 취소하고 새 좌표를 조회 (버려진 클릭이 수집 용량을 쓰지 않도록)
+        previous_job_id = st.session_state.get('fetch_job_id')
+        if st.session_state.is_fetching and previous_job_id:
+            get_fetch_job_runner().cancel(previous_job_id)
+            print(f"Callback_main: 이전 조회 작업 취소 ({previous_job_id})")
         
         st.session_state.last_click_time = current_time_cb
         st.session_state.coords_to_fetch = clicked_coords_tuple
@@ -146,21 +213,37 @@ def display_main_app_view():
         st.session_state.fetch_start_time = current_time_cb
         st.session_state.error_message = None
         st.session_state.dong_name = None
-        st.session_state.current_df = pd.DataFrame()
+        set_current_df(pd.DataFrame())
+        st.session_state.stale_refresh = None
+        st.session_state.fetch_job_id = None
+        st.session_state.fetch_warning = None
 # ==============================================================================
 # 3. UI 레이아웃 구성 (지도, 그룹 관리, 오버레이) ####
 # ==============================================================================
-    # --- 오버레이 조건부 표시  ---
-    # custom_css는 위에서 이미 markdown으로 주입됨
-    if st.session_state.is_fetching:
-        st.markdown(overlay_html_with_text, unsafe_allow_html=True)
-        print("Main App Page: is_fetching is True. 오버레이 표시.")
-        
     # --- 지도 및 선택 지역 목록 레이아웃  ---
     left_column, right_column = st.columns([3, 1])
 
     with left_column:
         st.markdown("### 🗺️ 지도에서 위치 클릭")
+        with st.expander("🔎 조회 조건 (다음 조회부터 네이버 API 요청에 적용)"):
+            col_trade, col_households, col_cheapest = st.columns([2, 1, 1])
+            with col_trade:
+                st.multiselect("거래유형", list(TRADE_TYPE_CODES), key='crawl_trade_types')
+            with col_households:
+                st.number_input("최소 세대수", min_value=0, step=100, key='crawl_min_households')
+            with col_cheapest:
+                st.number_input("단지별 최저가 매물 수 (거래유형별, 0 = 전체)", min_value=0, step=5,
+                                key='crawl_max_listings_per_complex',
+                                help="가격순으로 수집하다가 이 개수를 채우면 해당 단지의 남은 페이지는 요청하지 않습니다.")
+            col_price, col_area = st.columns(2)
+            with col_price:
+                st.slider(f"가격 (억, 매매가/보증금 · {CRAWL_PRICE_SLIDER_MAX}억 = 상한 없음)",
+                          min_value=0, max_value=CRAWL_PRICE_SLIDER_MAX, key='crawl_price_range')
+            with col_area:
+                st.slider(f"면적 (㎡ · {CRAWL_AREA_SLIDER_MAX}㎡ = 상한 없음)",
+                          min_value=0, max_value=CRAWL_AREA_SLIDER_MAX, step=5, key='crawl_area_range')
+        st.toggle("이전 조회 결과 먼저 보기 (만료된 지역은 백그라운드에서 최신 데이터로 갱신)",
+                  key='serve_stale_snapshots')
         folium_map_instance = create_folium_map() # from src.ui_elements
         map_interaction_return_value = st_folium(
             folium_map_instance,
@@ -177,8 +260,9 @@ def display_main_app_view():
             st.info("지도에서 위치를 클릭하고 데이터를 조회한 후, '지역 추가' 버튼을 눌러 그룹을 생성하세요.")
         else:
             display_names = []
-            for (division, dong, exclude_low_floors_flag) in selected_areas.keys(): # 변수명 일치
-                suffix = ' (저층 제외)' if exclude_low_floors_flag else ''
+            for (division, dong, floor_key) in selected_areas.keys(): # 변수명 일치
+                floor_label = floor_filter_label(floor_key)
+                suffix = f' ({floor_label})' if floor_label else ''
                 display_names.append(f"{division} {dong}{suffix}")
             
             selected_idx = st.selectbox("관리할 지역 그룹 선택:", range(len(display_names)),
@@ -246,95 +330,118 @@ def display_main_app_view():
 # 4. 메인 데이터 조회 및 처리 로직 #
 # ==============================================================================    
     # ---  메인 데이터 조회 및 처리 로직 ---
+    # 조회는 백그라운드 작업(fetch_jobs)으로 실행되므로 이 스크립트는 네이버 API 응답을 기다리지 않습니다.
     print(f"\n=== Rerun Start (Main App Page) ===") # 로그 추가
     print(f"is_fetching: {st.session_state.is_fetching}")
-    print(f"coords_to_fetch: {st.session_state.coords_to_fetch}")
+    print(f"coords_to_fetch: {st.session_state.coords_to_fetch}, fetch_job_id: {st.session_state.get('fetch_job_id')}")
 
-    coords_to_fetch_now = st.session_state.get('coords_to_fetch')
-    # API 키 오류 팝업이 떠야 하는 상황이 아니고, 실제로 데이터를 가져와야 할 때만 아래 로직 실행
-    if not st.session_state.get('show_api_key_error_popup_on_main_page') and not st.session_state.get('error_popup_on_main_page') and coords_to_fetch_now is not None and st.session_state.get('is_fetching'):
-        
-        print(f"Main App Page Logic: 데이터 조회 시작 - {coords_to_fetch_now}", file=sys.stderr)
-        st.session_state.coords_to_fetch = None # 한 번만 조회하도록 초기화
-        try:
-            print(f"Main App Page Logic: cached_fetch_data_main 호출 ({coords_to_fetch_now}, {OUTPUT_DIR})")
-            df_fetched, dong_name_from_fetch, error_signal = cached_fetch_data_main(coords_to_fetch_now, OUTPUT_DIR)
-            
-            # ======================== ▼▼▼ 에러 신호 처리 ▼▼▼ ========================
-            # ======================== API KEY ERROR =============================
-            if error_signal == "API_KEY_ERROR_SIGNAL":
-                print("Main App Page: API Key Error Signal received from fetch_data.", file=sys.stderr)
-                st.session_state.show_api_key_error_popup_on_main_page = True # 현재 페이지에 팝업 띄우기
-                st.session_state.is_fetching = False # 로딩 중 상태 해제
-                st.rerun() # app.py의 라우팅 로직을 다시 타도록 함
-                return # 현재 display_main_app_view 함수 실행 중단 (rerun이 실행 흐름을 변경)
-            # ======================== 일반적 ERROR(Cookie, Header) =============================
-            elif error_signal == "ERROR":
-                print("Main App Page: Error Signal received from fetch_data.", file=sys.stderr)
-                st.session_state.error_popup_on_main_page = True # 현재 페이지에 팝업 띄우기
-                st.session_state.is_fetching = False # 로딩 중 상태 해제
-                st.rerun() # app.py의 라우팅 로직을 다시 타도록 함
-                return # 현재 display_main_app_view 함수 실행 중단 (rerun이 실행 흐름을 변경)
-            # ======================== ▲▲▲ API 키 에러 신호 처리 ▲▲▲ ========================
-            
-            if dong_name_from_fetch and dong_name_from_fetch != "Unknown":
-                st.session_state.dong_name = dong_name_from_fetch
-            else:
-                st.session_state.dong_name = "지역명 확인 불가"
+    def apply_fetch_result_main(job):
+        """끝난 조회 작업의 결과를 세션 상태에 반영합니다 (오류 신호는 팝업 플래그로 변환)."""
+        fetch_coords = st.session_state.get('fetch_job_coords')
+        if job is None or job.status == JOB_FAILED or job.result is None:
+            error_msg = f"데이터 조회 중 오류 발생: {job.error if job else '조회 작업 기록을 찾을 수 없습니다.'}"
+            st.session_state.error_message = error_msg
+            set_current_df(pd.DataFrame())
+            st.session_state.dong_name = None
+            st.session_state.last_coords = None
+            print(f"Main App Page Logic: 작업 실패 - {error_msg}", file=sys.stderr)
+            return
 
+        df_fetched, dong_name_from_fetch, error_signal, stale_info = job.result
+        # ======================== ▼▼▼ 에러 신호 처리 ▼▼▼ ========================
+        if error_signal == "CANCELLED":
+            print("Main App Page: 조회 작업이 취소되었습니다.", file=sys.stderr)
+            return
+        # ======================== API KEY ERROR =============================
+        if error_signal == "API_KEY_ERROR_SIGNAL":
+            print("Main App Page: API Key Error Signal received from fetch job.", file=sys.stderr)
+            st.session_state.show_api_key_error_popup_on_main_page = True # 현재 페이지에 팝업 띄우기
+            return
+        # ======================== 일반적 ERROR(Cookie, Header) =============================
+        elif error_signal == "ERROR":
+            print("Main App Page: Error Signal received from fetch job.", file=sys.stderr)
+            st.session_state.error_popup_on_main_page = True # 현재 페이지에 팝업 띄우기
+            return
+        # ======================== ▲▲▲ 에러 신호 처리 ▲▲▲ ========================
+
+        # 요청 제한/서버 오류로 일부 단지를 끝까지 수집하지 못한 경우: 데이터는 표시하되 경고
+        if error_signal == "PARTIAL":
+            st.session_state.fetch_warning = "일부 단지의 매물을 끝까지 가져오지 못했습니다 (요청 제한 또는 서버 오류). 다시 조회하면 나머지를 수집합니다."
+        # 만료된 스냅샷이면 백그라운드 재수집 정보를 보관 (나이 표시 및 갱신 후 교체용)
+        st.session_state.stale_refresh = dict(stale_info, served_at=time.time()) if stale_info else None
+        if dong_name_from_fetch and dong_name_from_fetch != "Unknown":
+            st.session_state.dong_name = dong_name_from_fetch
+        else:
+            st.session_state.dong_name = "지역명 확인 불가"
+
+        st.session_state.last_coords = {'lat': fetch_coords[0], 'lng': fetch_coords[1]} if fetch_coords else None
+        try:
             if df_fetched is not None and not df_fetched.empty:
-                df_processed = df_fetched.copy()
-                df_processed['매물 링크'] = df_processed.apply(
-                    lambda x: create_article_url(
-                        x.get('articleNo'), x.get('markerId'),
-                        x.get('latitude'), x.get('longitude')
-                    ), axis=1
-                )
-                if 'completionYearMonth' in df_processed.columns:
-                    df_processed['completionYearMonth'] = df_processed['completionYearMonth'].apply(
-                        extract_year_from_string
-                    ).astype('Int64')
-                if 'totalHouseholdCount' in df_processed.columns:
-                    df_processed['totalHouseholdCount'] = pd.to_numeric(
-                        df_processed['totalHouseholdCount'], errors='coerce'
-                    ).astype('Int64')
-                if 'sameAddrCnt' in df_processed.columns:
-                    df_processed['sameAddrCnt'] = pd.to_numeric(
-                        df_processed['sameAddrCnt'], errors='coerce'
-                    ).astype('Int64')
-
-                st.session_state.current_df = df_processed
-                st.session_state.last_coords = {'lat': coords_to_fetch_now[0], 'lng': coords_to_fetch_now[1]}
-                print(f"Main App Page Logic: 데이터 처리 성공 ({len(df_processed)} rows)")
-                # fetch_success_flag = True
+                set_current_df(prepare_fetched_df(df_fetched))
+                print(f"Main App Page Logic: 데이터 처리 성공 ({len(st.session_state.current_df)} rows)")
             else:
-                st.session_state.current_df = pd.DataFrame()
-                st.session_state.last_coords = {'lat': coords_to_fetch_now[0], 'lng': coords_to_fetch_now[1]}
+                set_current_df(pd.DataFrame())
                 print("Main App Page Logic: 조회 완료 - 데이터 없음")
-                # fetch_success_flag = True # 데이터가 없어도 조회 자체는 성공으로 간주 가능
-
         except Exception as e:
             error_msg = f"데이터 조회 중 오류 발생: {str(e)}"
             st.session_state.error_message = error_msg
-            st.session_state.current_df = pd.DataFrame()
+            set_current_df(pd.DataFrame())
             st.session_state.dong_name = None
             st.session_state.last_coords = None
             print(f"Main App Page Logic: Exception 발생 - {error_msg}")
-            st.error(error_msg) # UI에 즉시 에러 표시
-            # st.exception(e) # 디버깅 시 상세 traceback 표시용
-
-        finally:
-            # 이 finally 블록은 API 키 에러로 인해 위에서 return 되기 전에 실행될 수도 있고,
-            # rerun() 호출로 인해 실행 흐름이 바뀌어 도달하지 않을 수도 있습니다.
-            # API 키 에러로 인한 강제 리디렉션 플래그가 설정되지 않았을 때만 is_fetching을 False로 설정하고 rerun합니다.
-            if not st.session_state.get('force_redirect_to_config'): # API 키 에러로 인한 강제 리디렉션이 아닐 때만
-                print("Main App Page Logic: finally 블록 - 일반적인 경우", file=sys.stderr)
-                st.session_state.is_fetching = False 
-                st.session_state.fetch_start_time = None
-                print(f"Main App Page Logic: finally - is_fetching을 False로 설정 완료.", file=sys.stderr)
-                st.rerun() # 상태 변경 후 UI 즉시 새로고침하여 결과 표시
-            else:
-                print("Main App Page Logic: finally 블록 - force_redirect_to_config is True, no extra rerun from here.", file=sys.stderr)
+
+    # --- 4-1. 새로 클릭된 좌표가 있으면 백그라운드 조회 작업 제출 ---
+    coords_to_fetch_now = st.session_state.get('coords_to_fetch')
+    # API 키 오류 팝업이 떠야 하는 상황이 아니고, 실제로 데이터를 가져와야 할 때만 아래 로직 실행
+    if not st.session_state.get('show_api_key_error_popup_on_main_page') and not st.session_state.get('error_popup_on_main_page') and coords_to_fetch_now is not None and st.session_state.get('is_fetching'):
+        print(f"Main App Page Logic: 조회 작업 제출 - {coords_to_fetch_now}", file=sys.stderr)
+        st.session_state.coords_to_fetch = None # 한 번만 조회하도록 초기화
+        # 좌표가 아닌 지역(cortarNo) + 조회 조건 단위로 캐시되므로, 같은 동 안의 다른 클릭은 재수집 없이 반환됨
+        st.session_state.fetch_job_id = submit_fetch_job(
+            coords_to_fetch_now, OUTPUT_DIR, serve_stale=bool(st.session_state.get('serve_stale_snapshots')),
+            crawl_params=build_crawl_params()
+        )
+        st.session_state.fetch_job_coords = coords_to_fetch_now
+
+    # --- 4-2. 진행 중인 조회 작업 상태 표시 (이 부분만 주기적으로 다시 실행) ---
+    if st.session_state.is_fetching and st.session_state.get('fetch_job_id'):
+        @st.fragment(run_every=FETCH_JOB_POLL_SECONDS)
+        def display_fetch_job_status_main():
+            job_runner = get_fetch_job_runner()
+            job = job_runner.get(st.session_state.get('fetch_job_id'))
+            if job is not None and not job.is_finished:
+                progress = job.progress.snapshot()
+                progress_text = f"⏳ {FETCH_STAGE_LABELS.get(progress['stage'], '조회 준비 중')}"
+                if progress['complexes_total']:
+                    progress_text += (f" · 단지 {progress['complexes_done']}/{progress['complexes_total']}"
+                                      f" · 페이지 {progress['pages_fetched']} · 매물 {progress['articles_collected']}건")
+                progress_text += f" · {progress['requests_per_second']:.1f} req/s · {progress['elapsed_seconds']:.0f}초 경과"
+                if progress['eta_seconds'] is not None:
+                    progress_text += f" · 남은 시간 약 {format_elapsed_time(progress['eta_seconds'])}"
+
+                col_status, col_cancel = st.columns([4, 1])
+                with col_status:
+                    st.progress(progress['fraction'], text=progress_text)
+                    if progress['idle_seconds'] > FETCH_IDLE_WARNING_SECONDS:
+                        st.warning(f"{progress['idle_seconds']:.0f}초 동안 응답이 없습니다. 네트워크 또는 네이버 API 상태를 확인하거나 조회를 취소하세요.")
+                with col_cancel:
+                    if st.button("⛔ 조회 취소", key="cancel_fetch_job_main", use_container_width=True):
+                        job_runner.cancel(job.job_id)
+                        st.session_state.is_fetching = False
+                        st.session_state.fetch_job_id = None
+                        st.session_state.fetch_start_time = None
+                        st.toast("조회를 취소했습니다.")
+                        st.rerun()
+                return
+
+            print(f"Main App Page Logic: 조회 작업 종료 ({job.status if job else 'missing'})", file=sys.stderr)
+            st.session_state.is_fetching = False
+            st.session_state.fetch_job_id = None
+            st.session_state.fetch_start_time = None
+            apply_fetch_result_main(job)
+            st.rerun() # 상태 변경 후 UI 전체를 새로고침하여 결과(또는 오류 팝업) 표시
+
+        display_fetch_job_status_main()
 # ==============================================================================
 # 5. 데이터 테이블 및 관련 UI 표시 #
 # ==============================================================================
@@ -346,9 +453,54 @@ def display_main_app_view():
             st.info(f"{st.session_state.dong_name} 지역의 매물 데이터가 없거나 불러오지 못했습니다.")
         elif not st.session_state.current_df.empty and st.session_state.dong_name:
             current_dong_name_main = st.session_state.dong_name # 변수명 구분
-            df_display_source_main = st.session_state.current_df.copy() # 변수명 구분
+            df_display_source_main = st.session_state.current_df # 변수명 구분 (읽기 전용이므로 복사하지 않음)
             
             st.subheader(f"📍 현재 조회된 지역: {current_dong_name_main}")
+            if st.session_state.get('fetch_warning'):
+                st.warning(st.session_state.fetch_warning)
+            region_cache_stats = get_region_cache().stats()
+            st.caption(f"지역 캐시 적중률: {region_cache_stats['hit_ratio']:.0%} "
+                       f"(적중 {region_cache_stats['hits']}, 그중 공유 디스크 캐시 {region_cache_stats['disk_hits']} / "
+                       f"미적중 {region_cache_stats['misses']})")
+            session_memory = get_session_memory_report()
+            st.caption(f"세션 데이터 메모리: {session_memory['bytes'] / 1e6:.1f}MB "
+                       f"(압축 전 {session_memory['uncompacted_bytes'] / 1e6:.1f}MB, "
+                       f"{session_memory['saved_bytes'] / 1e6:.1f}MB 절약)")
+
+            # --- 만료된 스냅샷 표시 중: 나이 표시 + 백그라운드 갱신 완료 시 최신 데이터로 교체 ---
+            if st.session_state.get('stale_refresh'):
+                @st.fragment(run_every=STALE_REFRESH_POLL_SECONDS)
+                def display_stale_refresh_status_main():
+                    stale_refresh = st.session_state.get('stale_refresh')
+                    if not stale_refresh:
+                        return
+                    snapshot_age = stale_refresh['age_seconds'] + (time.time() - stale_refresh['served_at'])
+                    if stale_refresh.get('refresh_failed'):
+                        st.warning(f"⏱ {format_elapsed_time(snapshot_age)} 전 스냅샷입니다. 최신 데이터 갱신에 실패하여 이전 결과를 표시합니다.")
+                        return
+
+                    refresh_status = get_refresh_status(stale_refresh['cache_key'])
+                    if refresh_status == "running":
+                        st.info(f"⏱ {format_elapsed_time(snapshot_age)} 전 스냅샷을 표시 중입니다. 최신 데이터로 갱신하는 중...")
+                        return
+
+                    # 성공으로 끝났거나, 작업 기록이 이미 정리된 경우(None)에는 지역 캐시에 최신 결과가 있는지 확인
+                    # (peek: 적중/미적중 집계에 포함하지 않음. 만료된 스냅샷은 TTL 밖이므로 여기서 반환되지 않음)
+                    refreshed_result = None
+                    if refresh_status is None or refresh_status[1] is None:
+                        refreshed_result = get_region_cache().peek(stale_refresh['cache_key'])
+                    if refreshed_result is not None:
+                        refreshed_df, refreshed_dong_name = refreshed_result
+                        set_current_df(prepare_fetched_df(refreshed_df))
+                        st.session_state.dong_name = refreshed_dong_name
+                        st.session_state.stale_refresh = None
+                        print("Main App Page: 백그라운드 갱신 완료 - 최신 데이터로 교체", file=sys.stderr)
+                    else:
+                        print(f"Main App Page: 백그라운드 갱신 실패 또는 결과 없음 ({refresh_status})", file=sys.stderr)
+                        st.session_state.stale_refresh = dict(stale_refresh, refresh_failed=True)
+                    st.rerun() # 표와 요약을 새 데이터로 다시 그림
+
+                display_stale_refresh_status_main()
             
             display_columns_map = {
                 "articleName": "매물명", "divisionName": "구", "cortarName": "동",
@@ -357,7 +509,8 @@ def display_main_app_view():
                 "tradeTypeName": "거래유형", "floorInfo": "층수", "areaName": "공급면적",
                 "direction": "방향", "articleFeatureDesc": "특징", "tagList": "태그",
                 "realtorName": "중개사", "sameAddrCnt": "단지매물수", "cpName": "정보제공",
-                "매물 링크": "매물 링크"
+                "매물 링크": "매물 링크",
+                **{col: col for col in TYPED_COLUMNS} # 정렬/필터/요약용 숫자 열 (표/엑셀에는 표시 안 함)
             }
             cols_to_display = [col for col in display_columns_map.keys() if col in df_display_source_main.columns]
             df_display = df_display_source_main[cols_to_display].rename(columns=display_columns_map)
@@ -367,7 +520,7 @@ def display_main_app_view():
                 "거래유형", "층수", "공급면적", "방향","태그", "특징",
                 "매물 링크","단지매물수", "중개사", "정보제공"
             ]
-            existing_cols_in_order = [col for col in target_column_order if col in df_display.columns]
+            existing_cols_in_order = [col for col in target_column_order + TYPED_COLUMNS if col in df_display.columns]
             if existing_cols_in_order: # 컬럼이 하나라도 존재할 때만 순서 변경
                 df_display = df_display[existing_cols_in_order]
             
@@ -394,7 +547,16 @@ def display_main_app_view():
                         '정렬 순서', options=order_options, index=0,
                         key=f'order_select_{current_dong_name_main.replace(" ", "_")}_main', label_visibility='collapsed' # 고유 키
                     )
-                # element_cols[3]는 paste.txt에서 비어있었음
+                with element_cols[3]:
+                    with st.popover("층 조건", use_container_width=True):
+                        exclude_bottom_percent_ui = st.slider(
+                            "하위 N% 층 제외 (해당층 / 총층수)", min_value=0, max_value=FLOOR_RATIO_SLIDER_MAX, value=0, step=5,
+                            key=f'floor_ratio_slider_{current_dong_name_main.replace(" ", "_")}_main' # 고유 키
+                        )
+                        selected_floor_bands_ui = st.multiselect(
+                            "층구분", options=FLOOR_BAND_OPTIONS, default=[],
+                            key=f'floor_band_multiselect_{current_dong_name_main.replace(" ", "_")}_main' # 고유 키
+                        )
             
             df_final_display = df_display # 초기값 (필터링 및 정렬 전)
             with cols_header[1]:
@@ -404,7 +566,17 @@ def display_main_app_view():
                                                     key=f'low_floor_check_{current_dong_name_main.replace(" ", "_")}_main', # 고유 키
                                                     value=False)
             
-                df_filtered = filter_out_low_floors(df_display, exclude_low_floors_flag_ui) # from src.data_processor
+                floor_filter = {
+                    'exclude_low_floors': exclude_low_floors_flag_ui, 'exclude_bottom_ratio': exclude_bottom_percent_ui / 100,
+                    'bands': tuple(selected_floor_bands_ui),
+                }
+                df_filtered = df_display
+                if any(floor_filter.values()):
+                    floor_mask = get_floor_filter_mask(df_display, floor_filter) # from src.data_processor (세션 캐시)
+                    if floor_mask is None:
+                        st.warning("'층수' 컬럼이 없어 층 조건 필터링을 수행할 수 없습니다.")
+                    else:
+                        df_filtered = df_display[floor_mask]
                 if selected_sort_options:
                     ascending_order = True if selected_order_option == '오름차순' else False
                     df_sorted = sort_dataframe(df_filtered, selected_sort_options, [ascending_order] * len(selected_sort_options)) # from src.data_processor
@@ -417,10 +589,10 @@ def display_main_app_view():
                         summary_df_current = create_summary(df_final_display) # from src.data_processor
                         if summary_df_current is None: summary_df_current = pd.DataFrame()
                         
-                        excel_data = to_excel(df_final_display, summary_df_current, current_dong_name_main, current_date, exclude_low_floors_flag_ui) # from src.exporters
+                        excel_data = to_excel(df_final_display, summary_df_current, current_dong_name_main, current_date, floor_filter) # from src.exporters
                         st.download_button(
                             label="Excel", data=excel_data,
-                            file_name=f"{current_dong_name_main}_{current_date}{'_저층제외' if exclude_low_floors_flag_ui else ''}.xlsx",
+                            file_name=f"{current_dong_name_main}_{current_date}{floor_filter_suffix(floor_filter)}.xlsx",
                             mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
                             key=f'excel_dl_{current_dong_name_main.replace(" ", "_")}_main' # 고유 키
                         )
@@ -429,7 +601,9 @@ def display_main_app_view():
                     parts_ui = current_dong_name_main.split(' ', 1)
                     if len(parts_ui) == 2: division_ui, dong_ui = parts_ui[0], parts_ui[1]
                     
-                    unique_key_ui = (division_ui, dong_ui, exclude_low_floors_flag_ui)
+                    unique_key_ui = (division_ui, dong_ui, floor_filter_key(floor_filter)) # 층 조건이 다르면 다른 그룹
+                    floor_label_ui = floor_filter_label(floor_filter)
+                    group_name_ui = f"{division_ui} {dong_ui}{f' ({floor_label_ui})' if floor_label_ui else ''}"
                     add_button_label = f"그룹 추가"
                     if st.button(add_button_label, key=f'add_area_{current_dong_name_main.replace(" ", "_")}_main'): # 고유 키
                         MAX_GROUPS = 5
@@ -437,7 +611,7 @@ def display_main_app_view():
                         message_to_show, message_type = "", ""
 
                         if unique_key_ui in st.session_state.selected_areas:
-                            message_to_show = f"'{division_ui} {dong_ui}{' (저층 제외)' if exclude_low_floors_flag_ui else ''}' 그룹은 이미 존재합니다."
+                            message_to_show = f"'{group_name_ui}' 그룹은 이미 존재합니다."
                             message_type = "warning"
                         elif current_selected_areas_count >= MAX_GROUPS:
                             message_to_show = f"더 이상 그룹을 추가할 수 없습니다. (최대 {MAX_GROUPS}개)"
@@ -449,7 +623,7 @@ def display_main_app_view():
                                 'summary': summary_for_group.copy() if summary_for_group is not None else pd.DataFrame()
                             }
                             new_count = len(st.session_state.selected_areas)
-                            message_to_show = f"'{division_ui} {dong_ui}{' (저층 제외)' if exclude_low_floors_flag_ui else ''}' 그룹 추가됨. (현재 {new_count}/{MAX_GROUPS}개)"
+                            message_to_show = f"'{group_name_ui}' 그룹 추가됨. (현재 {new_count}/{MAX_GROUPS}개)"
                             message_type = "success"
                         
                         st.session_state.group_add_status = {"message": message_to_show, "type": message_type}
@@ -0,0 +1,260 @@
+# src/region_cache.py
+import os
+import sys
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+REGION_CACHE_TTL_SECONDS = 600 # 지역 조회 결과 유지 시간 (기존 st.cache_data(ttl=600)과 동일)
+REGION_CACHE_MAX_ENTRIES = int(os.environ.get('REGION_CACHE_MAX_ENTRIES', 64)) # 메모리에 보관하는 지역 결과 최대 개수 (LRU)
+# 디스크 캐시: 같은 호스트의 모든 세션/앱 프로세스가 공유
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGION_CACHE_DIR = os.path.join(PROJECT_ROOT, 'output', 'cache', 'regions')
+REGION_DISK_CACHE_TTL_SECONDS = int(os.environ.get('REGION_CACHE_TTL_SECONDS', 60 * 60)) # 1시간
+REGION_DISK_CACHE_MAX_BYTES = int(os.environ.get('REGION_CACHE_MAX_BYTES', 512 * 1024 * 1024)) # 512MB
+# TTL이 지난 스냅샷을 (백그라운드 갱신 동안) 대신 보여줄 수 있는 최대 나이
+REGION_CACHE_MAX_STALE_SECONDS = int(os.environ.get('REGION_CACHE_MAX_STALE_SECONDS', 7 * 24 * 60 * 60)) # 7일
+
+
+def make_region_cache_key(cortar_no, crawl_params=None):
+    """
+    지역 조회 결과 캐시 키를 만듭니다: (cortarNo, 정렬된 수집 파라미터 JSON).
+    같은 동 안이라면 클릭 좌표가 달라도 같은 키가 됩니다.
+    """
+    params_key = json.dumps(crawl_params or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return str(cortar_no), params_key
+
+
+class DiskRegionCache:
+    """
+    지역 조회 결과를 키별 pickle 파일로 저장하는 디스크 캐시.
+    - 임시 파일에 쓴 뒤 os.replace로 교체하므로 다른 프로세스가 읽는 도중에도 깨진 파일을 보지 않습니다.
+    - 읽을 때마다 파일 수정 시각을 갱신하고, 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 파일부터 삭제합니다 (LRU).
+    """
+
+    def __init__(self, cache_dir=REGION_CACHE_DIR, ttl_seconds=REGION_DISK_CACHE_TTL_SECONDS,
+                 max_bytes=REGION_DISK_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def get(self, key, max_age=None):
+        """
+        max_age(기본: ttl_seconds)초 안의 항목을 {'created_at', 'df', 'dong_name', 'complex_snapshots'} 딕셔너리로 반환합니다.
+        없거나 만료되었으면 None.
+        """
+        max_age = self.ttl_seconds if max_age is None else max_age
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"경고: 디스크 캐시 읽기 실패 ({path}): {e}", file=sys.stderr)
+            return None
+        if entry.get('key') != list(key) or time.time() - entry.get('created_at', 0) > max_age:
+            return None
+        try:
+            os.utime(path) # LRU: 마지막 사용 시각 갱신
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, df, dong_name, created_at=None, complex_snapshots=None):
+        """항목을 원자적으로 저장하고, 용량 한도를 넘으면 LRU 정리를 수행합니다."""
+        entry = {'key': list(key), 'created_at': created_at or time.time(), 'df': df, 'dong_name': dong_name,
+                 'complex_snapshots': complex_snapshots}
+        path = self._path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except Exception as e:
+            print(f"경고: 디스크 캐시 저장 실패 ({path}): {e}", file=sys.stderr)
+            return
+        self.evict()
+
+    def evict(self):
+        """전체 크기가 max_bytes 이하가 될 때까지 가장 오래 사용되지 않은 항목부터 삭제합니다."""
+        try:
+            files = [entry for entry in os.scandir(self.cache_dir) if entry.is_file() and entry.name.endswith('.pkl')]
+            stats = []
+            for entry in files:
+                try:
+                    file_stat = entry.stat()
+                    stats.append((file_stat.st_mtime, file_stat.st_size, entry.path))
+                except FileNotFoundError:
+                    continue # 다른 프로세스가 이미 삭제함
+        except FileNotFoundError:
+            return 0
+
+        total_bytes = sum(size for _, size, _ in stats)
+        removed_count = 0
+        for _, size, path in sorted(stats):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed_count += 1
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+        if removed_count:
+            print(f"디스크 지역 캐시 LRU 정리: {removed_count}개 삭제", file=sys.stderr)
+        return removed_count
+
+
+class RegionResultCache:
+    """
+    지역(cortarNo)별 조회 결과 (DataFrame, 동 이름)를 보관하는 2단계 캐시.
+    1단계는 프로세스 메모리(TTL ttl_seconds), 2단계는 모든 세션/프로세스가 공유하는 디스크 캐시(DiskRegionCache)입니다.
+    디스크에서 찾은 항목은 메모리로 올려 두며, 단계별 적중/미적중 횟수를 집계합니다.
+    메모리 단계는 저장할 때마다 만료된 항목을 정리하고, max_entries개를 넘으면 가장 오래 사용되지 않은 항목부터 내보냅니다.
+    각 항목에는 증분 재수집에 쓰이는 단지별 스냅샷(마커 카운트, 첫 페이지 지문)을 함께 보관합니다.
+    """
+
+    def __init__(self, ttl_seconds=REGION_CACHE_TTL_SECONDS, disk_cache=None, max_entries=REGION_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.disk_cache = disk_cache
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # {key: (수집 시각, df, dong_name, complex_snapshots, 메모리 만료 시각)}, 최근 사용 순
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """TTL 안의 (df, dong_name)을 반환합니다. 없으면 None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() <= entry[4]:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+            if entry: # 만료된 항목 정리
+                del self._entries[key]
+
+        disk_entry = self.disk_cache.get(key) if self.disk_cache else None
+        with self._lock:
+            if disk_entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            # 다른 세션/프로세스가 저장한 결과: 올린 시각부터 메모리 TTL을 적용하되 디스크 만료 시각은 넘기지 않음
+            self._store_entry(key, self._memory_entry(disk_entry['created_at'], disk_entry['df'], disk_entry['dong_name'],
+                                                      disk_entry.get('complex_snapshots')))
+            return disk_entry['df'], disk_entry['dong_name']
+
+    def peek(self, key):
+        """get과 같이 TTL 안의 (df, dong_name)을 반환하지만 적중/미적중 집계에는 포함하지 않습니다 (상태 확인용)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.time() <= entry[4]:
+            return entry[1], entry[2]
+        disk_entry = self.disk_cache.get(key) if self.disk_cache else None
+        if disk_entry is None:
+            return None
+        return disk_entry['df'], disk_entry['dong_name']
+
+    def _latest_entry(self, key, max_stale_seconds):
+        """TTL과 관계없이 max_stale_seconds 안의 마지막 항목 (저장 시각, df, dong_name, complex_snapshots)을 반환합니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.disk_cache:
+            disk_entry = self.disk_cache.get(key, max_age=max_stale_seconds)
+            if disk_entry is not None:
+                entry = (disk_entry['created_at'], disk_entry['df'], disk_entry['dong_name'], disk_entry.get('complex_snapshots'))
+        if entry is None or time.time() - entry[0] > max_stale_seconds:
+            return None
+        return entry
+
+    def get_stale(self, key, max_stale_seconds=REGION_CACHE_MAX_STALE_SECONDS):
+        """
+        TTL이 지났더라도 max_stale_seconds 안의 마지막 스냅샷을 (df, dong_name, 나이(초))로 반환합니다. 없으면 None.
+        적중/미적중 집계에는 포함하지 않습니다.
+        """
+        entry = self._latest_entry(key, max_stale_seconds)
+        if entry is None:
+            return None
+        return entry[1], entry[2], time.time() - entry[0]
+
+    def get_previous_crawl(self, key, max_stale_seconds=REGION_CACHE_MAX_STALE_SECONDS):
+        """
+        증분 재수집용으로 마지막 수집 결과를 (df, complex_snapshots)로 반환합니다.
+        항목이 없거나 단지별 스냅샷 없이 저장된 항목이면 None. 적중/미적중 집계에는 포함하지 않습니다.
+        """
+        entry = self._latest_entry(key, max_stale_seconds)
+        if entry is None or not entry[3]:
+            return None
+        return entry[1], entry[3]
+
+    def put(self, key, df, dong_name, complex_snapshots=None, created_at=None):
+        """결과를 저장합니다. created_at(기본: 지금)은 다른 저장소에서 읽어 온 결과의 원래 수집 시각입니다."""
+        created_at = created_at or time.time()
+        with self._lock:
+            self._store_entry(key, self._memory_entry(created_at, df, dong_name, complex_snapshots))
+        if self.disk_cache:
+            self.disk_cache.put(key, df, dong_name, created_at=created_at, complex_snapshots=complex_snapshots)
+
+    def _memory_entry(self, created_at, df, dong_name, complex_snapshots):
+        """
+        메모리 단계 항목 (수집 시각, df, dong_name, complex_snapshots, 만료 시각)을 만듭니다.
+        만료 시각은 메모리에 올린 시각 + ttl_seconds이고, 디스크 캐시가 있으면 수집 시각 + 디스크 TTL을 넘지 않습니다.
+        (디스크/저장소에서 올린 ttl_seconds보다 오래된 결과도 바로 만료되지 않도록, 나이 계산에는 수집 시각을 그대로 사용)
+        """
+        fresh_seconds = max(self.ttl_seconds, self.disk_cache.ttl_seconds) if self.disk_cache else self.ttl_seconds
+        expires_at = min(time.time() + self.ttl_seconds, created_at + fresh_seconds)
+        return created_at, df, dong_name, complex_snapshots, expires_at
+
+    def _store_entry(self, key, entry):
+        """
+        메모리 단계에 항목을 저장하고, 만료된 항목과 max_entries를 넘는 오래된 항목을 정리합니다. (self._lock 안에서 호출)
+        만료된 스냅샷은 디스크 캐시에 남아 있으므로 get_stale/get_previous_crawl은 디스크에서 계속 찾을 수 있습니다.
+        """
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        now = time.time()
+        for expired_key in [k for k, entry in self._entries.items() if now > entry[4] and k != key]:
+            del self._entries[expired_key]
+        while len(self._entries) > max(self.max_entries, 1):
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """적중(디스크 적중 포함)/미적중 횟수와 적중률을 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'entries': len(self._entries), 'hit_ratio': (self.hits / total) if total else 0.0
+            }
+
+    def log_stats(self, label):
+        stats = self.stats()
+        print(f"[RegionCache] {label}: hits={stats['hits']} (disk {stats['disk_hits']}), misses={stats['misses']}, "
+              f"hit_ratio={stats['hit_ratio']:.1%}, entries={stats['entries']}", file=sys.stderr)
+        return stats
+
+
+_region_cache = RegionResultCache(disk_cache=DiskRegionCache())
+
+
+def get_region_cache():
+    """프로세스 전체에서 공유하는 RegionResultCache를 반환합니다."""
+    return _region_cache
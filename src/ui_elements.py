@@ -5,6 +5,7 @@ from streamlit_folium import st_folium
 from st_aggrid import AgGrid, GridOptionsBuilder, JsCode, ColumnsAutoSizeMode
 import pandas as pd
 from folium.features import DivIcon # DivIcon을 사용하기 위해 임포트
+from .utils import drop_typed_columns
 
 def create_folium_map():
     """
@@ -217,10 +218,11 @@ def get_aggrid_options(df):
     return gridOptions
 
 def display_table_with_aggrid(df):
-    """데이터프레임을 AgGrid를 사용하여 Streamlit에 표시합니다."""
+    """데이터프레임을 AgGrid를 사용하여 Streamlit에 표시합니다. 정렬/필터용 숫자 열(TYPED_COLUMNS)은 표시하지 않습니다."""
     if df.empty:
         st.info("표시할 데이터가 없습니다.")
         return
+    df = drop_typed_columns(df)
 
     try:
         gridOptions = get_aggrid_options(df)
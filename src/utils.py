@@ -2,8 +2,33 @@
 import pandas as pd
 import re
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from datetime import datetime
 
+# 조회할 때 한 번 계산해 두는 숫자 열 (data_processor.add_typed_columns). 정렬/필터/요약은 문자열 대신 이 열을 읽고,
+# 표(AgGrid)와 엑셀에는 표시하지 않습니다.
+PRICE_NUMBER_COLUMN = '가격_숫자'      # 원 단위 가격 (int64)
+AREA_NUMBER_COLUMN = '공급면적_숫자'   # 공급면적 (㎡)
+PYEONG_NUMBER_COLUMN = '평형_숫자'     # 공급면적 / 3.3 (소수 첫째 자리)
+FLOOR_LABEL_COLUMN = '해당층'          # 층수('5/15')의 '/' 앞부분 ('5', '저', '고' 등)
+FLOOR_NUMBER_COLUMN = '해당층_숫자'    # 해당층이 숫자이면 그 값 (지하 'B1'은 -1)
+TOTAL_FLOORS_COLUMN = '총층수'         # 층수의 '/' 뒷부분
+FLOOR_BAND_COLUMN = '층구분'           # 저/중/고 (네이버 표기 그대로이거나, 해당층/총층수 비율로 계산)
+FLOOR_POSITION_COLUMN = '층위치'       # 해당층 / 총층수 (0~1, 상대 위치 필터용)
+TYPED_COLUMNS = [PRICE_NUMBER_COLUMN, AREA_NUMBER_COLUMN, PYEONG_NUMBER_COLUMN,
+                 FLOOR_LABEL_COLUMN, FLOOR_NUMBER_COLUMN, TOTAL_FLOORS_COLUMN, FLOOR_BAND_COLUMN, FLOOR_POSITION_COLUMN]
+
+FLOOR_BANDS = ['저', '중', '고']
+# 층 번호 없이 저/중/고로만 표기된 매물의 상대 위치 (각 구간의 가운데)
+FLOOR_BAND_POSITIONS = {'저': 1 / 6, '중': 1 / 2, '고': 5 / 6}
+
+
+def drop_typed_columns(df):
+    """표시/내보내기용으로 TYPED_COLUMNS를 뺀 DataFrame을 반환합니다 (없으면 그대로)."""
+    typed_columns = [col for col in TYPED_COLUMNS if col in df.columns]
+    return df.drop(columns=typed_columns) if typed_columns else df
+
 def format_eok(val):
     """
     숫자를 '억'과 '천만' 단위 문자열로 변환합니다.
@@ -67,6 +92,63 @@ def convert_price_to_number(price_str):
     return total
 
 
+def _digits_to_int(parts):
+    """숫자로만 이루어진 문자열은 정수로, 나머지('' / 'abc' 등)는 0으로 변환합니다."""
+    is_digits = pc.fill_null(pc.utf8_is_decimal(parts), False)
+    return pc.cast(pc.if_else(is_digits, parts, '0'), pa.int64()).to_numpy()
+
+
+def _price_texts_to_numbers(texts):
+    """결측이 없는 Arrow 문자열 배열에 convert_price_to_number의 문자열 처리 규칙을 한 번에 적용합니다."""
+    texts = pc.utf8_trim_whitespace(pc.replace_substring(pc.replace_substring(texts, ',', ''), ' ', ''))
+    # split('억')의 parts[0], parts[1]: '억억'을 덧붙여 항상 두 조각이 있도록 함 ('억'이 없으면 parts[0]이 전체 문자열)
+    # 각 조각은 '-'를 뺀 숫자만 읽고, 조각이 '-'로 시작하면 int()와 같이 음수로 만듦
+    unsigned_parts = pc.split_pattern(pc.binary_join_element_wise(pc.replace_substring(texts, '-', ''), '억억', ''),
+                                      '억', max_splits=2)
+    first_numbers = _digits_to_int(pc.list_element(unsigned_parts, 0))
+    second_numbers = _digits_to_int(pc.list_element(unsigned_parts, 1))
+    first_numbers = np.where(pc.starts_with(texts, '-').to_numpy(zero_copy_only=False), -first_numbers, first_numbers)
+    second_is_negative = pc.match_substring_regex(texts, '^[^억]*억-').to_numpy(zero_copy_only=False)
+    second_numbers = np.where(second_is_negative, -second_numbers, second_numbers)
+
+    has_eok = pc.match_substring(texts, '억').to_numpy(zero_copy_only=False)
+    totals = np.where(has_eok, first_numbers * 100_000_000 + second_numbers * 10_000, first_numbers * 10_000)
+    has_minus = pc.match_substring(texts, '-').to_numpy(zero_copy_only=False)
+    return np.where(has_minus & (totals > 0), -totals, totals).astype(np.int64)
+
+
+def convert_prices_to_numbers(price_series):
+    """
+    가격 Series ('1억 5,000', '5000' 등)를 한 번에 원 단위 int64 배열로 변환합니다.
+    결과는 각 값에 convert_price_to_number를 적용한 것과 같습니다
+    (결측/해석 불가 -> 0, '억' 없는 숫자는 만 단위, '-'가 있으면 음수).
+    같은 가격 문자열이 많으므로 고유값만 pyarrow 문자열 연산으로 변환한 뒤 행으로 펼칩니다.
+    """
+    price_series = price_series if isinstance(price_series, pd.Series) else pd.Series(price_series)
+    if isinstance(price_series.dtype, pd.CategoricalDtype):
+        category_numbers = np.append(convert_prices_to_numbers(pd.Series(price_series.cat.categories, dtype=object)), 0)
+        return category_numbers[price_series.cat.codes.to_numpy()] # 코드 -1(결측)은 마지막 원소 0
+    if pd.api.types.is_numeric_dtype(price_series.dtype) and not pd.api.types.is_bool_dtype(price_series.dtype):
+        return np.trunc(price_series.to_numpy(dtype=float, na_value=0.0)).astype(np.int64)
+
+    values = price_series.astype(object)
+    number_mask = None
+    try:
+        texts = pa.array(values, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError): # 숫자 등 문자열이 아닌 값이 섞인 경우
+        number_mask = values.map(lambda value: isinstance(value, (float, int)) and not pd.isnull(value)).to_numpy(dtype=bool)
+        texts = pa.array([None if is_number or pd.isnull(value) else str(value)
+                          for value, is_number in zip(values, number_mask)], type=pa.string())
+
+    encoded = pc.dictionary_encode(texts)
+    unique_numbers = np.append(_price_texts_to_numbers(encoded.dictionary), 0) # 마지막 원소 0은 결측값용
+    indices = pc.fill_null(encoded.indices, len(encoded.dictionary)).to_numpy()
+    totals = unique_numbers[indices]
+    if number_mask is not None and number_mask.any(): # 숫자 값은 int()와 같이 소수점 이하를 버림
+        totals[number_mask] = np.trunc(values[number_mask].to_numpy(dtype=float)).astype(np.int64)
+    return totals
+
+
 def extract_numeric_area(area_str):
     """
     공급면적 문자열에서 숫자(float)만 추출합니다.
@@ -76,6 +158,90 @@ def extract_numeric_area(area_str):
         return float(match.group())
     return None
 
+def extract_numeric_areas(area_series):
+    """공급면적 Series에 extract_numeric_area를 한 번에 적용한 float Series를 반환합니다 (숫자가 없으면 NaN)."""
+    matched = pd.Series(area_series).astype(str).str.extract(r'(\d+(?:\.\d+)?)', expand=False)
+    return pd.to_numeric(matched, errors='coerce').astype(float)
+
+def split_floor_info(floor_series):
+    """
+    층수 Series ('5/15', '저/20', '3')를 (해당층 문자열, 총층수) Series로 나눕니다.
+    해당층은 extract_floor와 같은 값이고, 총층수는 '/' 뒤가 숫자일 때만 채워집니다 (Int64).
+    """
+    floor_series = pd.Series(floor_series)
+    # 앞뒤 공백을 뺀 문자열에서 첫 '/' 앞(해당층)과 뒤(총층수)를 각각 공백 없이 추출
+    parts = floor_series.astype(str).str.strip().str.extract(r'^(.*?)\s*(?:/\s*(.*))?$', flags=re.DOTALL)
+    is_missing = floor_series.isna()
+    floor_labels = parts[0].mask(is_missing).astype(object)
+    total_floors = pd.to_numeric(parts[1].mask(is_missing), errors='coerce').astype('Int64')
+    return floor_labels, total_floors
+
+def parse_floor_numbers(floor_labels):
+    """해당층 문자열 Series를 층 번호(Int64)로 변환합니다. 지하('B1', 'B2')는 음수, 저/중/고 등 숫자가 아닌 값은 NA."""
+    floor_labels = pd.Series(floor_labels, dtype=object)
+    numbers = pd.to_numeric(floor_labels, errors='coerce')
+    basement_numbers = pd.to_numeric(floor_labels.astype(str).str.extract(r'^[Bb](\d+)$', expand=False), errors='coerce')
+    numbers = numbers.where(numbers == numbers.round()).fillna(-basement_numbers) # 정수가 아닌 값은 층으로 보지 않음
+    return numbers.astype('Int64')
+
+def classify_floors(floor_labels, floor_numbers, total_floors):
+    """
+    층 구간(저/중/고)과 상대 위치(해당층 / 총층수, 0~1)를 계산해 (구간 Series, 위치 Series)로 반환합니다.
+    - 저/중/고로 표기된 매물: 표기 그대로, 위치는 FLOOR_BAND_POSITIONS
+    - 층 번호와 총층수가 있는 매물: 위치 1/3 이하 저, 2/3 이하 중, 그 위는 고 (지하는 위치 0)
+    - 그 밖(총층수 없음 등): NA
+    """
+    floor_labels = pd.Series(floor_labels, dtype=object)
+    floors = pd.Series(floor_numbers).to_numpy(dtype=float, na_value=np.nan)
+    totals = pd.Series(total_floors).to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        positions = np.where(totals > 0, np.clip(floors / totals, 0.0, 1.0), np.nan)
+    bands = np.select([positions <= 1 / 3, positions <= 2 / 3, positions <= 1], FLOOR_BANDS, default=None).astype(object)
+
+    band_labels = floor_labels.where(floor_labels.isin(FLOOR_BANDS))
+    has_band_label = band_labels.notna().to_numpy()
+    bands = np.where(has_band_label, band_labels.to_numpy(dtype=object), bands)
+    positions = np.where(has_band_label, band_labels.map(FLOOR_BAND_POSITIONS).to_numpy(dtype=float, na_value=np.nan), positions)
+    return (pd.Series(bands, index=floor_labels.index, dtype=object),
+            pd.Series(positions, index=floor_labels.index, dtype=float))
+
+def floor_filter_key(floor_filter):
+    """
+    층 조건 dict({'exclude_low_floors', 'exclude_bottom_ratio', 'bands'})를 그룹 키로 쓸 수 있는
+    (저층 제외, 하위 비율, 층구분 튜플) 형태로 바꿉니다. 이미 변환된 튜플은 그대로, bool은 저층 제외 여부로 봅니다.
+    """
+    if isinstance(floor_filter, tuple):
+        return floor_filter
+    if not isinstance(floor_filter, dict):
+        floor_filter = {'exclude_low_floors': bool(floor_filter)}
+    bands = floor_filter.get('bands') or ()
+    return (bool(floor_filter.get('exclude_low_floors')), float(floor_filter.get('exclude_bottom_ratio') or 0.0),
+            tuple(band for band in FLOOR_BANDS if band in bands)) # 선택 순서와 무관하게 저/중/고 순
+
+def floor_filter_label(floor_filter):
+    """층 조건을 화면 표시용 문자열로 만듭니다 (예: '저층 제외, 하위 30% 제외, 층구분 중·고'). 조건이 없으면 ''."""
+    exclude_low_floors, exclude_bottom_ratio, bands = floor_filter_key(floor_filter)
+    parts = []
+    if exclude_low_floors:
+        parts.append('저층 제외')
+    if exclude_bottom_ratio:
+        parts.append(f'하위 {exclude_bottom_ratio * 100:g}% 제외')
+    if bands:
+        parts.append(f"층구분 {'·'.join(bands)}")
+    return ', '.join(parts)
+
+def floor_filter_suffix(floor_filter):
+    """층 조건을 파일/시트 이름 뒤에 붙일 문자열로 만듭니다 (예: '_저층제외_하위30_중고'). 조건이 없으면 ''."""
+    exclude_low_floors, exclude_bottom_ratio, bands = floor_filter_key(floor_filter)
+    suffix = ''
+    if exclude_low_floors:
+        suffix += '_저층제외'
+    if exclude_bottom_ratio:
+        suffix += f'_하위{exclude_bottom_ratio * 100:g}'
+    if bands:
+        suffix += f"_{''.join(bands)}"
+    return suffix
+
 def extract_floor(floor_info):
     """
     층수 문자열 ('5/15', '저', '3')에서 해당 층 정보만 추출합니다.
@@ -117,4 +283,18 @@ def get_current_date_str():
     """
     현재 날짜를 'YYYYMMDD' 형식의 문자열로 반환합니다.
     """
-    return datetime.now().strftime('%Y%m%d')
\ No newline at end of file
+    return datetime.now().strftime('%Y%m%d')
+
+
+def format_elapsed_time(seconds):
+    """
+    경과 시간(초)을 '3분', '2시간', '1일'과 같은 짧은 한국어 문자열로 변환합니다.
+    """
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds}초"
+    if seconds < 3600:
+        return f"{seconds // 60}분"
+    if seconds < 86400:
+        return f"{seconds // 3600}시간"
+    return f"{seconds // 86400}일"
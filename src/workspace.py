@@ -0,0 +1,86 @@
+# src/workspace.py
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+from datetime import datetime
+
+from .external_scripts.article_table import write_articles_parquet
+
+# 요청별 작업 공간이 생성되는 하위 디렉토리 이름 (output_dir 기준)
+WORKSPACES_DIRNAME = "workspaces"
+WORKSPACE_PREFIX = "fetch_"
+# 이 시간(초)보다 오래된 작업 공간은 정리 대상
+WORKSPACE_MAX_AGE_SECONDS = 60 * 60
+
+
+def create_workspace(output_dir):
+    """
+    조회 요청 하나를 위한 고유한 작업 공간 디렉토리를 생성하고 경로를 반환합니다.
+    경로 형식: <output_dir>/workspaces/fetch_YYYYMMDD_HHMMSS_<uuid8>
+    동시에 여러 세션이 조회해도 서로의 중간 파일을 덮어쓰지 않습니다.
+    """
+    workspace_name = f"{WORKSPACE_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    workspace_dir = os.path.join(output_dir, WORKSPACES_DIRNAME, workspace_name)
+    os.makedirs(workspace_dir, exist_ok=False) # uuid로 고유하므로 이미 있으면 오류
+    print(f"작업 공간 생성: {workspace_dir}", file=sys.stderr)
+    return workspace_dir
+
+
+def save_stage_output(workspace_dir, filename, data):
+    """
+    수집 단계의 결과를 작업 공간에 JSON 파일로 기록합니다 (디버깅/추적용).
+    기록 실패는 조회 흐름을 중단시키지 않으며, 콘솔에만 로그를 남깁니다.
+    """
+    if not workspace_dir:
+        return
+    filepath = os.path.join(workspace_dir, filename)
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"경고: 단계 결과 저장 실패 ({filepath}): {e}", file=sys.stderr)
+
+
+def save_stage_table(workspace_dir, filename, table):
+    """
+    매물처럼 큰 단계 결과(Arrow 테이블)를 작업 공간에 Parquet 파일로 기록합니다 (디버깅/추적용).
+    기록 실패는 조회 흐름을 중단시키지 않으며, 콘솔에만 로그를 남깁니다.
+    """
+    if not workspace_dir:
+        return
+    filepath = os.path.join(workspace_dir, filename)
+    try:
+        write_articles_parquet(table, filepath)
+    except Exception as e:
+        print(f"경고: 단계 결과 저장 실패 ({filepath}): {e}", file=sys.stderr)
+
+
+def cleanup_stale_workspaces(output_dir, max_age_seconds=WORKSPACE_MAX_AGE_SECONDS):
+    """
+    max_age_seconds보다 오래된 작업 공간을 삭제하고, 삭제한 개수를 반환합니다.
+    다른 프로세스가 동시에 정리 중이어도 오류 없이 넘어갑니다.
+    """
+    workspaces_root = os.path.join(output_dir, WORKSPACES_DIRNAME)
+    if not os.path.isdir(workspaces_root):
+        return 0
+
+    removed_count = 0
+    now = time.time()
+    for entry in os.scandir(workspaces_root):
+        if not entry.is_dir() or not entry.name.startswith(WORKSPACE_PREFIX):
+            continue
+        try:
+            if now - entry.stat().st_mtime > max_age_seconds:
+                shutil.rmtree(entry.path)
+                removed_count += 1
+        except FileNotFoundError:
+            continue # 다른 세션이 이미 삭제함
+        except Exception as e:
+            print(f"경고: 오래된 작업 공간 삭제 실패 ({entry.path}): {e}", file=sys.stderr)
+
+    if removed_count:
+        print(f"오래된 작업 공간 {removed_count}개 정리 완료 ({workspaces_root})", file=sys.stderr)
+    return removed_count
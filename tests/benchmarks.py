@@ -0,0 +1,130 @@
+# tests/benchmarks.py
+# 데이터 처리 함수의 기존(행 단위/pandas 집계) 구현과 벡터화 구현을 같은 입력으로 비교하는 벤치마크입니다.
+# 실행: python -m tests.benchmarks (프로젝트 루트에서)
+import os
+import sys
+import time
+import random
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import (convert_price_to_number, convert_prices_to_numbers, extract_numeric_areas,
+                       PRICE_NUMBER_COLUMN, AREA_NUMBER_COLUMN, PYEONG_NUMBER_COLUMN)
+from src.data_processor import create_summary, SUMMARY_COLUMNS
+
+BENCHMARK_ROWS = 100_000
+SUMMARY_GROUP_COLUMNS = ["구", "동", "매물명", "공급면적", "평형", "연식", "총세대수"]
+
+
+def make_price_series(rows=BENCHMARK_ROWS, seed=0, man_step=100):
+    """
+    네이버 매물 가격 형식('12억 5,000', '9,000', '3억')에 음수/결측/비정상 값을 섞은 가격 Series를 만듭니다.
+    호가는 보통 100만원 단위이므로 만 단위 값은 man_step 간격으로 만듭니다 (man_step=1이면 대부분 고유값).
+    """
+    rng = random.Random(seed)
+    prices = []
+    for _ in range(rows):
+        eok, man = rng.randint(0, 40), rng.randrange(0, 10000, man_step)
+        kind = rng.random()
+        if kind < 0.6:
+            prices.append(f"{eok}억 {man:,}" if man and eok else (f"{eok}억" if eok else f"{man:,}"))
+        elif kind < 0.8:
+            prices.append(f"{eok}억")
+        elif kind < 0.9:
+            prices.append(f"{man:,}")
+        elif kind < 0.95:
+            prices.append(f"-{eok}억 {man:,}")
+        else:
+            prices.append(rng.choice([None, '', '억', '가격문의']))
+    return pd.Series(prices, dtype=object)
+
+
+def time_call(function, repeat=3):
+    """function()을 repeat번 실행해 가장 빠른 실행 시간(초)과 마지막 결과를 반환합니다."""
+    best_seconds, result = float('inf'), None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = function()
+        best_seconds = min(best_seconds, time.perf_counter() - started_at)
+    return best_seconds, result
+
+
+def benchmark_price_parser(rows=BENCHMARK_ROWS):
+    """convert_price_to_number(.apply)와 convert_prices_to_numbers의 결과가 같은지 확인하고 실행 시간을 비교합니다."""
+    for label, man_step in (('100만원 단위 호가', 100), ('고유값 위주', 1)):
+        prices = make_price_series(rows, man_step=man_step)
+        apply_seconds, expected = time_call(lambda: prices.apply(convert_price_to_number).to_numpy(dtype=np.int64))
+        vectorized_seconds, actual = time_call(lambda: convert_prices_to_numbers(prices))
+        if not np.array_equal(expected, actual):
+            mismatches = np.flatnonzero(expected != actual)[:5]
+            raise AssertionError(f"가격 변환 결과 불일치: {[(prices[i], expected[i], actual[i]) for i in mismatches]}")
+        print(f"[가격 변환] {rows:,}행 ({label}, 고유값 {prices.nunique():,}개): apply {apply_seconds:.3f}s / "
+              f"벡터화 {vectorized_seconds:.3f}s ({apply_seconds / vectorized_seconds:.1f}배)")
+
+
+def make_detail_frame(rows=BENCHMARK_ROWS, seed=0, complexes=2000):
+    """
+    구 단위 조회 결과와 비슷한 상세 DataFrame(단지 complexes개, 단지별 평형 2~4개)을 만듭니다.
+    조회 시와 같이 가격/면적/평형 숫자 열(add_typed_columns)을 미리 계산해 둡니다.
+    """
+    rng = np.random.default_rng(seed)
+    complex_ids = rng.integers(0, complexes, rows)
+    area_choices = np.array(['59', '74', '84', '109A', '114'])
+    areas = area_choices[(complex_ids + rng.integers(0, 3, rows)) % len(area_choices)]
+    df = pd.DataFrame({
+        '구': '강남구',
+        '동': pd.Series(np.array([f'{index}동' for index in range(20)])[complex_ids % 20]),
+        '매물명': pd.Series(np.array([f'단지{index}' for index in range(complexes)])[complex_ids]),
+        '공급면적': areas,
+        '가격': make_price_series(rows, seed=seed).to_numpy(),
+        '거래유형': rng.choice(['매매', '전세', '월세'], rows, p=[0.5, 0.3, 0.2]),
+        '연식': (1990 + complex_ids % 35).astype(float),
+        '총세대수': (300 + complex_ids * 7 % 3000).astype(float),
+        '정보제공': rng.choice(['매경', '부동산뱅크', '한국공인중개사협회'], rows),
+    })
+    df[PRICE_NUMBER_COLUMN] = convert_prices_to_numbers(df['가격'])
+    df[AREA_NUMBER_COLUMN] = extract_numeric_areas(df['공급면적'])
+    df[PYEONG_NUMBER_COLUMN] = (df[AREA_NUMBER_COLUMN] / 3.3).round(1).where(df[AREA_NUMBER_COLUMN] != 0)
+    for col in ('구', '동', '매물명', '거래유형', '정보제공'): # compact_dataframe과 같이 반복 문자열은 category
+        df[col] = df[col].astype('category')
+    return df
+
+
+def summarize_with_pandas(df_detail):
+    """이전 create_summary의 집계 방식(복사 -> groupby().agg -> pivot_table -> reindex). 결과 비교 기준입니다."""
+    df_summary = df_detail.copy()
+    df_summary['평형'] = np.where(df_summary[PYEONG_NUMBER_COLUMN].notna(), df_summary[PYEONG_NUMBER_COLUMN], None)
+    df_filtered = df_summary[df_summary['정보제공'] != '한국공인중개사협회'].dropna(subset=[PRICE_NUMBER_COLUMN])
+    summary_stats = df_filtered.groupby(SUMMARY_GROUP_COLUMNS + ['거래유형'], as_index=False, observed=True).agg(
+        평균=(PRICE_NUMBER_COLUMN, 'mean'), 중간=(PRICE_NUMBER_COLUMN, 'median'), 최대=(PRICE_NUMBER_COLUMN, 'max'),
+        최소=(PRICE_NUMBER_COLUMN, 'min'), 개수=(PRICE_NUMBER_COLUMN, 'size'))
+    summary_pivot = summary_stats.pivot_table(index=SUMMARY_GROUP_COLUMNS, columns='거래유형', observed=True,
+                                              values=['평균', '중간', '최대', '최소', '개수'], fill_value=pd.NA)
+    summary_pivot.columns = [f'{col[1]}{col[0]}' for col in summary_pivot.columns]
+    summary_pivot = summary_pivot.reset_index()
+    summary_pivot['갭(매매-전세)(평균)'] = summary_pivot['매매평균'].astype(float) - summary_pivot['전세평균'].astype(float)
+    summary_final = summary_pivot.rename(columns={'매물명': '아파트명'}).reindex(columns=SUMMARY_COLUMNS)
+    for col in ('매매개수', '전세개수'):
+        summary_final[col] = summary_final[col].fillna(0).astype(int)
+    return summary_final
+
+
+def benchmark_summary(rows=BENCHMARK_ROWS):
+    """이전 pandas groupby/pivot 집계와 create_summary(한 번 정렬 후 NumPy 집계)의 결과가 같은지 확인하고 실행 시간을 비교합니다."""
+    df_detail = make_detail_frame(rows)
+    pandas_seconds, expected = time_call(lambda: summarize_with_pandas(df_detail))
+    numpy_seconds, actual = time_call(lambda: create_summary(df_detail))
+    pd.testing.assert_frame_equal(expected, actual)
+    print(f"[요약 집계] {rows:,}행 (그룹 {len(actual):,}개): groupby+pivot {pandas_seconds:.3f}s / "
+          f"정렬 1회 집계 {numpy_seconds:.3f}s ({pandas_seconds / numpy_seconds:.1f}배)")
+
+
+def main():
+    benchmark_price_parser()
+    benchmark_summary()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
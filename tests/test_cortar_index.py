@@ -0,0 +1,44 @@
+# tests/test_cortar_index.py
+# CortarIndex 격자 조회(적중/미적중)와 파일 저장 후 다시 읽기 테스트.
+# 실행: python -m pytest -q tests (프로젝트 루트에서)
+from src.external_scripts.cortar_index import CortarIndex
+
+
+def make_cortar(cortar_no, ring):
+    """cortarVertexLists([[lat, lng], ...] 링 목록) 형식의 cortar 정보를 만듭니다."""
+    return {'cortarNo': cortar_no, 'divisionName': '강남구', 'cortarName': f'{cortar_no}동', 'cortarVertexLists': [ring]}
+
+
+SQUARE = make_cortar('1168010100', [[37.500, 127.020], [37.500, 127.040], [37.520, 127.040], [37.520, 127.020], [37.500, 127.020]])
+# 직각삼각형: 경계 상자 안이지만 빗변 바깥인 점은 포함되지 않아야 함
+TRIANGLE = make_cortar('1168010200', [[37.530, 127.050], [37.530, 127.070], [37.550, 127.050], [37.530, 127.050]])
+
+
+def test_lookup_hits_point_inside_known_polygon(tmp_path):
+    index = CortarIndex(path=str(tmp_path / 'cortar_index.json'))
+    assert index.add(SQUARE, save=False)
+    assert index.lookup(37.510, 127.030)['cortarNo'] == '1168010100'
+
+
+def test_lookup_misses_outside_polygons(tmp_path):
+    index = CortarIndex(path=str(tmp_path / 'cortar_index.json'))
+    index.add(SQUARE, save=False)
+    index.add(TRIANGLE, save=False)
+    assert index.lookup(37.600, 127.100) is None # 격자 칸에 등록된 지역 없음
+    assert index.lookup(37.545, 127.065) is None # 삼각형 경계 상자 안, 다각형 바깥
+    assert index.lookup(37.535, 127.055)['cortarNo'] == '1168010200'
+    assert index.lookup('not a number', 127.030) is None
+
+
+def test_invalid_polygon_is_not_indexed(tmp_path):
+    index = CortarIndex(path=str(tmp_path / 'cortar_index.json'))
+    assert not index.add(make_cortar('1168010300', [[37.5, 127.0]]), save=False)
+    assert len(index) == 0
+
+
+def test_saved_index_is_reloaded(tmp_path):
+    path = str(tmp_path / 'cortar_index.json')
+    CortarIndex(path=path).add(SQUARE)
+    reloaded = CortarIndex(path=path).load()
+    assert len(reloaded) == 1
+    assert reloaded.lookup(37.510, 127.030)['cortarNo'] == '1168010100'
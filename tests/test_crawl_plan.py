@@ -0,0 +1,45 @@
+# tests/test_crawl_plan.py
+# plan_crawl_tasks 수집 계획 테스트: 매물 없는 단지 건너뛰기, 추정 페이지 수 순서.
+# 실행: python -m pytest -q tests (프로젝트 루트에서)
+from src.external_scripts.collect_complex_details import plan_crawl_tasks, MAX_PAGES_PER_COMPLEX
+
+
+def make_marker(marker_id, deal=None, lease=None, rent=None):
+    return {'markerId': marker_id, 'dealCount': deal, 'leaseCount': lease, 'rentCount': rent}
+
+
+def planned_ids(planned_tasks):
+    return [marker_info['markerId'] for _, _, marker_info, _ in planned_tasks]
+
+
+def test_complexes_without_listings_are_skipped():
+    crawl_tasks = [('역삼동', make_marker('1', 0, 0, 0)), ('역삼동', make_marker('2', 5, 0, 0)),
+                   ('역삼동', make_marker('3', '0', '0', '0'))]
+    planned_tasks, skipped_count = plan_crawl_tasks(crawl_tasks)
+    assert planned_ids(planned_tasks) == ['2']
+    assert skipped_count == 2
+
+
+def test_only_selected_trade_type_counts_are_considered():
+    crawl_tasks = [('역삼동', make_marker('1', deal=0, lease=30)), ('역삼동', make_marker('2', deal=3, lease=0))]
+    planned_tasks, skipped_count = plan_crawl_tasks(crawl_tasks, {'trade_types': ['A1']}) # 매매만
+    assert planned_ids(planned_tasks) == ['2']
+    assert skipped_count == 1
+
+
+def test_larger_complexes_first_and_unknown_counts_kept_in_front():
+    crawl_tasks = [('역삼동', make_marker('small', 5, 0, 0)), ('역삼동', make_marker('large', 60, 20, 0)),
+                   ('역삼동', make_marker('unknown'))]
+    planned_tasks, skipped_count = plan_crawl_tasks(crawl_tasks)
+    assert planned_ids(planned_tasks) == ['unknown', 'large', 'small']
+    assert [estimated_pages for *_, estimated_pages in planned_tasks] == [None, 4, 1]
+    assert [task_index for task_index, *_ in planned_tasks] == [2, 1, 0] # 원래 순번 유지
+    assert skipped_count == 0
+
+
+def test_cheapest_k_limit_bounds_estimated_pages():
+    crawl_tasks = [('역삼동', make_marker('1', deal=5000, lease=5000, rent=5000))]
+    planned_tasks, _ = plan_crawl_tasks(crawl_tasks)
+    assert planned_tasks[0][3] == MAX_PAGES_PER_COMPLEX
+    planned_tasks, _ = plan_crawl_tasks(crawl_tasks, {'max_listings_per_complex': 10})
+    assert planned_tasks[0][3] == 2 # 거래유형 3개 x 10건 = 30건 -> 2페이지
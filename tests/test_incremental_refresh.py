@@ -0,0 +1,85 @@
+# tests/test_incremental_refresh.py
+# 증분 재수집 테스트: 마커 카운트/첫 페이지 지문이 같은 단지는 이전 매물 재사용, 바뀐 단지는 다시 수집.
+# 실행: python -m pytest -q tests (프로젝트 루트에서)
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.external_scripts import collect_complex_details as ccd
+from src.external_scripts.article_table import Article
+from src.data_handling import _previous_complex_snapshots
+
+MARKER = {'markerId': '1001', 'complexName': '단지1', 'dealCount': 2, 'leaseCount': 1, 'rentCount': 0}
+
+
+def make_pages(first_price='10억'):
+    """가격순 매물 2페이지 (첫 페이지 첫 매물 가격만 바꿀 수 있음)."""
+    return {
+        1: [Article.from_api({'articleNo': 'a1', 'tradeTypeCode': 'A1', 'dealOrWarrantPrc': first_price}),
+            Article.from_api({'articleNo': 'a2', 'tradeTypeCode': 'A1', 'dealOrWarrantPrc': '11억'})],
+        2: [Article.from_api({'articleNo': 'b1', 'tradeTypeCode': 'B1', 'dealOrWarrantPrc': '6억'})],
+    }
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    """fetch_complex_details를 대신해 pages['current']의 페이지를 돌려주고 요청한 페이지 번호를 기록합니다."""
+    pages = {'current': make_pages(), 'requested': []}
+
+    def fetch_complex_details(complex_no, page, headers_env, cookies_env, cancel_event=None, crawl_filters=None):
+        pages['requested'].append(page)
+        current = pages['current']
+        return list(current.get(page, [])), page < max(current)
+
+    monkeypatch.setattr(ccd, 'fetch_complex_details', fetch_complex_details)
+    return pages
+
+
+def crawl(previous_snapshot=None, marker=MARKER):
+    return ccd.collect_complex_articles(marker, {}, {}, previous_snapshot=previous_snapshot)
+
+
+def test_unchanged_complex_reuses_previous_articles_after_first_page(fake_pages):
+    articles, is_complete, snapshot = crawl()
+    assert is_complete and [article.articleNo for article in articles] == ['a1', 'a2', 'b1']
+    previous_articles = [Article.from_api({'articleNo': 'kept'})]
+
+    fake_pages['requested'].clear()
+    reused, is_complete, new_snapshot = crawl(dict(snapshot, articles=previous_articles))
+    assert fake_pages['requested'] == [1]
+    assert [article.articleNo for article in reused] == ['kept']
+    assert is_complete and new_snapshot == snapshot
+
+
+def test_changed_first_page_is_crawled_again(fake_pages):
+    _, _, snapshot = crawl()
+    fake_pages['current'] = make_pages(first_price='9억 5,000')
+    fake_pages['requested'].clear()
+    articles, _, new_snapshot = crawl(dict(snapshot, articles=[]))
+    assert fake_pages['requested'] == [1, 2]
+    assert articles[0].dealOrWarrantPrc == '9억 5,000'
+    assert new_snapshot['fingerprint'] != snapshot['fingerprint']
+
+
+def test_changed_marker_counts_are_crawled_again(fake_pages):
+    _, _, snapshot = crawl()
+    fake_pages['requested'].clear()
+    articles, _, _ = crawl(dict(snapshot, articles=[]), marker=dict(MARKER, rentCount=1))
+    assert fake_pages['requested'] == [1, 2]
+    assert len(articles) == 3
+
+
+def test_previous_articles_are_rebuilt_with_schema_types():
+    previous_df = pd.DataFrame({
+        'articleNo': ['a1', 'a2'],
+        'markerId': pd.Categorical(['1001', '1001']),
+        'area1': [84.0, np.nan],
+        'totalHouseholdCount': pd.array([500, None], dtype='Int16'),
+        'dealOrWarrantPrc': pd.Categorical(['10억', None]),
+    })
+    previous = _previous_complex_snapshots((previous_df, {'1001': {'counts': [2, 1, 0], 'fingerprint': 'x'}}))
+    first, second = previous['1001']['articles']
+    assert first.to_dict() == {'articleNo': 'a1', 'dealOrWarrantPrc': '10억', 'area1': 84, 'markerId': '1001',
+                               'totalHouseholdCount': 500}
+    assert type(first.area1) is int and type(first.totalHouseholdCount) is int
+    assert second.to_dict() == {'articleNo': 'a2', 'markerId': '1001'}
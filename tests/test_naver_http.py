@@ -0,0 +1,118 @@
+# tests/test_naver_http.py
+# AdaptiveRateLimiter(AIMD, Retry-After)와 throttled_get 재시도 동작 테스트. 네트워크 없이 가짜 시계/세션을 사용합니다.
+# 실행: python -m pytest -q tests (프로젝트 루트에서)
+import pytest
+
+from src.external_scripts import naver_http
+from src.external_scripts.naver_http import AdaptiveRateLimiter, RATE_DECREASE_COOLDOWN_SECONDS
+
+
+class FakeClock:
+    """time.monotonic/time.sleep 대체: sleep은 실제로 기다리지 않고 시계만 앞으로 보냅니다."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += max(seconds, 1e-6) # 부동소수점 오차로 남은 아주 짧은 대기도 시계를 움직이도록
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """미리 정한 응답을 순서대로 돌려주고 요청 URL을 기록합니다."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requested_urls = []
+
+    def get(self, url, **kwargs):
+        self.requested_urls.append(url)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(naver_http.time, 'monotonic', fake_clock.monotonic)
+    monkeypatch.setattr(naver_http.time, 'sleep', fake_clock.sleep)
+    return fake_clock
+
+
+def make_limiter(initial_rate=4.0, min_rate=0.5, max_rate=5.0):
+    return AdaptiveRateLimiter('test.invalid', initial_rate=initial_rate, min_rate=min_rate, max_rate=max_rate,
+                               increase_step=0.5, decrease_factor=0.5)
+
+
+def test_success_increases_rate_additively_up_to_max(clock):
+    limiter = make_limiter(initial_rate=4.0, max_rate=5.0)
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(4.5)
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(5.0)
+
+
+def test_throttle_decreases_rate_once_per_cooldown_down_to_min(clock):
+    limiter = make_limiter(initial_rate=4.0, min_rate=0.5)
+    limiter.on_throttle()
+    assert limiter.rate == pytest.approx(2.0)
+    limiter.on_throttle() # 같은 순간에 받은 제한 응답은 한 번만 반영
+    assert limiter.rate == pytest.approx(2.0)
+    for _ in range(5):
+        clock.now += RATE_DECREASE_COOLDOWN_SECONDS
+        limiter.on_throttle()
+    assert limiter.rate == pytest.approx(0.5)
+
+
+def test_retry_after_blocks_host_until_it_expires(clock):
+    limiter = make_limiter(initial_rate=5.0)
+    assert limiter.acquire()
+    limiter.on_throttle(retry_after_seconds=7)
+    started_at = clock.now
+    assert limiter.acquire()
+    assert clock.now - started_at >= 7
+    assert clock.sleeps[0] == pytest.approx(7)
+
+
+def test_throttled_get_waits_retry_after_then_returns_success(clock, monkeypatch):
+    monkeypatch.setattr(naver_http, '_limiters', {})
+    session = FakeSession([FakeResponse(429, {'Retry-After': '3'}), FakeResponse(200)])
+    response = naver_http.throttled_get(session, 'https://test.invalid/api', max_retries=2)
+    assert response.status_code == 200
+    assert len(session.requested_urls) == 2
+    assert 3 in clock.sleeps
+    limiter = naver_http.get_rate_limiter('test.invalid')
+    assert limiter.rate < naver_http.DEFAULT_RATE_LIMIT['initial_rate'] # 429로 줄었다가 성공 1건만큼만 회복
+
+
+def test_throttled_get_returns_last_response_when_retries_exhausted(clock, monkeypatch):
+    monkeypatch.setattr(naver_http, '_limiters', {})
+    session = FakeSession([FakeResponse(503), FakeResponse(503)])
+    response = naver_http.throttled_get(session, 'https://test.invalid/api', max_retries=1)
+    assert response.status_code == 503
+    assert len(session.requested_urls) == 2
+
+
+def test_session_cache_evicts_least_recently_used_without_closing(monkeypatch):
+    monkeypatch.setattr(naver_http, '_sessions', naver_http.OrderedDict())
+    monkeypatch.setattr(naver_http, 'MAX_CACHED_SESSIONS', 2)
+    closed = []
+    first = naver_http._get_session('test.invalid', {'n': '1'})
+    second = naver_http._get_session('test.invalid', {'n': '2'})
+    for name, session in (('first', first), ('second', second)):
+        monkeypatch.setattr(session, 'close', lambda name=name: closed.append(name))
+    assert naver_http._get_session('test.invalid', {'n': '1'}) is first # 최근 사용으로
+    naver_http._get_session('test.invalid', {'n': '3'})
+    assert naver_http._get_session('test.invalid', {'n': '1'}) is first
+    assert naver_http._get_session('test.invalid', {'n': '2'}) is not second # 가장 오래 사용되지 않은 세션이 빠짐
+    assert closed == [] # 다른 스레드가 쓰고 있을 수 있는 세션은 닫지 않음
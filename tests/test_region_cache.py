@@ -0,0 +1,64 @@
+# tests/test_region_cache.py
+# RegionResultCache 2단계 캐시 테스트: 디스크 적중을 메모리로 올린 뒤의 만료 시각, 메모리 LRU 한도.
+# 실행: python -m pytest -q tests (프로젝트 루트에서)
+import pandas as pd
+import pytest
+
+from src import region_cache
+from src.region_cache import RegionResultCache, DiskRegionCache, make_region_cache_key
+
+KEY = make_region_cache_key('1168010100')
+DF = pd.DataFrame({'articleNo': ['a1']})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(region_cache.time, 'time', fake_clock.time)
+    return fake_clock
+
+
+def make_cache(tmp_path, **kwargs):
+    disk_cache = DiskRegionCache(cache_dir=str(tmp_path), ttl_seconds=3600)
+    return RegionResultCache(ttl_seconds=600, disk_cache=disk_cache, **kwargs), disk_cache
+
+
+def test_disk_hit_older_than_memory_ttl_is_kept_in_memory(tmp_path, clock):
+    cache, disk_cache = make_cache(tmp_path)
+    disk_cache.put(KEY, DF, '역삼동', created_at=clock.now - 700) # 다른 프로세스가 700초 전에 저장
+    for _ in range(5):
+        assert cache.get(KEY)[1] == '역삼동'
+    stats = cache.stats()
+    assert stats['hits'] == 5 and stats['disk_hits'] == 1 and stats['entries'] == 1
+    assert cache.get_stale(KEY)[2] == pytest.approx(700) # 나이는 수집 시각 기준
+
+
+def test_promoted_entry_expires_with_disk_entry(tmp_path, clock):
+    cache, disk_cache = make_cache(tmp_path)
+    disk_cache.put(KEY, DF, '역삼동', created_at=clock.now - 3500)
+    assert cache.get(KEY) is not None
+    clock.now += 50
+    assert cache.get(KEY) is not None
+    assert cache.stats()['disk_hits'] == 1
+    clock.now += 100 # 수집 후 3650초: 메모리 TTL(올린 뒤 600초)보다 디스크 TTL(3600초)이 먼저
+    assert cache.get(KEY) is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path, clock):
+    cache = RegionResultCache(ttl_seconds=600, max_entries=2)
+    keys = [make_region_cache_key(cortar_no) for cortar_no in ('1', '2', '3')]
+    cache.put(keys[0], DF, '1동')
+    cache.put(keys[1], DF, '2동')
+    assert cache.get(keys[0]) is not None # 1동을 최근 사용으로
+    cache.put(keys[2], DF, '3동')
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None